@@ -1,26 +1,44 @@
 """
 Additional SQL Queries Exercise
 
-This script provides a framework for practicing SQL queries on the student_records table.
-Your task is to fill in the SQL queries to implement the following functionality:
+This script runs three analytical queries on the student_records table:
 
 1. Performance category classification
 2. Letter grade assignment with statistics by grade
 3. Gap analysis between consecutively ranked students
 
+The reference SQL for each query lives in report_queries.py, and the grading
+scales in grading.py. Each report can also be computed by the in-memory
+analytics engine (analytics_engine.py) instead of on the server. With the
+``stats`` engine the category and grade distribution reports are read from
+the pre-aggregated student_stats table (student_stats.py); the per-student
+reports still run their SQL queries.
+
 Usage:
     python additional_queries_exercise.py
+    python additional_queries_exercise.py --engine memory
+    python additional_queries_exercise.py --combined
+    python additional_queries_exercise.py --concurrent
+    python additional_queries_exercise.py --output-format jsonl > reports.jsonl
 """
 
 import os
 import sys
-from db_config import get_db_connection
+import argparse
+from functools import partial
+from db_config import db_connection
+from data_analyzer import load_combined_report
+from report_queries import (ANALYSIS_ENGINES, fetch_performance_categories, fetch_student_grades,
+                            fetch_grade_distribution, fetch_gap_analysis)
+from query_cache import CACHE_BACKENDS, configure_query_cache, print_cache_stats
+from instrumentation import PROFILE_MODES, timed_function, start_instrumentation, finish_instrumentation
+from output_writers import OUTPUT_FORMATS, RowWriter, use_stderr_consoles
 from rich.console import Console
 from rich.table import Table
 
 console = Console()
 
-def run_performance_category_query():
+def run_performance_category_query(engine="sql", report=None):
     """
     Query 1: Classify students into performance categories based on CGPA ranges
     and count how many students are in each category.
@@ -31,51 +49,54 @@ def run_performance_category_query():
     - Good: CGPA >= 3.3
     - Satisfactory: CGPA >= 3.0
     - Needs Improvement: CGPA < 3.0
+    
+    When a combined ``report`` (data_analyzer.load_combined_report) is given,
+    its category buckets are rendered without another query.
     """
     console.print("\n[bold cyan]QUERY 1: Student Performance Categories[/bold cyan]")
     console.print("Classifying students into performance categories based on CGPA...")
     
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            # TODO: Write a SQL query that:
-            # 1. Uses CASE statement to classify students into performance categories
-            # 2. Groups by performance category
-            # 3. Calculates COUNT, MIN, MAX, and AVG of CGPA for each category
-            # 4. Orders results by min_cgpa in descending order
-            sql = """
-            -- Replace this comment with your SQL query
-            -- Hint: Use a CASE statement to create the performance_category column
-            -- Example: CASE WHEN condition THEN value ... END AS column_name
-            """
-            
-            console.print(f"Executing query: Performance classification")
-            cursor.execute(sql)
-            results = cursor.fetchall()
-            
-            # Display results in a table
-            table = Table(title="Student Performance Categories")
-            table.add_column("Performance Category", style="cyan")
-            table.add_column("Student Count", style="magenta")
-            table.add_column("Min CGPA", justify="right")
-            table.add_column("Max CGPA", justify="right")
-            table.add_column("Avg CGPA", justify="right")
-            
-            for row in results:
-                table.add_row(
-                    row['performance_category'],
-                    str(row['student_count']),
-                    f"{row['min_cgpa']:.2f}",
-                    f"{row['max_cgpa']:.2f}",
-                    f"{row['avg_cgpa']:.2f}"
-                )
-            
-            console.print(table)
+    render_performance_categories(fetch_performance_category_report(engine=engine, report=report))
+
+def fetch_performance_category_report(engine="sql", report=None):
+    """
+    Return the performance category rows, from ``report`` when one is given.
+    """
+    if report is None and engine == "stats":
+        report = load_combined_report(engine="stats")
+    if report is not None:
+        return report['performance_categories']
     
-    finally:
-        connection.close()
+    with db_connection() as connection:
+        if engine == "memory":
+            from analytics_engine import load_analytics
+            return load_analytics(connection).performance_categories()
+        return fetch_performance_categories(connection)
 
-def run_letter_grade_query():
+@timed_function("render")
+def render_performance_categories(results):
+    """
+    Print the performance category table.
+    """
+    table = Table(title="Student Performance Categories")
+    table.add_column("Performance Category", style="cyan")
+    table.add_column("Student Count", style="magenta")
+    table.add_column("Min CGPA", justify="right")
+    table.add_column("Max CGPA", justify="right")
+    table.add_column("Avg CGPA", justify="right")
+    
+    for row in results:
+        table.add_row(
+            row['performance_category'],
+            str(row['student_count']),
+            f"{row['min_cgpa']:.2f}",
+            f"{row['max_cgpa']:.2f}",
+            f"{row['avg_cgpa']:.2f}"
+        )
+    
+    console.print(table)
+
+def run_letter_grade_query(engine="sql", report=None):
     """
     Query 2: Assign letter grades to students and list students with their grades
     
@@ -89,164 +110,246 @@ def run_letter_grade_query():
     - C+: CGPA >= 2.3
     - C: CGPA >= 2.0
     - F: CGPA < 2.0
+    
+    When a combined ``report`` is given, the grade distribution comes from it
+    and only the per-student grades are queried.
     """
     console.print("\n[bold cyan]QUERY 2: Letter Grade Assignment[/bold cyan]")
     console.print("Assigning letter grades to students based on CGPA...")
     
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            # TODO: Write a SQL query that:
-            # 1. Selects id_no, name, cgpa
-            # 2. Uses CASE statement to assign letter grades based on CGPA ranges
-            # 3. Orders results by CGPA in descending order
-            sql = """
-            -- Replace this comment with your SQL query for individual student grades
-            -- Hint: Use a CASE statement to create the letter_grade column
-            """
-            cursor.execute(sql)
-            student_results = cursor.fetchall()
-            
-            # TODO: Write a second SQL query that:
-            # 1. Uses the same CASE statement to assign letter grades
-            # 2. Groups the results by letter_grade
-            # 3. Counts how many students received each grade
-            # 4. Orders by CGPA (MIN) in descending order
-            sql2 = """
-            -- Replace this comment with your SQL query for grade distribution
-            -- Make sure your CASE statement matches the one above
-            """
-            cursor.execute(sql2)
-            grade_stats = cursor.fetchall()
-            
-            # Display student grades
-            table1 = Table(title="Student Letter Grades")
-            table1.add_column("ID", style="dim")
-            table1.add_column("Name", style="cyan")
-            table1.add_column("CGPA", justify="right")
-            table1.add_column("Grade", style="magenta bold")
-            
-            for student in student_results:
-                table1.add_row(
-                    student['id_no'],
-                    student['name'],
-                    f"{student['cgpa']:.2f}",
-                    student['letter_grade']
-                )
-            
-            console.print(table1)
-            
-            # Display grade distribution
-            table2 = Table(title="Grade Distribution")
-            table2.add_column("Letter Grade", style="magenta bold")
-            table2.add_column("Count", justify="right")
-            table2.add_column("Percentage", justify="right")
-            
-            total_students = len(student_results)
-            for grade in grade_stats:
-                percentage = (grade['count'] / total_students) * 100
-                table2.add_row(
-                    grade['letter_grade'],
-                    str(grade['count']),
-                    f"{percentage:.1f}%"
-                )
-            
-            console.print(table2)
+    render_letter_grades(*fetch_letter_grade_report(engine=engine, report=report))
+
+def fetch_letter_grade_report(engine="sql", report=None):
+    """
+    Return the ``(student_results, grade_stats)`` pair rendered by render_letter_grades.
+    """
+    if report is None and engine == "stats":
+        report = load_combined_report(engine="stats")
+    with db_connection() as connection:
+        if engine == "memory":
+            from analytics_engine import load_analytics
+            analytics = load_analytics(connection)
+            student_results = analytics.student_grades()
+            grade_stats = report['grade_distribution'] if report else analytics.grade_distribution()
+        else:
+            student_results = fetch_student_grades(connection)
+            grade_stats = report['grade_distribution'] if report else fetch_grade_distribution(connection)
+    return student_results, grade_stats
+
+@timed_function("render")
+def render_letter_grades(student_results, grade_stats):
+    """
+    Print the student letter grade table and the grade distribution table.
+    """
+    # Display student grades
+    table1 = Table(title="Student Letter Grades")
+    table1.add_column("ID", style="dim")
+    table1.add_column("Name", style="cyan")
+    table1.add_column("CGPA", justify="right")
+    table1.add_column("Grade", style="magenta bold")
     
-    finally:
-        connection.close()
+    for student in student_results:
+        table1.add_row(
+            student['id_no'],
+            student['name'],
+            f"{student['cgpa']:.2f}",
+            student['letter_grade']
+        )
+    
+    console.print(table1)
+    
+    # Display grade distribution
+    table2 = Table(title="Grade Distribution")
+    table2.add_column("Letter Grade", style="magenta bold")
+    table2.add_column("Count", justify="right")
+    table2.add_column("Percentage", justify="right")
+    
+    total_students = sum(grade['count'] for grade in grade_stats)
+    for grade in grade_stats:
+        percentage = (grade['count'] / total_students) * 100
+        table2.add_row(
+            grade['letter_grade'],
+            str(grade['count']),
+            f"{percentage:.1f}%"
+        )
+    
+    console.print(table2)
 
-def run_gap_analysis_query():
+def run_gap_analysis_query(engine="sql"):
     """
     Query 3: Analyze the CGPA gaps between consecutively ranked students
     """
     console.print("\n[bold cyan]QUERY 3: CGPA Gap Analysis[/bold cyan]")
     console.print("Analyzing the gaps between consecutively ranked students...")
     
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            # TODO: Write a SQL query that:
-            # 1. Selects id_no, name, and cgpa from student_records
-            # 2. Orders results by CGPA in descending order to get rankings
-            sql = """
-            -- Replace this comment with your SQL query to get students ordered by CGPA
-            -- Hint: Use ORDER BY to get the ranking right
-            """
-            cursor.execute(sql)
-            students = cursor.fetchall()
-            
-            # Calculate gaps manually (using Python instead of SQL for this part)
-            table = Table(title="CGPA Gap Analysis")
-            table.add_column("Rank", justify="right", style="dim")
-            table.add_column("ID", style="dim")
-            table.add_column("Name", style="cyan")
-            table.add_column("CGPA", justify="right")
-            table.add_column("Gap", justify="right", style="magenta")
-            
-            # Find largest gap for highlighting
-            gaps = []
-            for i in range(len(students) - 1):
-                current_cgpa = students[i]['cgpa']
-                next_cgpa = students[i+1]['cgpa']
-                gap = current_cgpa - next_cgpa
-                gaps.append(gap)
-            
-            max_gap = max(gaps) if gaps else 0
-            
-            # Populate table with gap analysis
-            for i, student in enumerate(students):
-                rank = i + 1
-                
-                # Calculate gap with next student
-                if i < len(students) - 1:
-                    next_student = students[i+1]
-                    gap = student['cgpa'] - next_student['cgpa']
-                    gap_str = f"{gap:.2f}"
-                    
-                    # Highlight largest gap
-                    if gap == max_gap:
-                        gap_str = f"[bold red]{gap_str}[/bold red]"
-                else:
-                    gap_str = "N/A"  # Last student has no gap
-                
-                table.add_row(
-                    str(rank),
-                    student['id_no'],
-                    student['name'],
-                    f"{student['cgpa']:.2f}",
-                    gap_str
-                )
-            
-            console.print(table)
+    render_gap_analysis(fetch_gap_report(engine=engine))
+
+def fetch_gap_report(engine="sql"):
+    """
+    Return the ranked students with the gap to the next one.
+    """
+    with db_connection() as connection:
+        if engine == "memory":
+            from analytics_engine import load_analytics
+            return load_analytics(connection).gap_analysis()
+        return fetch_gap_analysis(connection)
+
+@timed_function("render")
+def render_gap_analysis(students):
+    """
+    Print the ranked gap table and a short analysis of the largest gap.
+
+    Each student row carries the gap to the next ranked student (None for the
+    last one), so the table and the statistics come from a single pass.
+    """
+    table = Table(title="CGPA Gap Analysis")
+    table.add_column("Rank", justify="right", style="dim")
+    table.add_column("ID", style="dim")
+    table.add_column("Name", style="cyan")
+    table.add_column("CGPA", justify="right")
+    table.add_column("Gap", justify="right", style="magenta")
+    
+    # Find largest gap for highlighting
+    gaps = [student['gap'] for student in students[:-1]]
+    max_gap = max(gaps) if gaps else 0
+    
+    # Populate table with gap analysis
+    for i, student in enumerate(students):
+        rank = i + 1
+        
+        if student['gap'] is not None:
+            gap_str = f"{student['gap']:.2f}"
             
-            # Provide analysis of the largest gap
-            if max_gap > 0:
-                largest_gap_index = gaps.index(max_gap)
-                higher_student = students[largest_gap_index]
-                lower_student = students[largest_gap_index + 1]
-                
-                console.print("\n[bold]Gap Analysis:[/bold]")
-                console.print(f"The largest CGPA gap ({max_gap:.2f}) is between:")
-                console.print(f"  - {higher_student['name']} (CGPA: {higher_student['cgpa']:.2f})")
-                console.print(f"  - {lower_student['name']} (CGPA: {lower_student['cgpa']:.2f})")
-                
-                # Calculate average gap
-                avg_gap = sum(gaps) / len(gaps) if gaps else 0
-                console.print(f"The average gap between consecutive students is {avg_gap:.3f}")
+            # Highlight largest gap
+            if student['gap'] == max_gap:
+                gap_str = f"[bold red]{gap_str}[/bold red]"
+        else:
+            gap_str = "N/A"  # Last student has no gap
+        
+        table.add_row(
+            str(rank),
+            student['id_no'],
+            student['name'],
+            f"{student['cgpa']:.2f}",
+            gap_str
+        )
     
-    finally:
-        connection.close()
+    console.print(table)
+    
+    # Provide analysis of the largest gap
+    if max_gap > 0:
+        largest_gap_index = gaps.index(max_gap)
+        higher_student = students[largest_gap_index]
+        lower_student = students[largest_gap_index + 1]
+        
+        console.print("\n[bold]Gap Analysis:[/bold]")
+        console.print(f"The largest CGPA gap ({max_gap:.2f}) is between:")
+        console.print(f"  - {higher_student['name']} (CGPA: {higher_student['cgpa']:.2f})")
+        console.print(f"  - {lower_student['name']} (CGPA: {lower_student['cgpa']:.2f})")
+        
+        # Calculate average gap
+        avg_gap = sum(gaps) / len(gaps) if gaps else 0
+        console.print(f"The average gap between consecutive students is {avg_gap:.3f}")
 
-def main():
+def report_output_path(output, name, output_format):
+    """
+    Return the file a report goes to when each report needs its own file.
+    
+    ``grades.csv`` becomes ``grades.student_grades.csv`` and so on.
+    """
+    stem, extension = os.path.splitext(output)
+    return f"{stem}.{name}{extension or '.' + output_format}"
+
+def export_reports(output, output_format, engine="sql", report=None):
+    """
+    Write every report's rows as CSV, JSON Lines or Parquet instead of tables.
+    
+    JSON Lines output is a single stream in which each row carries a
+    ``report`` field. CSV and Parquet need one schema per file, so each
+    report is written to its own file (see report_output_path).
+    """
+    student_results, grade_stats = fetch_letter_grade_report(engine=engine, report=report)
+    reports = [
+        ("performance_categories", fetch_performance_category_report(engine=engine, report=report)),
+        ("student_grades", student_results),
+        ("grade_distribution", grade_stats),
+        ("gap_analysis", fetch_gap_report(engine=engine)),
+    ]
+    
+    if output_format == "jsonl":
+        with RowWriter(output, output_format, []) as writer:
+            for name, rows in reports:
+                writer.write_rows([{"report": name, **row} for row in rows])
+        console.print(f"[green]✓[/green] Wrote {writer.row_count:,} report rows to "
+                      f"[cyan]{'stdout' if output == '-' else output}[/cyan]")
+        return
+    
+    for name, rows in reports:
+        path = report_output_path(output, name, output_format)
+        with RowWriter(path, output_format, list(rows[0]) if rows else []) as writer:
+            writer.write_rows(rows)
+        console.print(f"[green]✓[/green] Wrote {writer.row_count:,} {name} rows to [cyan]{path}[/cyan]")
+
+def main(argv=None):
     """Execute all three query exercises"""
+    parser = argparse.ArgumentParser(description="Run the additional SQL query reports")
+    parser.add_argument("--engine", choices=ANALYSIS_ENGINES, default="sql",
+                        help="Compute reports with SQL on the server, in memory, or from the student_stats summary (default: sql)")
+    parser.add_argument("--combined", action="store_true",
+                        help="Compute the category and grade distribution reports in a single scan")
+    parser.add_argument("--query-cache", choices=CACHE_BACKENDS, default=None,
+                        help="Result cache backend for report queries (default: QUERY_CACHE from .env, or memory)")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="Seconds a cached query result stays valid (default: QUERY_CACHE_TTL from .env, or 300)")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Fetch the three reports concurrently and print per-report timings")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=None,
+                        help="Write the report rows as CSV, JSON Lines or Parquet instead of rendering tables")
+    parser.add_argument("--output", default="-",
+                        help="Output for --output-format: - for stdout (JSON Lines only) or a file name; "
+                             "CSV and Parquet write one file per report next to it")
+    parser.add_argument("--profile", nargs="?", const="timers", choices=PROFILE_MODES, default=None,
+                        help="Time every phase and query and print a summary at the end; 'cpu' adds cProfile, "
+                             "'memory' adds tracemalloc, 'all' adds both (default when given: timers)")
+    parser.add_argument("--profile-output", default="profile_report.json",
+                        help="JSON file for the --profile summary (default: profile_report.json)")
+    args = parser.parse_args(argv)
+    if args.output_format and args.output_format != "jsonl" and args.output == "-":
+        parser.error(f"--output-format {args.output_format} writes one file per report; pass --output")
+    if args.output_format:
+        # Keep stdout for the data alone
+        use_stderr_consoles()
+    if args.profile:
+        start_instrumentation(args.profile)
+    
     console.print("[bold green]=== SQL Query Exercises ===[/bold green]")
     
     try:
-        # Run all three queries
-        run_performance_category_query()
-        run_letter_grade_query()
-        run_gap_analysis_query()
+        configure_query_cache(backend=args.query_cache, ttl=args.cache_ttl)
+        report = load_combined_report(engine=args.engine) if args.combined else None
+        
+        if args.output_format:
+            export_reports(args.output, args.output_format, engine=args.engine, report=report)
+        elif args.concurrent:
+            from report_runner import run_reports
+            if not run_reports([
+                ("QUERY 1: Student Performance Categories",
+                 partial(fetch_performance_category_report, engine=args.engine, report=report),
+                 render_performance_categories),
+                ("QUERY 2: Letter Grade Assignment",
+                 partial(fetch_letter_grade_report, engine=args.engine, report=report),
+                 lambda results: render_letter_grades(*results)),
+                ("QUERY 3: CGPA Gap Analysis",
+                 partial(fetch_gap_report, engine=args.engine),
+                 render_gap_analysis),
+            ]):
+                return 1
+        else:
+            # Run all three queries
+            run_performance_category_query(engine=args.engine, report=report)
+            run_letter_grade_query(engine=args.engine, report=report)
+            run_gap_analysis_query(engine=args.engine)
+        print_cache_stats()
         
         console.print("\n[bold green]All queries executed successfully![/bold green]")
     
@@ -254,7 +357,10 @@ def main():
         console.print(f"\n[bold red]ERROR: {e}[/bold red]")
         return 1
     
+    finally:
+        finish_instrumentation(args.profile_output)
+    
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
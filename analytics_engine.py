@@ -0,0 +1,216 @@
+"""
+In-memory analytics engine for the student reports.
+
+The id_no, name and cgpa columns are loaded once into NumPy arrays, sorted by
+rank, and every report is computed from those arrays with vectorized
+operations instead of one SQL round trip per report. Results have the same
+shape as the functions in report_queries.py.
+"""
+
+import threading
+import numpy as np
+from pymysql.cursors import SSCursor
+from db_backends import get_backend
+from grading import PERFORMANCE_CATEGORIES, LETTER_GRADES, thresholds
+from report_queries import build_combined_report
+from streaming_stats import PERCENTILES
+from instrumentation import timed
+
+# Rows fetched per round trip while loading the table
+LOAD_CHUNK_SIZE = 10000
+
+class StudentAnalytics:
+    """
+    Columnar snapshot of student_records with vectorized report methods.
+
+    Rows are held in rank order: highest CGPA first, ties broken by id_no,
+    matching the ORDER BY of the SQL reports.
+    """
+
+    def __init__(self, ids, names, cgpa):
+        ids = np.asarray(ids, dtype=str)
+        names = np.asarray(names, dtype=object)
+        # On MySQL the column is a single-precision FLOAT; rounding through
+        # float32 reproduces the values (and threshold comparisons) MySQL
+        # works with. SQLite and DuckDB store doubles.
+        stored_dtype = np.float32 if get_backend().single_precision_float else np.float64
+        cgpa = np.asarray(cgpa, dtype=stored_dtype).astype(np.float64)
+
+        # Stable sort by id first, then by descending CGPA, so ties keep id order
+        order = np.argsort(ids, kind='stable')
+        order = order[np.argsort(-cgpa[order], kind='stable')]
+        self.ids = ids[order]
+        self.names = names[order]
+        self.cgpa = cgpa[order]
+
+    @classmethod
+    def from_connection(cls, connection):
+        """
+        Load the student_records columns through an unbuffered cursor.
+        """
+        ids = []
+        names = []
+        cgpa = []
+        with connection.cursor(SSCursor) as cursor:
+            cursor.execute("SELECT id_no, name, cgpa FROM student_records")
+            while True:
+                rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+                if not rows:
+                    break
+                for id_no, name, value in rows:
+                    ids.append(id_no)
+                    names.append(name)
+                    cgpa.append(value)
+        return cls(ids, names, cgpa)
+
+    def __len__(self):
+        return len(self.cgpa)
+
+    def _student(self, index):
+        return {
+            'id_no': str(self.ids[index]),
+            'name': self.names[index],
+            'cgpa': float(self.cgpa[index]),
+        }
+
+    def _bands(self, scale):
+        """
+        Return the [start, end) slice of the ranked rows falling in each band.
+
+        Because rows are sorted by descending CGPA, every band of a grading
+        scale is one contiguous run of rows.
+        """
+        # searchsorted needs ascending keys, so search the negated CGPA column
+        negated = -self.cgpa
+        cuts = np.searchsorted(negated, [-minimum for minimum in thresholds(scale)], side='right')
+        bounds = [0, *cuts.tolist(), len(self.cgpa)]
+        return [(label, bounds[i], bounds[i + 1]) for i, (label, _) in enumerate(scale)]
+
+    def summary(self):
+        """
+        Return the count, minimum, maximum and average CGPA, with the standard deviation and percentiles.
+        """
+        if len(self) == 0:
+            return {'count': 0, 'min_cgpa': None, 'max_cgpa': None, 'avg_cgpa': None}
+        return {
+            'count': len(self),
+            'min_cgpa': float(self.cgpa[-1]),
+            'max_cgpa': float(self.cgpa[0]),
+            'avg_cgpa': float(self.cgpa.mean()),
+            **self.distribution(),
+        }
+    
+    def distribution(self):
+        """
+        Return the population standard deviation and nearest-rank percentiles of CGPA.
+        
+        Same shape and method as streaming_stats.distribution_summary, but
+        read from the exact values rather than a histogram.
+        """
+        count = len(self)
+        if count == 0:
+            return {'stddev_cgpa': None, 'percentiles': None}
+        # The p-th percentile is the value at rank ceil(p * n / 100) in ascending order
+        ranks = [max(1, -(-percent * count // 100)) for percent in PERCENTILES]
+        return {
+            'stddev_cgpa': float(self.cgpa.std()),
+            'percentiles': {percent: float(self.cgpa[count - rank]) for percent, rank in zip(PERCENTILES, ranks)},
+        }
+
+    def top_students(self, limit=3):
+        """
+        Return the ``limit`` students with the highest CGPA.
+        """
+        return [self._student(i) for i in range(min(limit, len(self)))]
+
+    def performance_categories(self):
+        """
+        Return the count and CGPA range of each non-empty performance category.
+        """
+        results = []
+        for label, start, end in self._bands(PERFORMANCE_CATEGORIES):
+            if start == end:
+                continue
+            band = self.cgpa[start:end]
+            results.append({
+                'performance_category': label,
+                'student_count': end - start,
+                'min_cgpa': float(band[-1]),
+                'max_cgpa': float(band[0]),
+                'avg_cgpa': float(band.mean()),
+            })
+        return results
+
+    def student_grades(self):
+        """
+        Return every student with their letter grade, highest CGPA first.
+        """
+        grades = np.empty(len(self), dtype=object)
+        for label, start, end in self._bands(LETTER_GRADES):
+            grades[start:end] = label
+        return [
+            {'id_no': id_no, 'name': name, 'cgpa': cgpa, 'letter_grade': grade}
+            for id_no, name, cgpa, grade in zip(self.ids.tolist(), self.names.tolist(), self.cgpa.tolist(), grades.tolist())
+        ]
+
+    def grade_distribution(self):
+        """
+        Return the number of students holding each letter grade.
+        """
+        return [
+            {'letter_grade': label, 'count': end - start}
+            for label, start, end in self._bands(LETTER_GRADES)
+            if start < end
+        ]
+
+    def gap_analysis(self):
+        """
+        Return the students in rank order with the gap to the next student.
+
+        The last student's gap is None.
+        """
+        gaps = np.diff(self.cgpa) * -1
+        return [
+            {'id_no': id_no, 'name': name, 'cgpa': cgpa, 'gap': gap}
+            for id_no, name, cgpa, gap in zip(self.ids.tolist(), self.names.tolist(), self.cgpa.tolist(), [*gaps.tolist(), None])
+        ]
+
+    def combined_report(self, top_n=3):
+        """
+        Return the same combined report as report_queries.fetch_combined_report.
+        """
+        buckets = []
+        categories = self._bands(PERFORMANCE_CATEGORIES)
+        grades = self._bands(LETTER_GRADES)
+        for category, category_start, category_end in categories:
+            for grade, grade_start, grade_end in grades:
+                start = max(category_start, grade_start)
+                end = min(category_end, grade_end)
+                if start >= end:
+                    continue
+                band = self.cgpa[start:end]
+                buckets.append({
+                    'performance_category': category,
+                    'letter_grade': grade,
+                    'student_count': end - start,
+                    'min_cgpa': float(band[-1]),
+                    'max_cgpa': float(band[0]),
+                    'sum_cgpa': float(band.sum()),
+                })
+        return build_combined_report(buckets, self.top_students(top_n), self.distribution())
+
+# Snapshot shared by every report in the process
+_analytics = None
+_analytics_lock = threading.Lock()
+
+def load_analytics(connection, refresh=False):
+    """
+    Return the process-wide StudentAnalytics snapshot, loading it on first use.
+    """
+    global _analytics
+    # Concurrent reports wait for a single load instead of each loading the table
+    with _analytics_lock:
+        if _analytics is None or refresh:
+            with timed("query"):
+                _analytics = StudentAnalytics.from_connection(connection)
+        return _analytics
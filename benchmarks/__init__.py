@@ -0,0 +1,7 @@
+"""
+Benchmarks for the student database tools.
+
+Run each benchmark from the repository root as a module, for example:
+    python -m benchmarks.import_engines
+    python -m benchmarks.suite
+"""
@@ -0,0 +1,123 @@
+"""
+Analytics Engine Benchmark
+
+Compares the SQL-pushdown and in-memory analysis engines as the number of
+rows in student_records grows. For each row count a generated CSV file is
+bulk-loaded, then every report is timed with both engines. The in-memory
+timings include loading the snapshot, which every report after the first
+reuses.
+
+Usage:
+    python -m benchmarks.analytics_engines
+    python -m benchmarks.analytics_engines --rows 10000 100000 1000000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from db_config import db_connection, create_students_table
+from csv_importer import import_csv_to_db
+from report_queries import (fetch_summary, fetch_top_students, fetch_performance_categories,
+                            fetch_student_grades, fetch_grade_distribution, fetch_gap_analysis)
+from analytics_engine import StudentAnalytics
+from query_cache import configure_query_cache
+from benchmarks.data_generator import generate_student_csv
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+DEFAULT_ROW_COUNTS = (10_000, 100_000, 1_000_000)
+
+# (report name, SQL function, in-memory method) triples
+REPORTS = [
+    ("summary", fetch_summary, StudentAnalytics.summary),
+    ("top_students", lambda connection: fetch_top_students(connection, 3), lambda analytics: analytics.top_students(3)),
+    ("performance_categories", fetch_performance_categories, StudentAnalytics.performance_categories),
+    ("student_grades", fetch_student_grades, StudentAnalytics.student_grades),
+    ("grade_distribution", fetch_grade_distribution, StudentAnalytics.grade_distribution),
+    ("gap_analysis", fetch_gap_analysis, StudentAnalytics.gap_analysis),
+]
+
+def time_call(function, *args):
+    """
+    Return the wall-clock seconds taken by one call.
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def run_benchmark(row_counts, work_dir):
+    """
+    Time every report with both engines at each row count.
+    """
+    results = []
+    for row_count in row_counts:
+        csv_file_path = os.path.join(work_dir, f"students_{row_count}.csv")
+        generate_student_csv(csv_file_path, row_count)
+        if not import_csv_to_db(csv_file_path, engine="bulk"):
+            raise RuntimeError(f"Could not load {row_count} rows")
+        os.remove(csv_file_path)
+        
+        with db_connection() as connection:
+            sql_total = 0.0
+            for name, sql_function, _ in REPORTS:
+                seconds = time_call(sql_function, connection)
+                sql_total += seconds
+                results.append({"rows": row_count, "engine": "sql", "report": name, "seconds": seconds})
+            
+            start = time.perf_counter()
+            analytics = StudentAnalytics.from_connection(connection)
+            load_seconds = time.perf_counter() - start
+            results.append({"rows": row_count, "engine": "memory", "report": "load", "seconds": load_seconds})
+            memory_total = load_seconds
+            for name, _, memory_function in REPORTS:
+                seconds = time_call(memory_function, analytics)
+                memory_total += seconds
+                results.append({"rows": row_count, "engine": "memory", "report": name, "seconds": seconds})
+        
+        results.append({"rows": row_count, "engine": "sql", "report": "total", "seconds": sql_total})
+        results.append({"rows": row_count, "engine": "memory", "report": "total", "seconds": memory_total})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the SQL and in-memory analysis engines")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROW_COUNTS),
+                        help="Row counts to load into student_records")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory for generated files (default: system temp directory)")
+    args = parser.parse_args(argv)
+    
+    # Time the queries themselves, not cache lookups
+    configure_query_cache(backend="off")
+    
+    with db_connection() as connection:
+        create_students_table(connection)
+    
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        results = run_benchmark(args.rows, work_dir)
+    
+    table = Table(title="Analytics Engine Benchmark", border_style="cyan")
+    table.add_column("Rows", justify="right", style="magenta")
+    table.add_column("Report", style="cyan")
+    table.add_column("SQL (s)", justify="right")
+    table.add_column("Memory (s)", justify="right", style="green")
+    
+    by_key = {(result["rows"], result["engine"], result["report"]): result["seconds"] for result in results}
+    for row_count in args.rows:
+        for report in ["load", *[name for name, _, _ in REPORTS], "total"]:
+            sql_seconds = by_key.get((row_count, "sql", report))
+            memory_seconds = by_key.get((row_count, "memory", report))
+            table.add_row(
+                f"{row_count:,}",
+                f"[bold]{report}[/bold]" if report == "total" else report,
+                f"{sql_seconds:.4f}" if sql_seconds is not None else "-",
+                f"{memory_seconds:.4f}" if memory_seconds is not None else "-"
+            )
+    console.print(table)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
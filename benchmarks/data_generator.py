@@ -0,0 +1,109 @@
+"""
+Synthetic Student Data Generator
+
+Writes student CSV files in the format of data/students.csv with any number
+of rows, from 10^3 up to 10^8. The output depends only on the row count,
+the bad-row fraction and the seed, so two runs with the same arguments
+produce byte-identical files and benchmark results stay comparable.
+
+Bad rows are the kinds csv_importer.parse_student_row rejects: a missing
+field, an extra field, a CGPA that is not a number or out of range, or an
+ID too long for the id_no column.
+
+Usage:
+    python -m benchmarks.data_generator students_1m.csv --rows 1000000
+    python -m benchmarks.data_generator students_1m.csv --rows 1000000 --bad-fraction 0.01 --seed 7
+"""
+
+import sys
+import csv
+import random
+import argparse
+from rich.console import Console
+
+console = Console()
+
+MIN_ROWS = 10 ** 3
+MAX_ROWS = 10 ** 8
+
+# Rows generated and written per chunk
+WRITE_CHUNK_SIZE = 10000
+
+FIRST_NAMES = ["Luke", "Leia", "Han", "Rey", "Finn", "Poe", "Padme", "Anakin", "Obi-Wan", "Mace",
+               "Ahsoka", "Lando", "Jyn", "Cassian", "Din", "Bo-Katan", "Hera", "Kanan", "Ezra", "Sabine"]
+LAST_NAMES = ["Skywalker", "Organa", "Solo", "Kenobi", "Windu", "Tano", "Calrissian", "Erso", "Andor",
+              "Djarin", "Kryze", "Syndulla", "Jarrus", "Bridger", "Wren", "Dameron", "Amidala", "Palpatine"]
+
+def bad_row(rng, id_no, name, cgpa):
+    """
+    Return one malformed row, chosen at random among the rejected kinds.
+    """
+    kind = rng.randrange(6)
+    if kind == 0:
+        return [id_no, name]  # missing field
+    if kind == 1:
+        return [id_no, name, cgpa, "extra"]  # extra field
+    if kind == 2:
+        return [id_no, name, "N/A"]  # non-numeric CGPA
+    if kind == 3:
+        return [id_no, name, "4.50"]  # CGPA out of range
+    if kind == 4:
+        return [id_no * 3, name, cgpa]  # ID too long
+    return [id_no, name, ""]  # empty CGPA
+
+def generate_student_csv(csv_file_path, row_count, seed=42, bad_fraction=0.0):
+    """
+    Write a student CSV file with a header and ``row_count`` generated rows.
+
+    About ``bad_fraction`` of the rows are malformed. IDs are unique and
+    sequential (``S000000000``, ``S000000001``, ...), so the valid rows
+    import without primary key conflicts. Returns the ``(valid_rows, bad_rows)``
+    counts.
+    """
+    if not 0.0 <= bad_fraction <= 1.0:
+        raise ValueError("bad_fraction must be between 0 and 1")
+    
+    rng = random.Random(seed)
+    bad_rows = 0
+    with open(csv_file_path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file, lineterminator='\n')
+        writer.writerow(["ID_NO", "NAME", "CGPA"])
+        for chunk_start in range(0, row_count, WRITE_CHUNK_SIZE):
+            chunk = []
+            for i in range(chunk_start, min(chunk_start + WRITE_CHUNK_SIZE, row_count)):
+                id_no = f"S{i:09d}"
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                cgpa = f"{rng.uniform(1.5, 4.0):.2f}"
+                if bad_fraction and rng.random() < bad_fraction:
+                    chunk.append(bad_row(rng, id_no, name, cgpa))
+                    bad_rows += 1
+                else:
+                    chunk.append((id_no, name, cgpa))
+            writer.writerows(chunk)
+    return row_count - bad_rows, bad_rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic student CSV file")
+    parser.add_argument("csv_file_path", help="Path of the CSV file to write")
+    parser.add_argument("--rows", type=int, default=100_000,
+                        help=f"Number of data rows, {MIN_ROWS:,} to {MAX_ROWS:,} (default: 100,000)")
+    parser.add_argument("--bad-fraction", type=float, default=0.0,
+                        help="Fraction of rows that are malformed (default: 0)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Random seed (default: 42)")
+    args = parser.parse_args(argv)
+    
+    if not MIN_ROWS <= args.rows <= MAX_ROWS:
+        parser.error(f"--rows must be between {MIN_ROWS:,} and {MAX_ROWS:,}")
+    if not 0.0 <= args.bad_fraction <= 1.0:
+        parser.error("--bad-fraction must be between 0 and 1")
+    
+    with console.status(f"[bold cyan]Generating {args.rows:,} rows...[/bold cyan]"):
+        valid_rows, bad_rows = generate_student_csv(args.csv_file_path, args.rows, seed=args.seed,
+                                                    bad_fraction=args.bad_fraction)
+    console.print(f"[green]✓[/green] Wrote {valid_rows:,} valid and {bad_rows:,} bad rows to "
+                  f"[cyan]{args.csv_file_path}[/cyan]")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Import Engine Benchmark
+
+Compares the ``insert`` and ``bulk`` engines of csv_importer.import_csv_to_db
+on generated student CSV files of increasing size. The target database from
+.env must be reachable and must allow LOAD DATA LOCAL INFILE.
+
+Usage:
+    python -m benchmarks.import_engines
+    python -m benchmarks.import_engines --rows 100000 1000000 --engines bulk
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from db_config import db_connection, create_students_table
+from csv_importer import import_csv_to_db, ENGINES
+from benchmarks.data_generator import generate_student_csv
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+DEFAULT_ROW_COUNTS = (100_000, 1_000_000, 10_000_000)
+
+def run_benchmark(row_counts, engines, work_dir):
+    """
+    Import each generated file with each engine and return the timings.
+    """
+    results = []
+    for row_count in row_counts:
+        csv_file_path = os.path.join(work_dir, f"students_{row_count}.csv")
+        console.print(f"[cyan]Generating {row_count:,} rows into[/cyan] [dim]{csv_file_path}[/dim]")
+        generate_student_csv(csv_file_path, row_count)
+        
+        for engine in engines:
+            start = time.perf_counter()
+            succeeded = import_csv_to_db(csv_file_path, engine=engine)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "rows": row_count,
+                "engine": engine,
+                "succeeded": succeeded,
+                "seconds": elapsed,
+                "rows_per_second": row_count / elapsed if elapsed else 0.0,
+            })
+        
+        os.remove(csv_file_path)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare CSV import engines")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROW_COUNTS),
+                        help="Row counts of the generated files")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES),
+                        help="Engines to benchmark")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory for generated files (default: system temp directory)")
+    args = parser.parse_args(argv)
+    
+    with db_connection() as connection:
+        create_students_table(connection)
+    
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        results = run_benchmark(args.rows, args.engines, work_dir)
+    
+    table = Table(title="Import Engine Benchmark", border_style="cyan")
+    table.add_column("Rows", justify="right", style="magenta")
+    table.add_column("Engine", style="cyan")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Rows/sec", justify="right", style="green")
+    for result in results:
+        table.add_row(
+            f"{result['rows']:,}",
+            result['engine'] if result['succeeded'] else f"{result['engine']} [red](failed)[/red]",
+            f"{result['seconds']:.2f}",
+            f"{result['rows_per_second']:,.0f}"
+        )
+    console.print(table)
+    return 0 if all(result['succeeded'] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
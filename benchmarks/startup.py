@@ -0,0 +1,199 @@
+"""
+Startup Benchmark
+
+Measures what each command pays before doing any real work: wall-clock time
+and the module import time reported by ``python -X importtime``. Every
+cli.py subcommand runs in a fresh interpreter against a throwaway SQLite
+database (so no server is needed and .env settings are overridden), on a
+small generated file; main.py runs once as a baseline. The medians are
+written as JSON and can be compared with an earlier run to catch a new
+eager import.
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 10 --output startup.json
+    python -m benchmarks.startup --output new.json --compare startup.json --tolerance 0.25
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from benchmarks.data_generator import generate_student_csv, MIN_ROWS
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25  # slowdown tolerated before a result counts as a regression
+
+# Heaviest top-level imports listed per command
+TOP_IMPORTS = 3
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def startup_commands(csv_file_path):
+    """
+    Return (name, arguments) for every command timed, in the order they run.
+    
+    ``import`` runs before the reports so they have a table to read.
+    """
+    return [
+        ("cli --help", ["cli.py", "--help"]),
+        # Building a subcommand's parser must stay as cheap as the top-level help
+        ("cli stats --help", ["cli.py", "stats", "--help"]),
+        ("cli import", ["cli.py", "import", "--csv", csv_file_path, "--rejects", os.devnull]),
+        ("cli stats", ["cli.py", "stats"]),
+        ("cli list", ["cli.py", "list", "--limit", "10"]),
+        ("cli grades", ["cli.py", "grades"]),
+        ("cli gaps", ["cli.py", "gaps"]),
+        ("main", ["main.py", "--csv", csv_file_path, "--rejects", os.devnull, "--limit", "10"]),
+    ]
+
+def parse_importtime(stderr):
+    """
+    Return ``(total_us, module_count, top_level)`` from ``-X importtime`` output.
+    
+    ``top_level`` maps each module imported directly by the script (not by
+    another module) to its cumulative import time in microseconds.
+    """
+    total = 0
+    count = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        count += 1
+        # Nested imports are indented under the module that triggered them
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative_us)
+    return total, count, top_level
+
+def time_command(arguments, env, repeat):
+    """
+    Run one command ``repeat`` times and return its result with median timings.
+    """
+    wall_ms = []
+    import_ms = []
+    module_counts = []
+    top_level = {}
+    succeeded = True
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-X", "importtime", *arguments], cwd=REPOSITORY_ROOT, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        succeeded = succeeded and completed.returncode == 0
+        total_us, count, top_level = parse_importtime(completed.stderr)
+        import_ms.append(total_us / 1000)
+        module_counts.append(count)
+    
+    heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+    return {
+        "succeeded": succeeded,
+        "wall_ms": statistics.median(wall_ms),
+        "import_ms": statistics.median(import_ms),
+        "modules": max(module_counts),
+        "top_imports": [{"module": name, "ms": cumulative / 1000} for name, cumulative in heaviest],
+    }
+
+def run_benchmark(repeat, work_dir):
+    """
+    Time every command in a fresh SQLite database under ``work_dir``.
+    """
+    csv_file_path = os.path.join(work_dir, "students.csv")
+    generate_student_csv(csv_file_path, MIN_ROWS)
+    env = dict(os.environ, DB_BACKEND="sqlite", DB_PATH=os.path.join(work_dir, "students.db"),
+               QUERY_CACHE="memory")
+    
+    # One unmeasured run compiles every module, so the first command measured
+    # does not pay for writing bytecode
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "."], cwd=REPOSITORY_ROOT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    results = []
+    for name, arguments in startup_commands(csv_file_path):
+        console.print(f"[cyan]Timing[/cyan] {name}")
+        results.append({"command": name, **time_command(arguments, env, repeat)})
+    return results
+
+def find_regressions(results, baseline_results, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return ``(command, baseline_ms, import_ms)`` for every command whose
+    import time grew by more than ``tolerance``.
+    """
+    baseline = {result["command"]: result["import_ms"] for result in baseline_results}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["command"])
+        if previous and result["import_ms"] > previous * (1 + tolerance):
+            regressions.append((result["command"], previous, result["import_ms"]))
+    return regressions
+
+def print_results(results):
+    table = Table(title="Startup Cost (median)", border_style="cyan")
+    table.add_column("Command", style="cyan")
+    table.add_column("Wall (ms)", justify="right", style="green")
+    table.add_column("Imports (ms)", justify="right", style="green")
+    table.add_column("Modules", justify="right")
+    table.add_column("Heaviest imports")
+    
+    for result in results:
+        table.add_row(
+            result["command"] if result["succeeded"] else f"{result['command']} [red](failed)[/red]",
+            f"{result['wall_ms']:.0f}",
+            f"{result['import_ms']:.0f}",
+            str(result["modules"]),
+            ", ".join(f"{entry['module']} {entry['ms']:.0f}" for entry in result["top_imports"])
+        )
+    
+    console.print(table)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the startup and import cost of each command")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Runs of each command; medians are reported (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory for the generated file and database (default: system temp directory)")
+    parser.add_argument("--output", default="startup_results.json",
+                        help="JSON file to write the results to (default: startup_results.json)")
+    parser.add_argument("--compare", default=None,
+                        help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Import time growth tolerated before a result counts as a regression "
+                             f"(default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        results = run_benchmark(args.repeat, work_dir)
+    
+    print_results(results)
+    with open(args.output, 'w') as output_file:
+        json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "results": results}, output_file, indent=2)
+    console.print(f"[green]✓[/green] Results written to [cyan]{args.output}[/cyan]")
+    
+    exit_code = 0 if all(result["succeeded"] for result in results) else 1
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(results, baseline["results"], args.tolerance)
+        for command, previous, current in regressions:
+            console.print(f"[bold red]Regression:[/bold red] {command} imports took {previous:.1f}ms -> {current:.1f}ms")
+        if regressions:
+            exit_code = 1
+        else:
+            console.print(f"[green]✓[/green] No regressions against [cyan]{args.compare}[/cyan] "
+                          f"(tolerance {args.tolerance:.0%})")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Benchmark Suite
+
+Measures import throughput, per-report query latency and peak memory against
+the database configured in .env (a local MySQL or MariaDB instance), on
+files from benchmarks.data_generator. Results are written as JSON together
+with the environment they were measured in, and can be compared with an
+earlier results file to catch regressions.
+
+For each row count the suite:
+1. generates a deterministic CSV file with the requested fraction of bad rows
+2. imports it with every selected engine, recording rows/sec and peak RSS
+3. times every report query ``--repeat`` times on the loaded table, with the
+   query cache turned off, recording min/median/p95/max latency
+
+Usage:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --rows 1000 100000 1000000 --bad-fraction 0.01 --output results.json
+    python -m benchmarks.suite --output new.json --compare results.json --tolerance 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from db_config import db_connection, create_students_table
+from csv_importer import import_csv_to_db, ENGINES
+from query_cache import configure_query_cache
+from report_queries import fetch_combined_report
+from benchmarks.analytics_engines import REPORTS
+from benchmarks.data_generator import generate_student_csv, MIN_ROWS, MAX_ROWS
+from rich.console import Console
+from rich.table import Table
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+console = Console()
+
+DEFAULT_ROW_COUNTS = (1_000, 10_000, 100_000)
+DEFAULT_BAD_FRACTION = 0.01
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.10  # slowdown tolerated before a result counts as a regression
+
+# Report name and SQL function pairs timed by the latency benchmark
+LATENCY_REPORTS = [(name, sql_function) for name, sql_function, _ in REPORTS] + [
+    ("combined_report", fetch_combined_report),
+]
+
+def reset_peak_rss():
+    """
+    Reset this process's peak RSS counter, where the kernel allows it (Linux).
+    
+    Returns False when the counter cannot be reset, in which case the peak
+    reported afterwards is the peak of the whole process so far.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_bytes(who="self"):
+    """
+    Return the peak resident set size in bytes of this process (``"self"``)
+    or of its finished child processes (``"children"``), or None if unknown.
+    """
+    if who == "self":
+        # VmHWM follows reset_peak_rss; ru_maxrss never goes down
+        try:
+            with open("/proc/self/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+def percentile(values, fraction):
+    """
+    Return the nearest-rank percentile of a list of numbers.
+    """
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def benchmark_imports(csv_file_path, row_count, valid_rows, engines):
+    """
+    Import one generated file with each engine and return a result per engine.
+    """
+    results = []
+    for engine in engines:
+        reset_peak_rss()
+        start = time.perf_counter()
+        succeeded = import_csv_to_db(csv_file_path, engine=engine)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "benchmark": "import",
+            "rows": row_count,
+            "valid_rows": valid_rows,
+            "engine": engine,
+            "succeeded": succeeded,
+            "seconds": elapsed,
+            "rows_per_second": row_count / elapsed if elapsed else 0.0,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "children_peak_rss_bytes": peak_rss_bytes("children"),
+        })
+    return results
+
+def benchmark_report_latency(row_count, repeat):
+    """
+    Time every report query ``repeat`` times and return a result per report.
+    """
+    results = []
+    with db_connection() as connection:
+        for name, sql_function in LATENCY_REPORTS:
+            reset_peak_rss()
+            latencies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                sql_function(connection)
+                latencies.append((time.perf_counter() - start) * 1000)
+            results.append({
+                "benchmark": "report_latency",
+                "rows": row_count,
+                "report": name,
+                "repeat": repeat,
+                "min_ms": min(latencies),
+                "median_ms": statistics.median(latencies),
+                "p95_ms": percentile(latencies, 0.95),
+                "max_ms": max(latencies),
+                "peak_rss_bytes": peak_rss_bytes(),
+            })
+    return results
+
+def run_suite(row_counts, engines, bad_fraction, repeat, seed, work_dir):
+    """
+    Run the import and latency benchmarks at every row count.
+    """
+    results = []
+    for row_count in row_counts:
+        csv_file_path = os.path.join(work_dir, f"students_{row_count}.csv")
+        console.print(f"[cyan]Generating {row_count:,} rows into[/cyan] [dim]{csv_file_path}[/dim]")
+        valid_rows, _ = generate_student_csv(csv_file_path, row_count, seed=seed, bad_fraction=bad_fraction)
+        
+        import_results = benchmark_imports(csv_file_path, row_count, valid_rows, engines)
+        results.extend(import_results)
+        os.remove(csv_file_path)
+        
+        # The latency benchmark runs on whatever the last successful import left
+        if any(result["succeeded"] for result in import_results):
+            results.extend(benchmark_report_latency(row_count, repeat))
+    return results
+
+def collect_environment():
+    """
+    Describe the machine, interpreter, database server and code revision.
+    """
+    environment = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        environment["git_commit"] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                                   check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        environment["git_commit"] = None
+    with db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT VERSION() AS version")
+            environment["server_version"] = cursor.fetchone()["version"]
+    return environment
+
+def result_key(result):
+    """
+    Identify a result across runs.
+    """
+    return (result["benchmark"], result["rows"], result.get("engine") or result.get("report"))
+
+def result_seconds(result):
+    """
+    Return the timing compared across runs.
+    """
+    if result["benchmark"] == "import":
+        return result["seconds"] if result["succeeded"] else None
+    return result["median_ms"] / 1000
+
+def find_regressions(results, baseline_results, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return ``(key, baseline_seconds, seconds)`` for every result slower than
+    its baseline by more than ``tolerance``.
+    """
+    baseline = {result_key(result): result_seconds(result) for result in baseline_results}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result_key(result))
+        current = result_seconds(result)
+        if previous and current is not None and current > previous * (1 + tolerance):
+            regressions.append((result_key(result), previous, current))
+    return regressions
+
+def format_bytes(value):
+    return f"{value / 2 ** 20:,.1f} MiB" if value is not None else "-"
+
+def print_results(results):
+    """
+    Print the import and latency results as tables.
+    """
+    import_table = Table(title="Import Throughput", border_style="cyan")
+    import_table.add_column("Rows", justify="right", style="magenta")
+    import_table.add_column("Engine", style="cyan")
+    import_table.add_column("Seconds", justify="right")
+    import_table.add_column("Rows/sec", justify="right", style="green")
+    import_table.add_column("Peak RSS", justify="right")
+    
+    latency_table = Table(title="Report Latency", border_style="cyan")
+    latency_table.add_column("Rows", justify="right", style="magenta")
+    latency_table.add_column("Report", style="cyan")
+    latency_table.add_column("Median (ms)", justify="right", style="green")
+    latency_table.add_column("p95 (ms)", justify="right")
+    latency_table.add_column("Max (ms)", justify="right")
+    
+    for result in results:
+        if result["benchmark"] == "import":
+            import_table.add_row(
+                f"{result['rows']:,}",
+                result['engine'] if result['succeeded'] else f"{result['engine']} [red](failed)[/red]",
+                f"{result['seconds']:.2f}",
+                f"{result['rows_per_second']:,.0f}",
+                format_bytes(result['peak_rss_bytes'])
+            )
+        else:
+            latency_table.add_row(
+                f"{result['rows']:,}",
+                result['report'],
+                f"{result['median_ms']:.2f}",
+                f"{result['p95_ms']:.2f}",
+                f"{result['max_ms']:.2f}"
+            )
+    
+    console.print(import_table)
+    console.print(latency_table)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the import and query benchmark suite")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROW_COUNTS),
+                        help=f"Row counts of the generated files, {MIN_ROWS:,} to {MAX_ROWS:,}")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES),
+                        help="Import engines to benchmark")
+    parser.add_argument("--bad-fraction", type=float, default=DEFAULT_BAD_FRACTION,
+                        help=f"Fraction of malformed rows in the generated files (default: {DEFAULT_BAD_FRACTION})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Runs of each report query (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Random seed for the generated files (default: 42)")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory for generated files (default: system temp directory)")
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="JSON file to write the results to (default: benchmark_results.json)")
+    parser.add_argument("--compare", default=None,
+                        help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Slowdown tolerated before a result counts as a regression (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+    
+    if any(not MIN_ROWS <= row_count <= MAX_ROWS for row_count in args.rows):
+        parser.error(f"--rows must be between {MIN_ROWS:,} and {MAX_ROWS:,}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    
+    # Time the queries themselves, not cache lookups
+    configure_query_cache(backend="off")
+    
+    with db_connection() as connection:
+        create_students_table(connection)
+    
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        results = run_suite(args.rows, args.engines, args.bad_fraction, args.repeat, args.seed, work_dir)
+    
+    print_results(results)
+    
+    document = {
+        "environment": collect_environment(),
+        "parameters": {
+            "rows": args.rows,
+            "engines": args.engines,
+            "bad_fraction": args.bad_fraction,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, 'w') as output_file:
+        json.dump(document, output_file, indent=2)
+    console.print(f"[green]✓[/green] Results written to [cyan]{args.output}[/cyan]")
+    
+    exit_code = 0 if all(result["succeeded"] for result in results if result["benchmark"] == "import") else 1
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(results, baseline["results"], args.tolerance)
+        for (benchmark, row_count, name), previous, current in regressions:
+            console.print(f"[bold red]Regression:[/bold red] {benchmark} {name} at {row_count:,} rows: "
+                          f"{previous:.4f}s -> {current:.4f}s")
+        if regressions:
+            exit_code = 1
+        else:
+            console.print(f"[green]✓[/green] No regressions against [cyan]{args.compare}[/cyan] "
+                          f"(tolerance {args.tolerance:.0%})")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Student Database CLI
+
+One entry point with a subcommand per task, for scripts and cron jobs:
+
+    python cli.py import --csv data/students.csv --engine bulk
+    python cli.py stats --analysis-engine stats
+    python cli.py list --limit 20
+    python cli.py list --output-format jsonl > students.jsonl
+    python cli.py grades --combined
+    python cli.py gaps --analysis-engine memory
+    python cli.py watch incoming/ --debounce 5
+
+Only argparse and the option choices in options.py are imported up front.
+Each subcommand builds its own parser from those alone, so --help loads
+nothing else, and imports what it needs when it runs: ``stats`` never loads
+the importer, no report loads NumPy unless the memory engine is chosen, and
+.env is read on first use (see config.py). Unlike main.py, the report commands do
+not create or inspect the tables before querying them; ``import`` does.
+``python -m benchmarks.startup`` measures the import cost of each command.
+"""
+
+import sys
+import argparse
+from options import (ENGINES, MODES, DEFAULT_BATCH_SIZE, DEFAULT_COMMIT_INTERVAL, READERS, ANALYSIS_ENGINES,
+                     CACHE_BACKENDS, PROFILE_MODES, OUTPUT_FORMATS, DEFAULT_PAGE_SIZE)
+
+def add_report_options(parser):
+    """
+    Add the options shared by the report subcommands.
+    """
+    parser.add_argument("--query-cache", choices=CACHE_BACKENDS, default=None,
+                        help="Result cache backend for report queries (default: QUERY_CACHE from .env, or memory)")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="Seconds a cached query result stays valid (default: QUERY_CACHE_TTL from .env, or 300)")
+
+def add_profile_options(parser):
+    parser.add_argument("--profile", nargs="?", const="timers", choices=PROFILE_MODES, default=None,
+                        help="Time every phase and query and print a summary at the end; 'cpu' adds cProfile, "
+                             "'memory' adds tracemalloc, 'all' adds both (default when given: timers)")
+    parser.add_argument("--profile-output", default="profile_report.json",
+                        help="JSON file for the --profile summary (default: profile_report.json)")
+
+def add_analysis_engine_option(parser):
+    parser.add_argument("--analysis-engine", choices=ANALYSIS_ENGINES, default="sql",
+                        help="Compute the reports with SQL on the server, from an in-memory snapshot "
+                             "or from the student_stats summary table (default: sql)")
+
+def run(args, action):
+    """
+    Run ``action`` under the --profile options and return the exit code.
+    
+    ``action`` returns whether it succeeded. Errors are printed to stderr,
+    so headless output on stdout is never mixed with them.
+    """
+    from instrumentation import start_instrumentation, finish_instrumentation
+    from rich.console import Console
+    if args.profile:
+        start_instrumentation(args.profile)
+    try:
+        return 0 if action() else 1
+    except Exception as e:
+        from db_backends import get_backend
+        hint = " (run the import command first)" if get_backend().is_missing_table_error(e) else ""
+        Console(stderr=True).print(f"[bold red]ERROR: {e}{hint}[/bold red]")
+        return 1
+    finally:
+        finish_instrumentation(args.profile_output)
+
+def configure_reports(args):
+    """
+    Set up the query cache for a report subcommand.
+    """
+    from query_cache import configure_query_cache
+    configure_query_cache(backend=args.query_cache, ttl=args.cache_ttl)
+
+def import_command(prog, argv):
+    parser = argparse.ArgumentParser(prog=prog, description=COMMANDS["import"][1])
+    parser.add_argument("--csv", dest="csv_file_path", default="data/students.csv",
+                        help="Path to the student CSV (optionally gzip, bzip2 or zstd compressed), Parquet or Arrow file "
+                             "(default: data/students.csv)")
+    parser.add_argument("--engine", choices=ENGINES, default="insert",
+                        help="Import engine: batched INSERTs, a bulk-loaded staging file, parallel worker processes "
+                             "or DuckDB's native CSV reader (default: insert)")
+    parser.add_argument("--mode", choices=MODES, default="replace",
+                        help="Reload the whole table or apply only new and changed rows (default: replace)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows per multi-row INSERT (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--commit-interval", type=int, default=DEFAULT_COMMIT_INTERVAL,
+                        help=f"Rows written between intermediate commits (default: {DEFAULT_COMMIT_INTERVAL})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for the parallel engine (default: CPU count)")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="In incremental mode, delete rows whose ID is not in the file")
+    parser.add_argument("--force", action="store_true",
+                        help="In incremental mode, import the file even if it is unchanged since the last import")
+    parser.add_argument("--reader", choices=READERS, default="mmap",
+                        help="Read the CSV file from a memory map or through the csv module (default: mmap)")
+    parser.add_argument("--rejects", dest="rejects_path", default=None,
+                        help="CSV file for rows that fail validation (default: the input path with a .rejects.csv suffix)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted insert-engine import from its last checkpoint instead of starting over")
+    parser.add_argument("--covering-index", action="store_true",
+                        help="Index student_records on (cgpa, id_no, name) instead of cgpa alone")
+    add_profile_options(parser)
+    args = parser.parse_args(argv)
+    
+    def action():
+        from db_config import db_connection, create_students_table
+        from csv_importer import import_csv_to_db
+        with db_connection() as connection:
+            create_students_table(connection, covering_index=args.covering_index)
+        return import_csv_to_db(args.csv_file_path, batch_size=args.batch_size,
+                                commit_interval=args.commit_interval, engine=args.engine,
+                                workers=args.workers, mode=args.mode,
+                                delete_missing=args.delete_missing, force=args.force,
+                                rejects_path=args.rejects_path, reader=args.reader, resume=args.resume)
+    
+    return run(args, action)
+
+def stats_command(prog, argv):
+    parser = argparse.ArgumentParser(prog=prog, description=COMMANDS["stats"][1])
+    add_analysis_engine_option(parser)
+    parser.add_argument("--combined", action="store_true",
+                        help="Compute the summary statistics and top students in a single query")
+    add_report_options(parser)
+    add_profile_options(parser)
+    args = parser.parse_args(argv)
+    
+    def action():
+        from data_analyzer import display_summary_statistics, load_combined_report
+        from query_cache import print_cache_stats
+        configure_reports(args)
+        report = load_combined_report(engine=args.analysis_engine) if args.combined else None
+        display_summary_statistics(engine=args.analysis_engine, report=report)
+        print_cache_stats()
+        return True
+    
+    return run(args, action)
+
+def list_command(prog, argv):
+    parser = argparse.ArgumentParser(prog=prog, description=COMMANDS["list"][1])
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Maximum number of records to list")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="Number of records to skip first")
+    parser.add_argument("--after-id", default=None,
+                        help="List only records whose ID sorts after this one (keyset pagination)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream records through a server-side cursor and render them page by page")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Records per rendered page when streaming (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=None,
+                        help="Write the records as CSV, JSON Lines or Parquet instead of rendering a table; "
+                             "status messages go to stderr")
+    parser.add_argument("--output", default="-",
+                        help="File for --output-format (default: - for stdout)")
+    add_report_options(parser)
+    add_profile_options(parser)
+    args = parser.parse_args(argv)
+    
+    def action():
+        from data_analyzer import display_all_records, export_records
+        from output_writers import use_stderr_consoles
+        if args.output_format:
+            # Keep stdout for the data alone
+            use_stderr_consoles()
+        configure_reports(args)
+        if args.output_format:
+            export_records(args.output, args.output_format, limit=args.limit, offset=args.offset,
+                           after_id=args.after_id)
+        else:
+            display_all_records(stream=args.stream, page_size=args.page_size, limit=args.limit,
+                                offset=args.offset, after_id=args.after_id)
+        return True
+    
+    return run(args, action)
+
+def grades_command(prog, argv):
+    parser = argparse.ArgumentParser(prog=prog, description=COMMANDS["grades"][1])
+    add_analysis_engine_option(parser)
+    parser.add_argument("--combined", action="store_true",
+                        help="Compute the category and grade distribution reports in a single scan")
+    add_report_options(parser)
+    add_profile_options(parser)
+    args = parser.parse_args(argv)
+    
+    def action():
+        from additional_queries_exercise import run_performance_category_query, run_letter_grade_query
+        from data_analyzer import load_combined_report
+        from query_cache import print_cache_stats
+        configure_reports(args)
+        report = load_combined_report(engine=args.analysis_engine) if args.combined else None
+        run_performance_category_query(engine=args.analysis_engine, report=report)
+        run_letter_grade_query(engine=args.analysis_engine, report=report)
+        print_cache_stats()
+        return True
+    
+    return run(args, action)
+
+def gaps_command(prog, argv):
+    parser = argparse.ArgumentParser(prog=prog, description=COMMANDS["gaps"][1])
+    add_analysis_engine_option(parser)
+    add_report_options(parser)
+    add_profile_options(parser)
+    args = parser.parse_args(argv)
+    
+    def action():
+        from additional_queries_exercise import run_gap_analysis_query
+        from query_cache import print_cache_stats
+        configure_reports(args)
+        run_gap_analysis_query(engine=args.analysis_engine)
+        print_cache_stats()
+        return True
+    
+    return run(args, action)
+
+def watch_command(prog, argv):
+    from ingest_daemon import main as watch_main
+    return watch_main(argv, prog=prog)
+
+# Subcommand name -> (handler, description)
+COMMANDS = {
+    "import": (import_command, "Load a CSV, Parquet or Arrow file into student_records"),
+    "stats": (stats_command, "Show the summary statistics, percentiles and top students"),
+    "list": (list_command, "List the student records, or write them as CSV, JSON Lines or Parquet"),
+    "grades": (grades_command, "Show the performance categories and letter grades"),
+    "gaps": (gaps_command, "Show the CGPA gaps between consecutively ranked students"),
+    "watch": (watch_command, "Load new CSV files from a directory as they arrive"),
+}
+
+def main(argv=None):
+    commands = "\n".join(f"  {name:<8} {description}" for name, (_, description) in COMMANDS.items())
+    parser = argparse.ArgumentParser(description="Student Database Analysis System",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=f"commands:\n{commands}\n\nRun '%(prog)s COMMAND --help' for its options.")
+    parser.add_argument("command", choices=COMMANDS, metavar="COMMAND",
+                        help="Subcommand to run")
+    # Everything after the command is parsed by the command itself
+    parser.add_argument("arguments", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    handler, _ = COMMANDS[args.command]
+    return handler(f"{parser.prog} {args.command}", args.arguments)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+Columnar Snapshots of student_records
+
+Exports student_records to Parquet or Arrow IPC files for downstream jobs,
+and reads such files back for the importer (csv_importer.import_csv_to_db
+accepts them in place of a CSV file). Rows are read from a server-side
+cursor in chunks and buffered only up to one row group per output file, so
+memory use stays constant however large the table is. With ``--shard-by``
+the snapshot is split into one file per CGPA band (performance category or
+letter grade), using the same thresholds as the reports.
+
+Needs the optional ``pyarrow`` package.
+
+Usage:
+    python columnar.py students.parquet
+    python columnar.py students.arrow --compression lz4
+    python columnar.py snapshot/ --shard-by category --row-group-size 500000
+"""
+
+import os
+import re
+import sys
+import argparse
+from db_config import db_connection
+from db_backends import get_backend
+from grading import PERFORMANCE_CATEGORIES, LETTER_GRADES, thresholds
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# File extensions recognised as columnar snapshots
+COLUMNAR_EXTENSIONS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+# Arrow IPC files only support the lz4 and zstd codecs
+COMPRESSIONS = ("zstd", "snappy", "gzip", "lz4", "none")
+IPC_COMPRESSIONS = ("zstd", "lz4", "none")
+
+# Grading scales the snapshot can be sharded by
+SHARD_SCALES = {"category": PERFORMANCE_CATEGORIES, "grade": LETTER_GRADES}
+
+# Rows fetched from the server-side cursor per round trip
+DEFAULT_CHUNK_SIZE = 50000
+
+# Rows per Parquet row group (or Arrow record batch); also the most rows
+# buffered per output file
+DEFAULT_ROW_GROUP_SIZE = 250000
+
+EXPORT_SQL = "SELECT id_no, name, cgpa FROM student_records ORDER BY id_no"
+
+def require_pyarrow():
+    """
+    Import pyarrow, with an actionable error if it is not installed.
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow files need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+def columnar_format(path):
+    """
+    Return ``"parquet"`` or ``"arrow"`` for a snapshot file name, else None.
+    """
+    return COLUMNAR_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+def cgpa_dtype():
+    """
+    Return the NumPy dtype cgpa is stored with: float32 for MySQL's FLOAT
+    column, float64 for the doubles SQLite and DuckDB store.
+    """
+    import numpy as np
+    return np.float32 if get_backend().single_precision_float else np.float64
+
+def student_schema():
+    pa = require_pyarrow()
+    return pa.schema([
+        pa.field("id_no", pa.string(), nullable=False),
+        pa.field("name", pa.string(), nullable=False),
+        # Same precision as the cgpa column of the backend
+        pa.field("cgpa", pa.from_numpy_dtype(cgpa_dtype()), nullable=False),
+    ])
+
+def band_indices(cgpa, scale):
+    """
+    Return the index into ``scale`` of the band each CGPA falls into.
+    
+    ``cgpa`` holds the values as stored (see cgpa_dtype), compared against
+    the thresholds exactly as the database compares the column.
+    """
+    import numpy as np
+    ascending = sorted(thresholds(scale))
+    return len(ascending) - np.searchsorted(ascending, cgpa.astype(np.float64), side='right')
+
+def shard_file_name(shard_by, label, file_format):
+    """
+    Return the file name of one shard, e.g. ``category=very_good.parquet``.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", label.lower().replace("+", " plus").replace("-", " minus")).strip("_")
+    return f"{shard_by}={slug}.{file_format}"
+
+class SnapshotWriter:
+    """
+    Writes record batches to one Parquet or Arrow IPC file in row groups.
+    
+    Batches are buffered until ``row_group_size`` rows are pending. The file
+    is written under a temporary name and renamed into place on close, so a
+    failed export never leaves a truncated snapshot behind.
+    """
+    
+    def __init__(self, path, file_format, schema, compression="zstd", row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        pa = require_pyarrow()
+        self.path = path
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.row_count = 0
+        self._temp_path = f"{path}.tmp"
+        self._pending = []
+        self._pending_rows = 0
+        codec = None if compression == "none" else compression
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self._temp_path, schema, compression=codec or "none")
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=codec)
+            self._writer = pa.ipc.new_file(self._temp_path, schema, options=options)
+    
+    def write(self, batch):
+        if batch.num_rows == 0:
+            return
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self.flush()
+    
+    def flush(self):
+        if not self._pending:
+            return
+        pa = require_pyarrow()
+        table = pa.Table.from_batches(self._pending)
+        if self.file_format == "parquet":
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            for batch in table.combine_chunks().to_batches(max_chunksize=self.row_group_size):
+                self._writer.write_batch(batch)
+        self.row_count += table.num_rows
+        self._pending = []
+        self._pending_rows = 0
+    
+    def close(self, commit=True):
+        """
+        Finish the file; with ``commit=False`` discard it instead.
+        """
+        try:
+            if commit:
+                self.flush()
+        finally:
+            self._writer.close()
+        if commit:
+            os.replace(self._temp_path, self.path)
+        else:
+            os.remove(self._temp_path)
+
+def export_student_records(path, file_format=None, compression="zstd", row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                           chunk_size=DEFAULT_CHUNK_SIZE, shard_by=None):
+    """
+    Export student_records to ``path`` and return ``{file path: row count}``.
+    
+    ``file_format`` defaults to the format implied by the extension of
+    ``path``, or Parquet. With ``shard_by`` (``"category"`` or ``"grade"``),
+    ``path`` is a directory that receives one file per CGPA band present.
+    """
+    import numpy as np
+    from pymysql.cursors import SSCursor
+    pa = require_pyarrow()
+    file_format = file_format or columnar_format(path) or "parquet"
+    if file_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"unknown format {file_format!r} (expected one of {', '.join(COLUMNAR_FORMATS)})")
+    if file_format == "arrow" and compression not in IPC_COMPRESSIONS:
+        raise ValueError(f"Arrow IPC files support {', '.join(IPC_COMPRESSIONS)} compression, not {compression!r}")
+    
+    schema = student_schema()
+    stored_dtype = cgpa_dtype()
+    scale = SHARD_SCALES[shard_by] if shard_by else None
+    if scale:
+        os.makedirs(path, exist_ok=True)
+    writers = {}
+    
+    def writer_for(label):
+        if label not in writers:
+            file_path = os.path.join(path, shard_file_name(shard_by, label, file_format)) if scale else path
+            writers[label] = SnapshotWriter(file_path, file_format, schema, compression, row_group_size)
+        return writers[label]
+    
+    succeeded = False
+    exported = 0
+    try:
+        with db_connection() as connection, connection.cursor(SSCursor) as cursor:
+            with console.status("[bold cyan]Exporting student_records...[/bold cyan]") as status:
+                cursor.execute(EXPORT_SQL)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    ids, names, cgpa = zip(*rows)
+                    cgpa = np.asarray(cgpa, dtype=stored_dtype)
+                    batch = pa.record_batch([pa.array(ids, pa.string()), pa.array(names, pa.string()), pa.array(cgpa)],
+                                            schema=schema)
+                    if scale:
+                        bands = band_indices(cgpa, scale)
+                        for index in np.unique(bands).tolist():
+                            writer_for(scale[index][0]).write(batch.filter(pa.array(bands == index)))
+                    else:
+                        writer_for(None).write(batch)
+                    exported += len(rows)
+                    status.update(f"[bold cyan]Exporting student_records... {exported:,} rows[/bold cyan]")
+            
+            if not writers:
+                # An empty table still gets an (empty) snapshot file
+                writer_for(scale[0][0] if scale else None)
+        succeeded = True
+    finally:
+        for writer in writers.values():
+            writer.close(commit=succeeded)
+    
+    return {writer.path: writer.row_count for writer in writers.values()}
+
+def read_student_batches(path, batch_size=DEFAULT_CHUNK_SIZE):
+    """
+    Open a Parquet or Arrow snapshot for import.
+    
+    Returns ``(total_rows, batches)`` where ``batches`` yields record batches
+    of at most ``batch_size`` rows with the columns id_no, name and cgpa
+    (matched case-insensitively, cgpa as float64). ``total_rows`` is None for
+    an Arrow stream, whose length is not known in advance.
+    """
+    pa = require_pyarrow()
+    file_format = columnar_format(path)
+    
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        columns = _student_columns(parquet_file.schema_arrow.names, path)
+        total_rows = parquet_file.metadata.num_rows
+        batches = parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+    else:
+        source = pa.memory_map(path)
+        try:
+            reader = pa.ipc.open_file(source)
+            total_rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # Not the file format: try the streaming format
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            total_rows = None
+            batches = iter(reader)
+        columns = _student_columns(reader.schema.names, path)
+    
+    types = [pa.string(), pa.string(), pa.float64()]
+    
+    def normalized():
+        for batch in batches:
+            batch = pa.record_batch([batch.column(name).cast(column_type) for name, column_type in zip(columns, types)],
+                                    names=["id_no", "name", "cgpa"])
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+    return total_rows, normalized()
+
+def _student_columns(names, path):
+    """
+    Map id_no, name and cgpa to the file's column names, ignoring case.
+    """
+    by_lower = {name.lower(): name for name in names}
+    missing = [column for column in ("id_no", "name", "cgpa") if column not in by_lower]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)} column (found: {', '.join(names)})")
+    return [by_lower[column] for column in ("id_no", "name", "cgpa")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export student_records to Parquet or Arrow IPC files")
+    parser.add_argument("path", help="Output file, or output directory with --shard-by")
+    parser.add_argument("--format", choices=COLUMNAR_FORMATS, default=None,
+                        help="File format (default: from the file extension, else parquet)")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="zstd",
+                        help="Compression codec (default: zstd; Arrow supports zstd, lz4 and none)")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help=f"Rows per Parquet row group or Arrow record batch (default: {DEFAULT_ROW_GROUP_SIZE:,})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows fetched from the server per round trip (default: {DEFAULT_CHUNK_SIZE:,})")
+    parser.add_argument("--shard-by", choices=sorted(SHARD_SCALES), default=None,
+                        help="Write one file per performance category or letter grade")
+    args = parser.parse_args(argv)
+    
+    if args.row_group_size < 1 or args.chunk_size < 1:
+        parser.error("--row-group-size and --chunk-size must be at least 1")
+    
+    try:
+        files = export_student_records(args.path, file_format=args.format, compression=args.compression,
+                                       row_group_size=args.row_group_size, chunk_size=args.chunk_size,
+                                       shard_by=args.shard_by)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Export failed: {e}")
+        return 1
+    
+    table = Table(title="Exported Snapshot", border_style="cyan")
+    table.add_column("File", style="cyan")
+    table.add_column("Rows", justify="right", style="green")
+    table.add_column("Size", justify="right")
+    for file_path, row_count in files.items():
+        table.add_row(file_path, f"{row_count:,}", f"{os.path.getsize(file_path) / 2 ** 20:,.1f} MiB")
+    console.print(table)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Settings from the environment and the .env file, loaded on first use.
+
+Nothing reads .env at import time: the first getenv() call loads it, once
+per process, so commands that never need a setting never import
+python-dotenv. Variables already set in the environment take precedence over
+the file, as with load_dotenv().
+"""
+
+import os
+import threading
+
+_config_lock = threading.Lock()
+_config_loaded = False
+
+def load_config():
+    """
+    Load the .env file into the environment if it has not been loaded yet.
+    """
+    global _config_loaded
+    if _config_loaded:
+        return
+    with _config_lock:
+        if not _config_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _config_loaded = True
+
+def getenv(name, default=None):
+    """
+    Return a setting, like os.getenv, after making sure .env has been loaded.
+    """
+    load_config()
+    return os.getenv(name, default)
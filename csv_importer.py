@@ -1,131 +1,1166 @@
 import os
 import csv
-import time
-from db_config import get_db_connection
+import math
+import hashlib
+import tempfile
+from array import array
+import multiprocessing
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from db_config import (db_connection, create_staging_table, drop_staging_table, swap_staging_table,
+                       create_import_state_table, drop_secondary_indexes, restore_indexes,
+                       create_student_stats_table, create_data_version_table, bump_data_version,
+                       create_import_checkpoint_table, save_import_checkpoint, load_import_checkpoint,
+                       clear_import_checkpoint, run_with_retries, suppress_connection_banner,
+                       ID_NO_MAX_LENGTH, NAME_MAX_LENGTH)
+from db_backends import get_backend
+from options import ENGINES, MODES, DEFAULT_BATCH_SIZE, DEFAULT_COMMIT_INTERVAL
+from grading import CGPA_MIN, CGPA_MAX
+from instrumentation import timed, add_rows
+from columnar import columnar_format, read_student_batches
+from csv_readers import READERS, open_csv_reader, compression_format, strip_compression_extension
+from student_stats import StatsAccumulator, save_student_stats, mark_student_stats_stale, load_student_stats
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn, TaskProgressColumn
 from rich.panel import Panel
 from rich.table import Table
 
 # Create a console instance for rich output
 console = Console()
 
-def import_csv_to_db(csv_file_path):
+INSERT_SQL = "INSERT INTO {table} (id_no, name, cgpa) VALUES (%s, %s, %s)"
+
+# Checks of parse_student_row as a SQL condition over the VARCHAR columns
+# staged by the native engine; NULL stands for an empty field
+NATIVE_VALID_SQL = f"""
+id_no IS NOT NULL
+AND LENGTH(id_no) <= {ID_NO_MAX_LENGTH}
+AND LENGTH(COALESCE(name, '')) <= {NAME_MAX_LENGTH}
+AND TRY_CAST(cgpa AS DOUBLE) BETWEEN {CGPA_MIN} AND {CGPA_MAX}
+"""
+
+# Compressed formats DuckDB's CSV reader decompresses itself (no bzip2)
+NATIVE_COMPRESSIONS = ("gzip", "zstd")
+
+# Number of data rows shown in the CSV preview
+PREVIEW_ROWS = 3
+
+# Redraws per second of the import progress bar; updates in between only change counters
+PROGRESS_REFRESH_PER_SECOND = 4
+
+# The parallel engine cuts the file into this many shards per worker so that
+# a slow shard does not leave the other workers idle at the end
+SHARDS_PER_WORKER = 4
+
+# Invalid rows are written to a rejects file, by default next to the input
+REJECTS_SUFFIX = ".rejects.csv"
+REJECTS_HEADER = ["REASON", "ID_NO", "NAME", "CGPA"]
+
+def parse_student_row(row):
+    """
+    Validate a CSV row and convert it to an (id_no, name, cgpa) tuple.
+    
+    Returns ``(record, None)`` for a valid row and ``(None, reason)`` for a
+    row that should be rejected.
+    """
+    # Validate row data
+    if len(row) != 3:
+        return None, f"expected 3 fields, got {len(row)}"
+    
+    id_no, name, cgpa = row
+    if not id_no:
+        return None, "missing ID"
+    if len(id_no) > ID_NO_MAX_LENGTH:
+        return None, f"ID longer than {ID_NO_MAX_LENGTH} characters"
+    if len(name) > NAME_MAX_LENGTH:
+        return None, f"name longer than {NAME_MAX_LENGTH} characters"
+    
+    # Validate CGPA is a number in range (NaN fails both comparisons)
+    try:
+        cgpa = float(cgpa)
+    except ValueError:
+        return None, "CGPA is not a number"
+    if not CGPA_MIN <= cgpa <= CGPA_MAX:
+        return None, f"CGPA outside {CGPA_MIN}-{CGPA_MAX}"
+    
+    return (id_no, name, cgpa), None
+
+class DecodedChunk:
+    """
+    The valid rows of a chunk as typed columns, plus its rejected rows.
+    
+    CGPAs are held in an ``array('d')`` rather than as one float object per
+    row; ``rejects`` holds ``(reason, row)`` pairs.
+    """
+    
+    __slots__ = ("ids", "names", "cgpas", "rejects")
+    
+    def __init__(self, ids, names, cgpas, rejects):
+        self.ids = ids
+        self.names = names
+        self.cgpas = cgpas
+        self.rejects = rejects
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def records(self):
+        """
+        Return the valid rows as (id_no, name, cgpa) tuples for executemany().
+        """
+        return list(zip(self.ids, self.names, self.cgpas))
+
+def decode_rows(rows):
+    """
+    Validate a chunk of CSV rows and split it into a DecodedChunk.
+    
+    The whole chunk is checked column by column with builtins (field counts,
+    VARCHAR lengths, float conversion and the CGPA range), so a clean chunk,
+    the common case, runs no Python code per row. Only a chunk that fails a
+    check is decoded again row by row with parse_student_row to find the
+    rows to reject.
+    """
+    if rows and len(set(map(len, rows))) == 1 and len(rows[0]) == 3:
+        ids, names, cgpa_fields = zip(*rows)
+        try:
+            cgpas = array('d', map(float, cgpa_fields))
+        except ValueError:
+            cgpas = None
+        # sum() is NaN if any value is NaN, which min() and max() can miss
+        if (cgpas is not None and all(ids) and max(map(len, ids)) <= ID_NO_MAX_LENGTH
+                and max(map(len, names)) <= NAME_MAX_LENGTH
+                and CGPA_MIN <= min(cgpas) and max(cgpas) <= CGPA_MAX and not math.isnan(sum(cgpas))):
+            return DecodedChunk(list(ids), list(names), cgpas, [])
+    
+    chunk = DecodedChunk([], [], array('d'), [])
+    for row in rows:
+        record, reason = parse_student_row(row)
+        if reason:
+            chunk.rejects.append((reason, row))
+            continue
+        chunk.ids.append(record[0])
+        chunk.names.append(record[1])
+        chunk.cgpas.append(record[2])
+    return chunk
+
+def record_batches(records, batch_size):
+    """
+    Split a list of records into INSERT batches of up to ``batch_size`` rows.
+    """
+    for offset in range(0, len(records), batch_size):
+        yield records[offset:offset + batch_size]
+
+def default_rejects_path(csv_file_path):
+    """
+    Return the rejects file used for ``csv_file_path`` when none is given.
+    """
+    return os.path.splitext(strip_compression_extension(csv_file_path))[0] + REJECTS_SUFFIX
+
+class RejectsFile:
+    """
+    Write rejected rows to a CSV file: the reason, then the original fields.
+    
+    The file is only created once the first row is rejected, so a clean
+    import leaves nothing behind.
+    """
+    
+    def __init__(self, path, append=False):
+        self.path = path
+        self.append = append
+        self.count = 0
+        self._file = None
+        self._writer = None
+    
+    def write(self, rejects):
+        if not rejects:
+            return
+        if self._file is None:
+            # A resumed import adds to the rejects of the interrupted one
+            append = self.append and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+            self._file = open(self.path, 'a' if append else 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            if not append:
+                self._writer.writerow(REJECTS_HEADER)
+        self._writer.writerows([reason, *row] for reason, row in rejects)
+        self.count += len(rejects)
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def insert_batch(cursor, batch, table="student_records"):
+    """
+    Insert a batch of (id_no, name, cgpa) tuples in a single round trip.
+    
+    PyMySQL rewrites executemany() on an INSERT ... VALUES statement into one
+    multi-row INSERT, so each batch costs one network round trip; the DuckDB
+    backend turns it into one INSERT ... SELECT (see db_backends.py).
+    """
+    if batch:
+        with timed("insert", rows=len(batch)):
+            cursor.executemany(INSERT_SQL.format(table=table), batch)
+
+def load_staged_file(cursor, staging_path):
+    """
+    Load a validated staging file with the backend's bulk loader.
+    
+    MySQL uses LOAD DATA LOCAL INFILE, DuckDB its CSV reader and SQLite
+    batched INSERTs. Returns the number of rows loaded.
+    """
+    return get_backend().load_staged_file(cursor, staging_path)
+
+def bulk_load_staged_file(connection, staging_path, expected_count):
+    """
+    Load a staging file into student_records with its secondary indexes dropped.
+    
+    The indexes are rebuilt once after the load instead of being maintained
+    row by row during it. Returns the number of rows loaded.
+    """
+    dropped_indexes = drop_secondary_indexes(connection)
+    try:
+        with connection.cursor() as cursor:
+            with console.status("[bold cyan]Loading staging file...[/bold cyan]"):
+                with timed("insert", rows=expected_count):
+                    return load_staged_file(cursor, staging_path)
+    finally:
+        if dropped_indexes:
+            with console.status(f"[bold cyan]Rebuilding indexes: {', '.join(dropped_indexes)}...[/bold cyan]"):
+                restore_indexes(connection, dropped_indexes)
+
+def show_csv_preview(header, preview_rows):
+    """
+    Print the CSV header and the first few data rows.
+    """
+    console.print(f"CSV header: [magenta]{', '.join(header)}[/magenta]")
+    
+    # Show csv preview in a table
+    preview_table = Table(title="CSV Data Preview", border_style="cyan")
+    for column in header:
+        preview_table.add_column(column)
+    
+    for row in preview_rows:
+        preview_table.add_row(*row)
+    
+    console.print(preview_table)
+
+def import_progress():
+    """
+    Create the progress display used while importing, measured in bytes.
+    """
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[bold cyan]{task.description}[/bold cyan]"),
+        BarColumn(),
+        TaskProgressColumn(),
+        TextColumn("[bold green]{task.fields[records]} records[/bold green]"),
+        TimeElapsedColumn(),
+        # Follow this module's console, so headless runs draw progress on stderr
+        console=console,
+        refresh_per_second=PROGRESS_REFRESH_PER_SECOND,
+    )
+
+def rejects_note(skipped_count, rejects_path):
+    """
+    Return the summary line for rejected rows, or an empty string if there were none.
+    """
+    if skipped_count == 0:
+        return ""
+    return f"[yellow]⚠[/yellow] Skipped [bold yellow]{skipped_count}[/bold yellow] invalid records (see [cyan]{rejects_path}[/cyan])"
+
+def print_import_summary(csv_file_path, record_count, skipped_count, rejects_path=None):
+    """
+    Print the panel summarising an import.
+    """
+    summary = Panel(
+        f"""[green]✓[/green] Successfully imported [bold green]{record_count}[/bold green] records from {csv_file_path}
+{rejects_note(skipped_count, rejects_path)}
+[cyan]→[/cyan] You can now check MySQL Workbench to verify the data has been populated""",
+        title="Import Summary",
+        border_style="green"
+    )
+    console.print(summary)
+
+def clear_student_records(connection):
+    """
+    Remove every row of student_records and bump the data version.
+    
+    On the embedded backends both stay in the caller's transaction. MySQL's
+    TRUNCATE commits on its own, so the new version is committed with it
+    right away rather than left for the next commit. No spinner is shown, as
+    the insert engine clears the table while its progress bar is live.
+    """
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        with timed("truncate"):
+            backend.clear_table(cursor, "student_records")
+    console.print("[green]✓[/green] Table cleared successfully")
+    bump_data_version(connection)
+    if not backend.transactional_clear:
+        connection.commit()
+
+def import_csv_to_db(csv_file_path, batch_size=DEFAULT_BATCH_SIZE, commit_interval=DEFAULT_COMMIT_INTERVAL,
+                     engine="insert", staging_dir=None, workers=None, mode="replace", delete_missing=False,
+                     force=False, rejects_path=None, reader="mmap", resume=False, summary=None):
     """
     Import data from a CSV file into the student_records table.
+    
+    With the ``insert`` engine, valid rows are buffered and inserted
+    ``batch_size`` rows at a time, and the transaction is committed at the
+    first reader block boundary after every ``commit_interval`` rows. A
+    ``batch_size`` of 1 reproduces the original row-by-row behaviour. Each
+    commit also records the byte offset and row
+    number reached in import_checkpoint, and is retried with backoff after
+    transient database errors (see db_config.run_with_retries). If the import
+    still fails, ``resume=True`` continues it from the last checkpoint
+    instead of truncating the table. The old rows are cleared in the
+    transaction of the first chunk, so they survive a file that turns out
+    to be empty (on the embedded backends, any failure before that commit).
+    
+    With the ``bulk`` engine, rows are validated in Python, written to a
+    staging file in ``staging_dir`` (the system temp directory by default) and
+    loaded in one ``LOAD DATA LOCAL INFILE`` statement. The server must allow
+    ``local_infile``. The embedded backends load it with their own bulk
+    loader (see ``load_staged_file``).
+    
+    The ``parallel`` engine is described in ``import_csv_parallel`` and needs
+    MySQL; the ``native`` engine, described in ``import_csv_native``, needs
+    DuckDB.
+    
+    ``mode="incremental"`` updates the table in place instead of reloading it;
+    see ``import_csv_incremental``. It always uses the insert engine, and
+    fills ``summary``, if given, with the import's row counts.
+    
+    Parquet and Arrow snapshots (see columnar.py) are recognised by their
+    extension and loaded by ``import_columnar_file``.
+    
+    ``reader`` selects how the file is read (see csv_readers.py): ``mmap``
+    splits lines straight from a memory map and lets the bulk engine stage
+    clean blocks without re-encoding them; ``stream`` reads it through
+    csv.reader.
+    
+    gzip, bzip2 and zstd files are decompressed on the fly by a background
+    thread, whatever the reader, and progress follows the compressed bytes
+    read. They cannot be split for the parallel engine or resumed; the
+    native engine hands gzip and zstd files to DuckDB as they are.
+    
+    Rows are validated a block at a time (see ``decode_rows``). Invalid rows
+    are written with the reason to ``rejects_path``, by default the input
+    path with a ``.rejects.csv`` suffix.
     """
+    if engine not in ENGINES:
+        console.print(f"[bold red]Error:[/bold red] Unknown import engine '{engine}' (expected one of: {', '.join(ENGINES)})")
+        return False
+    
+    backend = get_backend()
+    if engine == "parallel" and not backend.concurrent_writers:
+        console.print(f"[bold red]Error:[/bold red] The parallel engine needs a database that accepts concurrent "
+                      f"writers; DB_BACKEND is {backend.name}")
+        return False
+    
+    if engine == "native" and not backend.native_csv:
+        console.print(f"[bold red]Error:[/bold red] The native engine needs the DuckDB backend; DB_BACKEND is {backend.name}")
+        return False
+    
+    if mode not in MODES:
+        console.print(f"[bold red]Error:[/bold red] Unknown import mode '{mode}' (expected one of: {', '.join(MODES)})")
+        return False
+    
+    if mode == "incremental" and engine != "insert":
+        console.print(f"[bold red]Error:[/bold red] Incremental imports use the insert engine, not '{engine}'")
+        return False
+    
+    if resume and (engine != "insert" or mode != "replace"):
+        console.print("[bold red]Error:[/bold red] Only replace-mode imports with the insert engine can be resumed")
+        return False
+    
+    if reader not in READERS:
+        console.print(f"[bold red]Error:[/bold red] Unknown CSV reader '{reader}' (expected one of: {', '.join(READERS)})")
+        return False
+    
+    if batch_size < 1:
+        console.print(f"[bold red]Error:[/bold red] batch size must be at least 1, got {batch_size}")
+        return False
+    
     # Check if file exists
     if not os.path.exists(csv_file_path):
         console.print(f"[bold red]Error:[/bold red] CSV file not found at [yellow]{csv_file_path}[/yellow]")
         return False
     
+    compression = compression_format(csv_file_path)
+    if compression and (engine == "parallel" or resume):
+        console.print(f"[bold red]Error:[/bold red] {compression}-compressed files are read as one stream and cannot "
+                      f"be split for the parallel engine or resumed; decompress the file first")
+        return False
+    
+    if compression and engine == "native" and compression not in NATIVE_COMPRESSIONS:
+        console.print(f"[bold red]Error:[/bold red] DuckDB's CSV reader cannot read {compression}-compressed files; "
+                      f"use another engine")
+        return False
+    
+    rejects_path = rejects_path or default_rejects_path(csv_file_path)
+    
+    if columnar_format(csv_file_path):
+        if mode != "replace" or engine not in ("insert", "bulk") or resume:
+            console.print("[bold red]Error:[/bold red] Parquet and Arrow files are imported in replace mode "
+                          "with the insert or bulk engine, and cannot be resumed")
+            return False
+        return import_columnar_file(csv_file_path, batch_size=batch_size, commit_interval=commit_interval,
+                                    engine=engine, staging_dir=staging_dir, rejects_path=rejects_path)
+    
+    if mode == "incremental":
+        return import_csv_incremental(csv_file_path, batch_size=batch_size, commit_interval=commit_interval,
+                                      delete_missing=delete_missing, force=force, rejects_path=rejects_path,
+                                      reader=reader, summary=summary)
+    
+    if engine == "parallel":
+        return import_csv_parallel(csv_file_path, workers=workers, batch_size=batch_size,
+                                   commit_interval=commit_interval, rejects_path=rejects_path, reader=reader)
+    
+    if engine == "native":
+        return import_csv_native(csv_file_path, rejects_path=rejects_path)
+    
     console.print(f"Opening CSV file: [cyan]{csv_file_path}[/cyan]")
+    if compression:
+        console.print(f"[dim]{compression}-compressed: decompressing in a background thread[/dim]")
+    source_path = os.path.abspath(csv_file_path)
+    file_size, file_mtime_ns = file_fingerprint(csv_file_path)
     
-    connection = get_db_connection()
+    staging_file = None
+    committed_count = 0
     try:
-        # First, clear the existing table
-        with connection.cursor() as cursor:
-            with console.status("[bold cyan]Clearing existing data from table...[/bold cyan]") as status:
-                cursor.execute("TRUNCATE TABLE student_records")
-                time.sleep(0.5)  # Small delay to show the status
-                console.print("[green]✓[/green] Table cleared successfully")
-        
-        # Now import the CSV data
-        console.print("[bold cyan]Reading data from CSV file...[/bold cyan]")
-        
-        # Create a preview of the CSV data
-        csv_preview = []
-        with open(csv_file_path, 'r') as csv_file:
-            csv_reader = csv.reader(csv_file)
-            header = next(csv_reader)
-            console.print(f"CSV header: [magenta]{', '.join(header)}[/magenta]")
-            
-            # Get a few rows for preview
-            for i, row in enumerate(csv_reader):
-                if i < 3:  # Just show first 3 rows
-                    csv_preview.append(row)
+        with db_connection(local_infile=(engine == "bulk")) as connection:
+            # The summary table is rebuilt from the rows as they stream past
+            create_student_stats_table(connection)
+            create_data_version_table(connection)
+            create_import_checkpoint_table(connection)
+            mark_student_stats_stale(connection)
+            connection.commit()
+            stats = StatsAccumulator()
+            
+            checkpoint = None
+            if resume:
+                checkpoint = load_resume_checkpoint(connection, csv_file_path, source_path, file_size, file_mtime_ns)
+                if checkpoint is None:
+                    return False
+                # The rows imported before the interruption are not in this summary
+                stats.exact = False
+                console.print(f"[bold cyan]Resuming after row {checkpoint['rows_read']:,} "
+                              f"({checkpoint['record_count']:,} records already imported)...[/bold cyan]")
+            
+            # The old rows are cleared in the transaction of the first chunk, so
+            # an empty or unreadable file leaves them in place
+            cleared = resume
+            
+            # Now import the CSV data in a single streaming pass
+            console.print("[bold cyan]Reading data from CSV file...[/bold cyan]")
+            
+            start = checkpoint['byte_offset'] if checkpoint else None
+            rows_read = checkpoint['rows_read'] if checkpoint else 0
+            record_count = committed_count = checkpoint['record_count'] if checkpoint else 0
+            rejected_before = checkpoint['rejected_count'] if checkpoint else 0
+            # Validated rows and rejects of the insert engine not yet committed
+            pending = []
+            pending_rejects = []
+            
+            if engine == "bulk":
+                staging_file = tempfile.NamedTemporaryFile('w', newline='', encoding='utf-8', suffix='.csv',
+                                                           prefix='student_records_', dir=staging_dir, delete=False)
+                staging_writer = csv.writer(staging_file, lineterminator='\n')
+            
+            with open_csv_reader(csv_file_path, reader, batch_size) as csv_source, \
+                    RejectsFile(rejects_path, append=resume) as rejects:
+                if csv_source.header is None:
+                    console.print(f"[bold red]Error:[/bold red] CSV file [yellow]{csv_file_path}[/yellow] is empty")
+                    return False
+                show_csv_preview(csv_source.header, csv_source.preview(PREVIEW_ROWS))
+                
+                # Insert the pending rows and commit them with a checkpoint at
+                # ``offset`` and a new data version as one transaction, redone
+                # as a whole after a transient error. The first chunk also
+                # clears the table; the final chunk clears the checkpoint and
+                # commits the summary instead.
+                def commit_pending(offset, final=False):
+                    nonlocal record_count, committed_count, cleared
+                    
+                    def write_chunk():
+                        if not cleared:
+                            clear_import_checkpoint(connection, source_path)
+                            clear_student_records(connection)
+                        with connection.cursor() as cursor:
+                            for batch in record_batches(pending, batch_size):
+                                insert_batch(cursor, batch)
+                        if final:
+                            save_student_stats(connection, stats)
+                            clear_import_checkpoint(connection, source_path)
+                        else:
+                            save_import_checkpoint(connection, source_path, file_size, file_mtime_ns, offset, rows_read,
+                                                   record_count + len(pending),
+                                                   rejected_before + rejects.count + len(pending_rejects))
+                        bump_data_version(connection)
+                        with timed("commit"):
+                            connection.commit()
+                    
+                    run_with_retries(connection, write_chunk, on_retry=print_retry_warning)
+                    cleared = True
+                    rejects.write(pending_rejects)
+                    record_count += len(pending)
+                    committed_count = record_count
+                    pending.clear()
+                    pending_rejects.clear()
+                
+                if engine == "bulk":
+                    console.print(f"[bold cyan]Validating rows into staging file [dim]{staging_file.name}[/dim]...[/bold cyan]")
                 else:
-                    break
-        
-        # Show csv preview in a table
-        preview_table = Table(title="CSV Data Preview", border_style="cyan")
-        for i, column in enumerate(header):
-            preview_table.add_column(column)
-        
-        for row in csv_preview:
-            preview_table.add_row(*row)
-        
-        console.print(preview_table)
-        
-        # Now actually process the file
-        record_count = 0
-        skipped_count = 0
-        
-        console.print("[bold cyan]Starting data import to MySQL...[/bold cyan]")
-        
-        # Read the file again for the actual import
-        with open(csv_file_path, 'r') as csv_file:
-            csv_reader = csv.reader(csv_file)
-            next(csv_reader)  # Skip header
-            
-            # Get total rows for progress bar
-            total_rows = sum(1 for row in csv.reader(open(csv_file_path))) - 1
-            csv_file.seek(0)
-            next(csv_reader)  # Skip header again
-            
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[bold cyan]{task.description}[/bold cyan]"),
-                BarColumn(),
-                TextColumn("[bold green]{task.completed}/{task.total}[/bold green]"),
-                TimeElapsedColumn(),
-            ) as progress:
-                import_task = progress.add_task("[cyan]Importing records...", total=total_rows)
+                    console.print(f"[bold cyan]Starting data import (batch size {batch_size})...[/bold cyan]")
                 
-                with connection.cursor() as cursor:
-                    for row in csv_reader:
-                        # Validate row data
-                        if len(row) != 3:
-                            progress.console.print(f"[yellow]Warning:[/yellow] Skipping invalid row: {row}")
-                            skipped_count += 1
-                            progress.update(import_task, advance=1)
-                            continue
+                # Progress is measured in bytes against the file size
+                with import_progress() as progress:
+                    import_task = progress.add_task("[cyan]Importing records...", total=csv_source.size,
+                                                    completed=start or 0, records=record_count)
+                    
+                    for block in csv_source.blocks(start):
+                        with timed("validate", rows=len(block.rows)):
+                            decoded = decode_rows(block.rows)
+                        records = decoded.records()
+                        for record in records:
+                            stats.add(*record)
+                        rows_read += len(block.rows)
                         
-                        id_no, name, cgpa = row
-                        # Validate CGPA is a number
-                        try:
-                            cgpa = float(cgpa)
-                        except ValueError:
-                            progress.console.print(f"[yellow]Warning:[/yellow] Skipping row with invalid CGPA: {row}")
-                            skipped_count += 1
-                            progress.update(import_task, advance=1)
-                            continue
+                        if engine == "bulk":
+                            rejects.write(decoded.rejects)
+                            if block.raw is not None and not decoded.rejects:
+                                # Every line of the block is valid: stage the mapped bytes as they are
+                                staging_file.flush()
+                                staging_file.buffer.write(block.raw)
+                            else:
+                                staging_writer.writerows(records)
+                            record_count += len(records)
+                        else:
+                            pending.extend(records)
+                            pending_rejects.extend(decoded.rejects)
+                            # Commit at block boundaries, where the offset of the next row is known
+                            if len(pending) >= commit_interval:
+                                commit_pending(block.end)
+                        progress.update(import_task, completed=block.end, records=record_count + len(pending))
+                
+                if engine == "bulk":
+                    staging_file.close()
+                    if not cleared:
+                        clear_import_checkpoint(connection, source_path)
+                        clear_student_records(connection)
+                    loaded_count = bulk_load_staged_file(connection, staging_file.name, record_count)
+                    if loaded_count != record_count:
+                        console.print(f"[yellow]Warning:[/yellow] The database loaded {loaded_count} of {record_count} staged rows")
+                        record_count = loaded_count
+                        # The summary no longer matches the rows the database accepted
+                        stats.exact = False
+                    
+                    # Commit changes
+                    console.print("[cyan]Committing changes to database...[/cyan]")
+                    save_student_stats(connection, stats)
+                    bump_data_version(connection)
+                    with timed("commit"):
+                        connection.commit()
+                else:
+                    console.print("[cyan]Committing changes to database...[/cyan]")
+                    commit_pending(csv_source.size, final=True)
+            
+            print_import_summary(csv_file_path, record_count, rejected_before + rejects.count, rejects_path)
+            return True
+    
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Failed to import CSV data: {e}")
+        if engine == "insert" and committed_count and not compression:
+            console.print(f"[cyan]{committed_count:,} records were committed; run the import again with --resume "
+                          f"to continue from the last checkpoint[/cyan]")
+        return False
+    
+    finally:
+        if staging_file is not None:
+            staging_file.close()
+            os.remove(staging_file.name)
+
+def print_retry_warning(error, attempt, delay):
+    """
+    Report a transient database error that is about to be retried.
+    """
+    console.print(f"[yellow]Warning:[/yellow] Transient database error ({error}); "
+                  f"retrying in {delay:.1f}s (attempt {attempt + 1})")
+
+def load_resume_checkpoint(connection, csv_file_path, source_path, file_size, file_mtime_ns):
+    """
+    Return the checkpoint to resume ``csv_file_path`` from.
+    
+    Prints the reason and returns None if there is no checkpoint, the file
+    has changed since it was written, or student_records no longer holds
+    the rows it counted.
+    """
+    checkpoint = load_import_checkpoint(connection, source_path)
+    if checkpoint is None:
+        console.print(f"[bold red]Error:[/bold red] No checkpoint found for [yellow]{csv_file_path}[/yellow]; "
+                      f"run the import without --resume")
+        return None
+    
+    if (checkpoint['file_size'], checkpoint['file_mtime_ns']) != (file_size, file_mtime_ns):
+        console.print(f"[bold red]Error:[/bold red] [yellow]{csv_file_path}[/yellow] has changed since the checkpoint; "
+                      f"run the import without --resume to start over")
+        return None
+    
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS count FROM student_records")
+        table_count = cursor.fetchone()['count']
+    if table_count != checkpoint['record_count']:
+        console.print(f"[bold red]Error:[/bold red] student_records holds {table_count:,} rows but the checkpoint "
+                      f"recorded {checkpoint['record_count']:,}; run the import without --resume to start over")
+        return None
+    return checkpoint
+
+def columnar_valid_mask(batch):
+    """
+    Return a boolean mask of the rows of a record batch that pass validation.
+    
+    Applies the checks of parse_student_row to whole columns with Arrow
+    compute kernels; a missing value fails the row.
+    """
+    import pyarrow.compute as pc
+    id_no, name, cgpa = batch.columns
+    id_length = pc.utf8_length(id_no)
+    checks = [
+        pc.greater(id_length, 0),
+        pc.less_equal(id_length, ID_NO_MAX_LENGTH),
+        pc.less_equal(pc.utf8_length(name), NAME_MAX_LENGTH),
+        pc.greater_equal(cgpa, CGPA_MIN),
+        pc.less_equal(cgpa, CGPA_MAX),
+    ]
+    mask = checks[0]
+    for check in checks[1:]:
+        mask = pc.and_(mask, check)
+    return pc.fill_null(mask, False)
+
+def columnar_rejects(batch):
+    """
+    Return the (reason, row) rejects for a batch of rows that failed validation.
+    """
+    rejects = []
+    for values in batch.to_pylist():
+        row = ["" if values[column] is None else values[column] for column in ("id_no", "name", "cgpa")]
+        rejects.append((parse_student_row(row)[1] or "invalid value", row))
+    return rejects
+
+def import_columnar_file(path, batch_size=DEFAULT_BATCH_SIZE, commit_interval=DEFAULT_COMMIT_INTERVAL,
+                         engine="insert", staging_dir=None, rejects_path=None):
+    """
+    Replace student_records with the rows of a Parquet or Arrow snapshot.
+    
+    The columns arrive typed and in batches, so there is no CSV parsing or
+    per-row float conversion, and each batch is validated with Arrow compute
+    kernels (see ``columnar_valid_mask``). The insert engine sends each batch as one multi-row INSERT. The bulk engine
+    writes the batches to a staging CSV with Arrow's native CSV writer and
+    loads it with the backend's bulk loader.
+    """
+    console.print(f"Opening {columnar_format(path)} file: [cyan]{path}[/cyan]")
+    rejects_path = rejects_path or default_rejects_path(path)
+    
+    staging_file = None
+    try:
+        import pyarrow.compute as pc
+        from pyarrow import csv as arrow_csv
+        total_rows, batches = read_student_batches(path, batch_size)
+        
+        with db_connection(local_infile=(engine == "bulk")) as connection:
+            create_student_stats_table(connection)
+            create_data_version_table(connection)
+            mark_student_stats_stale(connection)
+            connection.commit()
+            stats = StatsAccumulator()
+            
+            clear_student_records(connection)
+            
+            if engine == "bulk":
+                staging_file = tempfile.NamedTemporaryFile('wb', suffix='.csv', prefix='student_records_',
+                                                           dir=staging_dir, delete=False)
+            
+            record_count = 0
+            uncommitted_count = 0
+            with import_progress() as progress, RejectsFile(rejects_path) as rejects:
+                import_task = progress.add_task("[cyan]Importing records...", total=total_rows, records=0)
+                with connection.cursor() as cursor:
+                    for batch in batches:
+                        with timed("validate", rows=batch.num_rows):
+                            mask = columnar_valid_mask(batch)
+                            valid = batch.filter(mask)
+                            if valid.num_rows < batch.num_rows:
+                                rejects.write(columnar_rejects(batch.filter(pc.invert(mask))))
+                            records = list(zip(*(valid.column(i).to_pylist() for i in range(3))))
+                        for record in records:
+                            stats.add(*record)
                         
-                        # Insert into database
-                        sql = "INSERT INTO student_records (id_no, name, cgpa) VALUES (%s, %s, %s)"
-                        cursor.execute(sql, (id_no, name, cgpa))
-                        record_count += 1
-                        progress.update(import_task, advance=1)
+                        if engine == "bulk":
+                            arrow_csv.write_csv(valid, staging_file,
+                                                write_options=arrow_csv.WriteOptions(include_header=False))
+                        else:
+                            insert_batch(cursor, records)
+                            uncommitted_count += len(records)
+                            if uncommitted_count >= commit_interval:
+                                bump_data_version(connection)
+                                with timed("commit"):
+                                    connection.commit()
+                                uncommitted_count = 0
+                        record_count += len(records)
+                        progress.update(import_task, advance=batch.num_rows, records=record_count)
+            
+            if engine == "bulk":
+                staging_file.close()
+                loaded_count = bulk_load_staged_file(connection, staging_file.name, record_count)
+                if loaded_count != record_count:
+                    console.print(f"[yellow]Warning:[/yellow] The database loaded {loaded_count} of {record_count} staged rows")
+                    record_count = loaded_count
+                    stats.exact = False
+            
+            console.print("[cyan]Committing changes to database...[/cyan]")
+            save_student_stats(connection, stats)
+            bump_data_version(connection)
+            with timed("commit"):
+                connection.commit()
+        
+        print_import_summary(path, record_count, rejects.count, rejects_path)
+        return True
+    
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Failed to import {path}: {e}")
+        return False
+    
+    finally:
+        if staging_file is not None:
+            staging_file.close()
+            os.remove(staging_file.name)
+
+def import_csv_native(csv_file_path, rejects_path=None):
+    """
+    Replace student_records with a CSV file parsed by DuckDB's native CSV reader.
+    
+    The file is read into a temporary table of text columns without Python
+    touching a row (see DuckDBBackend.stage_csv), and the checks of
+    parse_student_row run as one INSERT ... SELECT over it (see
+    NATIVE_VALID_SQL). Only rejected rows come back to Python, to be written
+    to ``rejects_path`` with their reason. The student_stats summary is not
+    accumulated row by row; it is left stale and rebuilt by its next reader.
+    """
+    console.print(f"Opening CSV file: [cyan]{csv_file_path}[/cyan]")
+    rejects_path = rejects_path or default_rejects_path(csv_file_path)
+    backend = get_backend()
+    compression = compression_format(csv_file_path)
+    
+    with open_csv_reader(csv_file_path) as csv_source:
+        if csv_source.header is None:
+            console.print(f"[bold red]Error:[/bold red] CSV file [yellow]{csv_file_path}[/yellow] is empty")
+            return False
+        show_csv_preview(csv_source.header, csv_source.preview(PREVIEW_ROWS))
+    
+    try:
+        with db_connection() as connection, RejectsFile(rejects_path) as rejects:
+            create_student_stats_table(connection)
+            create_data_version_table(connection)
+            
+            with console.status("[bold cyan]Reading CSV file with DuckDB's CSV reader...[/bold cyan]"):
+                with timed("parse"):
+                    malformed = backend.stage_csv(connection, csv_file_path, "import_raw", compression=compression)
+            
+            with connection.cursor() as cursor:
+                with console.status("[bold cyan]Validating and loading rows...[/bold cyan]"):
+                    with timed("truncate"):
+                        backend.clear_table(cursor, "student_records")
+                    with timed("insert"):
+                        cursor.execute(f"""
+                        INSERT INTO student_records (id_no, name, cgpa)
+                        SELECT id_no, COALESCE(name, ''), TRY_CAST(cgpa AS DOUBLE) FROM import_raw
+                        WHERE {NATIVE_VALID_SQL}
+                        """)
+                        record_count = cursor.rowcount
+                    add_rows("insert", record_count)
+                
+                with timed("validate"):
+                    cursor.execute(f"""
+                    SELECT COALESCE(id_no, '') AS id_no, COALESCE(name, '') AS name, COALESCE(cgpa, '') AS cgpa
+                    FROM import_raw
+                    WHERE NOT COALESCE({NATIVE_VALID_SQL}, FALSE)
+                    """)
+                    invalid_rows = [[row['id_no'], row['name'], row['cgpa']] for row in cursor.fetchall()]
+                    invalid_rows += list(csv.reader(malformed))
+                    rejects.write([(parse_student_row(row)[1] or "invalid value", row) for row in invalid_rows])
+                cursor.execute("DROP TABLE import_raw")
+            
+            console.print("[cyan]Committing changes to database...[/cyan]")
+            mark_student_stats_stale(connection)
+            bump_data_version(connection)
+            with timed("commit"):
+                connection.commit()
+    
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Failed to import CSV data: {e}")
+        return False
+    
+    print_import_summary(csv_file_path, record_count, rejects.count, rejects_path)
+    return True
+
+def find_shard_ranges(csv_source, shard_count):
+    """
+    Split the data rows of an open CSV reader into byte ranges on line boundaries.
+    
+    Returns a list of ``(start, end)`` offsets covering everything after the
+    header line. Quoted fields containing newlines are not supported, since a
+    boundary could fall inside one.
+    """
+    data_start, file_size = csv_source.data_start, csv_source.size
+    boundaries = [data_start]
+    for i in range(1, shard_count):
+        target = data_start + (file_size - data_start) * i // shard_count
+        if target <= boundaries[-1]:
+            continue
+        # The shard starts at the first line beginning at or after the target
+        boundary = csv_source.line_start(target)
+        if boundaries[-1] < boundary < file_size:
+            boundaries.append(boundary)
+    boundaries.append(file_size)
+    
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+def import_shard(csv_file_path, start, end, table, batch_size, commit_interval, reader="mmap"):
+    """
+    Parse, validate and insert one byte range of a CSV file.
+    
+    Runs in a worker process with its own database connection and returns a
+    dict with the imported count, the rejected rows and a StatsAccumulator
+    summarising the imported rows.
+    """
+    record_count = 0
+    uncommitted_count = 0
+    rejects = []
+    stats = StatsAccumulator()
+    
+    with db_connection() as connection, open_csv_reader(csv_file_path, reader, batch_size) as csv_source:
+        with connection.cursor() as cursor:
+            for block in csv_source.blocks(start, end):
+                decoded = decode_rows(block.rows)
+                rejects.extend(decoded.rejects)
+                records = decoded.records()
+                for record in records:
+                    stats.add(*record)
+                
+                for batch in record_batches(records, batch_size):
+                    insert_batch(cursor, batch, table=table)
+                    record_count += len(batch)
+                    uncommitted_count += len(batch)
+                    if uncommitted_count >= commit_interval:
+                        connection.commit()
+                        uncommitted_count = 0
         
-        # Commit changes
-        console.print("[cyan]Committing changes to database...[/cyan]")
         connection.commit()
+    
+    return {"imported": record_count, "rejects": rejects, "stats": stats}
+
+def import_csv_parallel(csv_file_path, workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                        commit_interval=DEFAULT_COMMIT_INTERVAL, rejects_path=None, reader="mmap"):
+    """
+    Import a CSV file using a pool of worker processes.
+    
+    The file is split into byte-range shards aligned on line boundaries. Each
+    worker parses and validates its shards and inserts them through its own
+    connection into a staging table. Once every shard has succeeded the
+    staging table is atomically swapped in for student_records; if any shard
+    fails the staging table is dropped and student_records is left untouched.
+    Rejected rows come back with each shard's result and are written to
+    ``rejects_path`` by the parent.
+    """
+    workers = workers or os.cpu_count() or 1
+    rejects_path = rejects_path or default_rejects_path(csv_file_path)
+    console.print(f"Opening CSV file: [cyan]{csv_file_path}[/cyan]")
+    
+    with open_csv_reader(csv_file_path, reader) as csv_source:
+        if csv_source.header is None:
+            console.print(f"[bold red]Error:[/bold red] CSV file [yellow]{csv_file_path}[/yellow] is empty")
+            return False
+        show_csv_preview(csv_source.header, csv_source.preview(PREVIEW_ROWS))
+        shard_ranges = find_shard_ranges(csv_source, workers * SHARDS_PER_WORKER)
+    console.print(f"[bold cyan]Importing {len(shard_ranges)} shards with {workers} worker processes...[/bold cyan]")
+    
+    record_count = 0
+    stats = StatsAccumulator()
+    rejects = RejectsFile(rejects_path)
+    try:
+        with db_connection() as connection:
+            staging_table = create_staging_table(connection)
+            # Load the staging table unindexed and build its indexes before the swap
+            dropped_indexes = drop_secondary_indexes(connection, staging_table)
         
-        # Create a summary panel
-        summary = Panel(
-            f"""[green]✓[/green] Successfully imported [bold green]{record_count}[/bold green] records from {csv_file_path}
-{f"[yellow]⚠[/yellow] Skipped [bold yellow]{skipped_count}[/bold yellow] invalid records" if skipped_count > 0 else ""}
-[cyan]→[/cyan] You can now check MySQL Workbench to verify the data has been populated""",
-            title="Import Summary",
-            border_style="green"
-        )
-        console.print(summary)
-        return True
+        # Spawned workers start with a fresh connection pool instead of
+        # inheriting the parent's sockets, and without repeating the parent's
+        # connection banner. They are not instrumented, so the whole shard
+        # phase is timed as "insert"
+        with timed("insert"), ProcessPoolExecutor(max_workers=workers,
+                                                  mp_context=multiprocessing.get_context("spawn"),
+                                                  initializer=suppress_connection_banner) as executor:
+            futures = {
+                executor.submit(import_shard, csv_file_path, start, end, staging_table, batch_size, commit_interval,
+                                reader): end - start
+                for start, end in shard_ranges
+            }
+            try:
+                with import_progress() as progress:
+                    import_task = progress.add_task("[cyan]Importing records...", total=os.path.getsize(csv_file_path),
+                                                    records=0)
+                    for future in as_completed(futures):
+                        result = future.result()
+                        record_count += result["imported"]
+                        rejects.write(result["rejects"])
+                        stats.merge(result["stats"])
+                        progress.update(import_task, advance=futures[future], records=record_count)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        add_rows("insert", record_count)
+        
+        with db_connection() as connection:
+            if dropped_indexes:
+                with console.status(f"[bold cyan]Building indexes: {', '.join(dropped_indexes)}...[/bold cyan]"):
+                    restore_indexes(connection, dropped_indexes, staging_table)
+            create_student_stats_table(connection)
+            create_data_version_table(connection)
+            mark_student_stats_stale(connection)
+            connection.commit()
+            with console.status("[bold cyan]Swapping staging table into student_records...[/bold cyan]"):
+                swap_staging_table(connection, staging_table)
+            save_student_stats(connection, stats)
+            bump_data_version(connection)
+            connection.commit()
     
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] Failed to import CSV data: {e}")
+        try:
+            with db_connection() as connection:
+                drop_staging_table(connection)
+        except Exception as cleanup_error:
+            console.print(f"[yellow]Warning:[/yellow] Could not drop the staging table: {cleanup_error}")
         return False
     
     finally:
-        console.print("[dim]Closing database connection[/dim]")
-        connection.close()
\ No newline at end of file
+        rejects.close()
+    
+    print_import_summary(csv_file_path, record_count, rejects.count, rejects_path)
+    return True
+
+def file_fingerprint(csv_file_path):
+    """
+    Return the (size, mtime in nanoseconds) pair used to detect unchanged files.
+    """
+    stat = os.stat(csv_file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def drop_temporary_table(cursor, table):
+    """
+    Drop a temporary table if it exists, ignoring errors so a failed import reports its own.
+    """
+    try:
+        cursor.execute(get_backend().drop_temporary_table_sql(table))
+    except Exception as e:
+        console.print(f"[yellow]Warning:[/yellow] Could not drop temporary table {table}: {e}")
+
+def upsert_batch(cursor, batch, known_rows, stats=None):
+    """
+    Insert new rows and update changed rows of a batch, skipping unchanged ones.
+    
+    The current values of the batch's IDs are read in one query and compared
+    in Python so that only rows that actually differ are written. ``known_rows``
+    caches the latest (name, cgpa) of the IDs being processed, so an ID that
+    repeats within the batch is classified against the row it replaces.
+    When a StatsAccumulator is passed as ``stats``, every insert and update
+    is applied to it as well. Returns the (inserted, updated, unchanged) counts.
+    """
+    pending_ids = [record[0] for record in batch if record[0] not in known_rows]
+    if pending_ids:
+        placeholders = ", ".join(["%s"] * len(pending_ids))
+        cursor.execute(f"SELECT id_no, name, cgpa FROM student_records WHERE id_no IN ({placeholders})", pending_ids)
+        for row in cursor.fetchall():
+            known_rows[row['id_no']] = (row['name'], row['cgpa'])
+    
+    inserted = updated = unchanged = 0
+    changed = []
+    for id_no, name, cgpa in batch:
+        current = known_rows.get(id_no)
+        if current is None:
+            inserted += 1
+        # FLOAT columns round to single precision, so compare CGPA approximately
+        elif current[0] != name or not math.isclose(current[1], cgpa, rel_tol=1e-6):
+            updated += 1
+            if stats is not None:
+                stats.remove(id_no, *current)
+        else:
+            unchanged += 1
+            continue
+        if stats is not None:
+            stats.add(id_no, name, cgpa)
+        changed.append((id_no, name, cgpa))
+        known_rows[id_no] = (name, cgpa)
+    
+    if changed:
+        sql = get_backend().upsert_sql("student_records", ("id_no", "name", "cgpa"), ("id_no",))
+        with timed("insert", rows=len(changed)):
+            cursor.executemany(sql, changed)
+    return inserted, updated, unchanged
+
+def import_csv_incremental(csv_file_path, batch_size=DEFAULT_BATCH_SIZE, commit_interval=DEFAULT_COMMIT_INTERVAL,
+                           delete_missing=False, force=False, rejects_path=None, reader="mmap", summary=None):
+    """
+    Apply a CSV file to student_records in place, keyed on id_no.
+    
+    New IDs are inserted and rows whose name or CGPA changed are updated with
+    an upsert (INSERT ... ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT on the
+    embedded backends); identical rows are not written. With
+    ``delete_missing``, rows whose ID does not appear in the file are deleted.
+    The table is never truncated, so readers keep seeing the previous data
+    while the import runs.
+    
+    The size, modification time and SHA-256 checksum of each imported file are
+    recorded in import_state. A file whose size and modification time match
+    the last import is skipped unless ``force`` is set.
+    
+    When ``summary`` is a dict, the inserted, updated, unchanged, deleted and
+    rejected row counts of a successful import are stored in it.
+    """
+    console.print(f"Opening CSV file: [cyan]{csv_file_path}[/cyan]")
+    source_path = os.path.abspath(csv_file_path)
+    file_size, file_mtime_ns = file_fingerprint(csv_file_path)
+    rejects_path = rejects_path or default_rejects_path(csv_file_path)
+    
+    backend = get_backend()
+    inserted_count = updated_count = unchanged_count = deleted_count = 0
+    try:
+        with db_connection() as connection:
+            create_import_state_table(connection)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT file_size, file_mtime_ns, checksum FROM import_state WHERE source_path = %s",
+                               (source_path,))
+                previous = cursor.fetchone()
+            
+            if (not force and previous and previous['file_size'] == file_size
+                    and previous['file_mtime_ns'] == file_mtime_ns):
+                console.print(Panel(
+                    f"[green]✓[/green] {csv_file_path} is unchanged since the last import (checksum {previous['checksum'][:12]}); nothing to do",
+                    title="Import Summary",
+                    border_style="green"
+                ))
+                return True
+            
+            # Apply this import's changes to the saved summary, if it is current;
+            # it stays flagged stale until the import commits
+            stats = load_student_stats(connection)
+            create_student_stats_table(connection)
+            create_data_version_table(connection)
+            mark_student_stats_stale(connection)
+            connection.commit()
+            
+            hasher = hashlib.sha256()
+            known_rows = {}
+            uncommitted_count = 0
+            
+            with open_csv_reader(csv_file_path, reader, batch_size) as csv_source, connection.cursor() as cursor, \
+                    RejectsFile(rejects_path) as rejects, ExitStack() as cleanup:
+                if csv_source.header is None:
+                    console.print(f"[bold red]Error:[/bold red] CSV file [yellow]{csv_file_path}[/yellow] is empty")
+                    return False
+                
+                if delete_missing:
+                    # IDs present in the file, used to find the rows to delete. A
+                    # rollback does not drop a MySQL temporary table, so it is
+                    # dropped on every way out of this block
+                    cursor.execute(backend.drop_temporary_table_sql("import_seen_ids"))
+                    cursor.execute(f"CREATE TEMPORARY TABLE import_seen_ids (id_no VARCHAR({ID_NO_MAX_LENGTH}) PRIMARY KEY)")
+                    cleanup.callback(drop_temporary_table, cursor, "import_seen_ids")
+                show_csv_preview(csv_source.header, csv_source.preview(PREVIEW_ROWS))
+                console.print(f"[bold cyan]Applying incremental changes (batch size {batch_size})...[/bold cyan]")
+                
+                def flush(batch):
+                    nonlocal inserted_count, updated_count, unchanged_count
+                    inserted, updated, unchanged = upsert_batch(cursor, batch, known_rows, stats)
+                    inserted_count += inserted
+                    updated_count += updated
+                    unchanged_count += unchanged
+                    if delete_missing:
+                        cursor.executemany(backend.insert_ignore_sql("import_seen_ids", ("id_no",)),
+                                           [(record[0],) for record in batch])
+                    # Only the IDs of the current batch need to be remembered
+                    known_rows.clear()
+                
+                with import_progress() as progress:
+                    import_task = progress.add_task("[cyan]Applying records...", total=file_size, records=0)
+                    
+                    # The checksum is computed over the whole file as it is read
+                    for block in csv_source.blocks(hasher=hasher):
+                        with timed("validate", rows=len(block.rows)):
+                            decoded = decode_rows(block.rows)
+                        rejects.write(decoded.rejects)
+                        for batch in record_batches(decoded.records(), batch_size):
+                            flush(batch)
+                            uncommitted_count += len(batch)
+                            if uncommitted_count >= commit_interval:
+                                bump_data_version(connection)
+                                with timed("commit"):
+                                    connection.commit()
+                                uncommitted_count = 0
+                        progress.update(import_task, completed=block.end,
+                                        records=inserted_count + updated_count + unchanged_count)
+                
+                if delete_missing:
+                    with console.status("[bold cyan]Deleting rows missing from the CSV file...[/bold cyan]"):
+                        if stats is not None:
+                            cursor.execute("""
+                            SELECT student_records.id_no, student_records.name, student_records.cgpa
+                            FROM student_records LEFT JOIN import_seen_ids USING (id_no)
+                            WHERE import_seen_ids.id_no IS NULL
+                            """)
+                            for row in cursor.fetchall():
+                                stats.remove(row['id_no'], row['name'], row['cgpa'])
+                        cursor.execute("""
+                        DELETE FROM student_records
+                        WHERE NOT EXISTS (SELECT 1 FROM import_seen_ids WHERE import_seen_ids.id_no = student_records.id_no)
+                        """)
+                        deleted_count = cursor.rowcount
+                
+                cursor.execute(backend.upsert_sql("import_state", ("source_path", "file_size", "file_mtime_ns", "checksum"),
+                                                  ("source_path",)),
+                               (source_path, file_size, file_mtime_ns, hasher.hexdigest()))
+                
+                if stats is not None:
+                    save_student_stats(connection, stats)
+                bump_data_version(connection)
+            
+            console.print("[cyan]Committing changes to database...[/cyan]")
+            with timed("commit"):
+                connection.commit()
+    
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Failed to import CSV data: {e}")
+        return False
+    
+    checksum_note = ""
+    if previous and previous['checksum'] == hasher.hexdigest():
+        checksum_note = "\n[dim]File contents match the previous import (only the modification time changed)[/dim]"
+    
+    console.print(Panel(
+        f"""[green]✓[/green] Applied {csv_file_path} incrementally
+[bold green]{inserted_count}[/bold green] inserted, [bold cyan]{updated_count}[/bold cyan] updated, [bold]{unchanged_count}[/bold] unchanged, [bold red]{deleted_count}[/bold red] deleted
+{rejects_note(rejects.count, rejects_path)}{checksum_note}""",
+        title="Import Summary",
+        border_style="green"
+    ))
+    if summary is not None:
+        summary.update(inserted=inserted_count, updated=updated_count, unchanged=unchanged_count,
+                       deleted=deleted_count, rejected=rejects.count)
+    return True
@@ -0,0 +1,538 @@
+"""
+CSV readers used by the importer.
+
+Both readers split a CSV file into blocks of parsed rows and report the byte
+offset reached after each block, which drives the progress bar and lets a
+reader start and stop at any line boundary (for parallel shards and resumed
+imports).
+
+The ``mmap`` reader maps the file and splits lines straight from the mapped
+buffer, a block of ``MMAP_BLOCK_SIZE`` bytes at a time, with one decode and
+one split per block instead of a read, decode and csv.reader call per line.
+Blocks without quotes are also handed out as a zero-copy view of the mapped
+bytes, which the bulk engine writes to its staging file unchanged. Blocks
+containing quotes or carriage returns fall back to the csv module, extended
+as needed so a quoted field with an embedded newline is never cut in two.
+
+The ``stream`` reader is the plain binary read through csv.reader that the
+importer has always used.
+
+Compressed files (gzip, bzip2 or zstd, recognised by their magic number
+whatever they are called) are read by CompressedCSVReader whichever reader
+is asked for. A background thread decompresses the file into a small
+bounded queue while the importer parses and inserts, and offsets are
+measured in compressed bytes, so progress is reported against the size of
+the file on disk. A compressed stream can only be read start to end: there
+is no seeking to a line, so no parallel shards or resumed imports.
+"""
+
+import bz2
+import csv
+import gzip
+import io
+import mmap
+import queue
+import threading
+from itertools import islice
+from instrumentation import timed, add_rows
+from options import READERS
+
+# Bytes the mmap reader parses per block
+MMAP_BLOCK_SIZE = 1 << 20
+
+# Rows the stream reader parses per block
+STREAM_BLOCK_ROWS = 1000
+
+# Leading bytes of each compressed format the readers accept
+COMPRESSION_MAGIC = {"gzip": b"\x1f\x8b", "bz2": b"BZh", "zstd": b"\x28\xb5\x2f\xfd"}
+
+# Extensions of compressed file names, stripped before naming derived files
+COMPRESSION_EXTENSIONS = (".gz", ".bz2", ".zst")
+
+# Decompressed bytes per chunk handed from the decompression thread; also
+# the size of the blocks the compressed reader parses
+DECOMPRESS_CHUNK_SIZE = 1 << 20
+
+# Chunks the decompression thread may run ahead of the parser
+DECOMPRESS_QUEUE_CHUNKS = 4
+
+def split_rows(text, quoted):
+    """
+    Parse a block of complete lines, returning ``(rows, zero_copy)``.
+    
+    Lines without quotes or carriage returns are split on commas directly
+    and ``zero_copy`` is True; anything else goes through csv.reader.
+    """
+    if quoted or '\r' in text:
+        return list(csv.reader(io.StringIO(text, newline=''))), False
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    # csv.reader returns an empty row for a blank line
+    return [line.split(',') if line else [] for line in lines], True
+
+class CSVBlock:
+    """
+    A block of parsed rows and the file offset just past its last line.
+    
+    ``raw`` is a memoryview of the block's bytes when they can be loaded
+    as-is (no quotes, ``\\n`` line endings), otherwise None. It is only valid
+    until the reader moves on to the next block.
+    """
+    
+    __slots__ = ("rows", "raw", "end")
+    
+    def __init__(self, rows, raw, end):
+        self.rows = rows
+        self.raw = raw
+        self.end = end
+
+class ByteCountingLineReader:
+    """
+    Iterate over the decoded lines of a binary file, counting the bytes consumed.
+    
+    csv.reader accepts any iterable of lines, so wrapping the raw file lets the
+    import report progress from the byte offset without a separate pass to
+    count rows (text-mode tell() is unavailable while iterating). When
+    ``limit`` is given, iteration stops after the line that reaches ``limit``
+    bytes from the starting position. When ``hasher`` is given, every raw
+    line is fed to it, so a checksum comes for free with the import.
+    """
+    
+    def __init__(self, binary_file, encoding='utf-8-sig', limit=None, hasher=None):
+        self.binary_file = binary_file
+        self.encoding = encoding
+        self.limit = limit
+        self.hasher = hasher
+        self.bytes_read = 0
+    
+    def __iter__(self):
+        for raw_line in self.binary_file:
+            self.bytes_read += len(raw_line)
+            if self.hasher is not None:
+                self.hasher.update(raw_line)
+            yield raw_line.decode(self.encoding)
+            if self.limit is not None and self.bytes_read >= self.limit:
+                return
+
+class StreamCSVReader:
+    """
+    Read a CSV file through csv.reader, ``block_rows`` rows per block.
+    """
+    
+    def __init__(self, path, block_rows=STREAM_BLOCK_ROWS):
+        self.path = path
+        self.block_rows = block_rows
+        self._file = open(path, 'rb')
+        line_reader = ByteCountingLineReader(self._file)
+        self.header = next(csv.reader(line_reader), None)
+        self.data_start = line_reader.bytes_read
+        self.size = self._file.seek(0, io.SEEK_END)
+    
+    def preview(self, count):
+        """
+        Return the first ``count`` data rows.
+        """
+        self._file.seek(self.data_start)
+        return list(islice(csv.reader(ByteCountingLineReader(self._file)), count))
+    
+    def line_start(self, offset):
+        """
+        Return the offset of the first line starting at or after ``offset``.
+        """
+        if offset <= self.data_start:
+            return self.data_start
+        # Finish the line containing the byte before the offset
+        self._file.seek(offset - 1)
+        self._file.readline()
+        return min(self._file.tell(), self.size)
+    
+    def blocks(self, start=None, end=None, hasher=None):
+        """
+        Yield CSVBlocks for the lines between ``start`` and ``end``.
+        
+        Both default to the whole data section. When ``hasher`` is given and
+        the whole file is read, every byte of it, header included, is fed to it.
+        """
+        start = self.data_start if start is None else start
+        end = self.size if end is None else end
+        if hasher is not None:
+            self._file.seek(0)
+            hasher.update(self._file.read(start))
+        if start >= end:
+            return
+        
+        self._file.seek(start)
+        line_reader = ByteCountingLineReader(self._file, limit=end - start, hasher=hasher)
+        rows = csv.reader(line_reader)
+        while True:
+            with timed("parse"):
+                chunk = list(islice(rows, self.block_rows))
+            if not chunk:
+                return
+            add_rows("parse", len(chunk))
+            yield CSVBlock(chunk, None, start + line_reader.bytes_read)
+    
+    def close(self):
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class MappedCSVReader:
+    """
+    Read a CSV file from a read-only memory map, ``block_size`` bytes per block.
+    """
+    
+    def __init__(self, path, block_size=MMAP_BLOCK_SIZE):
+        self.path = path
+        self.block_size = block_size
+        self._file = open(path, 'rb')
+        self.size = self._file.seek(0, io.SEEK_END)
+        self._mmap = None
+        self._active_blocks = []
+        self.header = None
+        self.data_start = 0
+        if self.size == 0:
+            # An empty file cannot be mapped
+            return
+        
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data_start = self._line_end(0)
+        header_text = self._mmap[:self.data_start].decode('utf-8-sig')
+        self.header = next(csv.reader([header_text]), None)
+    
+    def _line_end(self, offset, end=None):
+        """
+        Return the offset just past the newline at or after ``offset``, at most ``end``.
+        """
+        end = self.size if end is None else end
+        newline = self._mmap.find(b'\n', offset, end)
+        return end if newline == -1 else newline + 1
+    
+    def preview(self, count):
+        """
+        Return the first ``count`` data rows.
+        """
+        if self._mmap is None:
+            return []
+        preview_end = self.data_start
+        for _ in range(count):
+            preview_end = self._line_end(preview_end)
+            # Keep a quoted field with an embedded newline in one piece
+            while self._mmap[self.data_start:preview_end].count(b'"') % 2 and preview_end < self.size:
+                preview_end = self._line_end(preview_end)
+        rows = csv.reader(io.StringIO(self._mmap[self.data_start:preview_end].decode('utf-8'), newline=''))
+        return list(islice(rows, count))
+    
+    def line_start(self, offset):
+        """
+        Return the offset of the first line starting at or after ``offset``.
+        """
+        if offset <= self.data_start:
+            return self.data_start
+        return self._line_end(offset - 1)
+    
+    def blocks(self, start=None, end=None, hasher=None):
+        """
+        Yield CSVBlocks for the lines between ``start`` and ``end``.
+        
+        Both default to the whole data section. When ``hasher`` is given and
+        the whole file is read, every byte of it, header included, is fed to it.
+        """
+        generator = self._blocks(self.data_start if start is None else start,
+                                 self.size if end is None else end, hasher)
+        # Remembered so close() can release the generator's views of the map
+        self._active_blocks.append(generator)
+        return generator
+    
+    def _blocks(self, start, end, hasher):
+        if self._mmap is None or start >= end:
+            return
+        
+        with memoryview(self._mmap) as view:
+            if hasher is not None:
+                hasher.update(view[:start])
+            
+            position = start
+            while position < end:
+                with timed("parse"):
+                    block_end = self._line_end(min(position + self.block_size, end) - 1, end)
+                    quoted = self._mmap.find(b'"', position, block_end) != -1
+                    if quoted:
+                        # An odd number of quotes means the block ends inside a
+                        # quoted field: take in lines until the field closes
+                        quotes = self._mmap[position:block_end].count(b'"')
+                        while quotes % 2 and block_end < end:
+                            next_end = self._line_end(block_end, end)
+                            quotes += self._mmap[block_end:next_end].count(b'"')
+                            block_end = next_end
+                    
+                    raw = view[position:block_end]
+                    rows, zero_copy = split_rows(str(raw, 'utf-8'), quoted)
+                add_rows("parse", len(rows))
+                
+                if hasher is not None:
+                    hasher.update(raw)
+                try:
+                    yield CSVBlock(rows, raw if zero_copy else None, block_end)
+                finally:
+                    raw.release()
+                position = block_end
+    
+    def close(self):
+        for generator in self._active_blocks:
+            generator.close()
+        self._active_blocks = []
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def compression_format(path):
+    """
+    Return ``"gzip"``, ``"bz2"`` or ``"zstd"`` for a compressed file, else None.
+    """
+    with open(path, 'rb') as source:
+        head = source.read(4)
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+def strip_compression_extension(path):
+    """
+    Return ``path`` without a trailing .gz, .bz2 or .zst extension.
+    """
+    for extension in COMPRESSION_EXTENSIONS:
+        if path.lower().endswith(extension):
+            return path[:-len(extension)]
+    return path
+
+def open_decompressor(source, compression):
+    """
+    Wrap the binary file ``source`` in a file object that reads it decompressed.
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=source, mode='rb')
+    if compression == "bz2":
+        return bz2.BZ2File(source)
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd-compressed files need the zstandard package: pip install zstandard") from None
+    return zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True, closefd=False)
+
+class CompressedSource:
+    """
+    A binary file that remembers how far the decompressor has read it, and what it read.
+    """
+    
+    def __init__(self, binary_file):
+        self.binary_file = binary_file
+        self.offset = 0
+        self._read = []
+    
+    def read(self, size=-1):
+        data = self.binary_file.read(size)
+        self.offset += len(data)
+        self._read.append(data)
+        return data
+    
+    def take_read(self):
+        """
+        Return the compressed bytes read since the last call, as a list of chunks.
+        """
+        chunks, self._read = self._read, []
+        return chunks
+
+class CompressedCSVReader:
+    """
+    Read a compressed CSV file decompressed by a background thread.
+    
+    The thread reads ``chunk_size`` decompressed bytes at a time and queues
+    them, with the compressed offset reached, for the parser; at most
+    ``queue_chunks`` wait in the queue, so memory stays bounded however
+    large the file is. zlib, bz2 and zstandard release the GIL while they
+    decompress, so decompression overlaps with parsing and inserting.
+    
+    Blocks are cut at line boundaries from the decompressed data, keeping
+    quoted fields whole as the mmap reader does. ``data_start`` is an offset
+    into the decompressed data; every ``end`` reported is a compressed
+    offset (that of the data decompressed so far), so ``blocks()`` only
+    reads the whole file.
+    """
+    
+    def __init__(self, path, compression, chunk_size=DECOMPRESS_CHUNK_SIZE, queue_chunks=DECOMPRESS_QUEUE_CHUNKS):
+        self.path = path
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self._file = open(path, 'rb')
+        self.size = self._file.seek(0, io.SEEK_END)
+        self._file.seek(0)
+        
+        # Decompressed data not yet handed out, and the compressed bytes it came from
+        self._pending = bytearray()
+        self._compressed = []
+        self._offset = 0
+        self._eof = False
+        self._chunks = queue.Queue(maxsize=queue_chunks)
+        self._stopped = threading.Event()
+        self._active_blocks = []
+        self._thread = threading.Thread(target=self._decompress, name=f"{compression}-decompressor", daemon=True)
+        self._thread.start()
+        
+        header_end = self._line_end(0)
+        self.header = None
+        if header_end:
+            self.header = next(csv.reader([self._pending[:header_end].decode('utf-8-sig')]), None)
+        self.data_start = header_end
+        del self._pending[:header_end]
+    
+    def _decompress(self):
+        """
+        Decompression thread: queue ``(data, compressed offset, compressed chunks)`` until EOF.
+        
+        An empty ``data`` marks the end of the file; an exception raised
+        while decompressing is queued in place of a chunk.
+        """
+        source = CompressedSource(self._file)
+        try:
+            with open_decompressor(source, self.compression) as stream:
+                while True:
+                    data = stream.read(self.chunk_size)
+                    if not self._put((data, source.offset, source.take_read())) or not data:
+                        return
+        except Exception as e:
+            self._put(e)
+    
+    def _put(self, item):
+        """
+        Queue ``item``, waiting while the queue is full; return False once the reader is closed.
+        """
+        while not self._stopped.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def _fill(self):
+        """
+        Append the next decompressed chunk to the pending data.
+        """
+        # Time spent here is time the parser waited for the decompression thread
+        with timed("decompress"):
+            item = self._chunks.get()
+        if isinstance(item, Exception):
+            raise item
+        data, self._offset, compressed = item
+        self._pending += data
+        self._compressed.extend(compressed)
+        self._eof = not data
+    
+    def _line_end(self, offset):
+        """
+        Return the offset just past the first newline at or after ``offset`` in the
+        pending data, decompressing more as needed; the end of the data at EOF.
+        """
+        search_from = offset
+        while True:
+            newline = self._pending.find(b'\n', search_from)
+            if newline != -1:
+                return newline + 1
+            if self._eof:
+                return len(self._pending)
+            search_from = max(offset, len(self._pending))
+            self._fill()
+    
+    def _record_end(self, offset):
+        """
+        Like ``_line_end``, but take in more lines while a quoted field is still open.
+        """
+        end = self._line_end(offset)
+        quotes = self._pending.count(b'"', 0, end)
+        while quotes % 2:
+            next_end = self._line_end(end)
+            if next_end == end:
+                break
+            quotes += self._pending.count(b'"', end, next_end)
+            end = next_end
+        return end
+    
+    def preview(self, count):
+        """
+        Return the first ``count`` data rows.
+        """
+        preview_end = 0
+        for _ in range(count):
+            preview_end = self._record_end(preview_end)
+        rows = csv.reader(io.StringIO(self._pending[:preview_end].decode('utf-8'), newline=''))
+        return list(islice(rows, count))
+    
+    def blocks(self, start=None, end=None, hasher=None):
+        """
+        Yield CSVBlocks for every data line of the file.
+        
+        ``start`` and ``end`` may only name the whole data section. When
+        ``hasher`` is given, it is fed the compressed file, so the checksum
+        matches that of the file on disk.
+        """
+        if start not in (None, self.data_start) or end not in (None, self.size):
+            raise ValueError(f"{self.compression}-compressed files can only be read from start to end")
+        generator = self._blocks(hasher)
+        self._active_blocks.append(generator)
+        return generator
+    
+    def _blocks(self, hasher):
+        while True:
+            block_end = self._record_end(self.chunk_size - 1)
+            if hasher is not None:
+                for chunk in self._compressed:
+                    hasher.update(chunk)
+            self._compressed.clear()
+            if block_end == 0:
+                return
+            
+            with timed("parse"):
+                raw = bytes(self._pending[:block_end])
+                del self._pending[:block_end]
+                rows, zero_copy = split_rows(raw.decode('utf-8'), b'"' in raw)
+            add_rows("parse", len(rows))
+            yield CSVBlock(rows, memoryview(raw) if zero_copy else None, self._offset)
+    
+    def close(self):
+        for generator in self._active_blocks:
+            generator.close()
+        self._active_blocks = []
+        self._stopped.set()
+        self._thread.join()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def open_csv_reader(path, reader="mmap", block_rows=STREAM_BLOCK_ROWS):
+    """
+    Open ``path`` with the named reader; ``block_rows`` sizes the stream reader's blocks.
+    
+    Compressed files are always read by CompressedCSVReader.
+    """
+    compression = compression_format(path)
+    if compression:
+        return CompressedCSVReader(path, compression)
+    if reader == "mmap":
+        return MappedCSVReader(path)
+    return StreamCSVReader(path, block_rows=block_rows)
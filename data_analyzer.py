@@ -1,4 +1,9 @@
-from db_config import get_db_connection
+from db_config import db_connection
+from query_cache import cached_query
+from instrumentation import timed, timed_function
+from options import DEFAULT_PAGE_SIZE
+from output_writers import RowWriter, RECORD_COLUMNS, RECORD_TYPES
+from report_queries import fetch_summary, fetch_top_students, fetch_combined_report, fetch_cgpa_distribution
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -6,106 +11,267 @@ from rich.panel import Panel
 # Create a console instance for rich output
 console = Console()
 
-def display_all_records():
+# Rows fetched and written per batch when exporting records headlessly
+EXPORT_BATCH_SIZE = 10000
+
+def build_records_query(limit=None, offset=0, after_id=None):
+    """
+    Build the SELECT used to list records, with optional paging.
+
+    ``after_id`` gives keyset pagination on the id_no primary key, which stays
+    fast on large tables; ``limit``/``offset`` give classic paging.
+    """
+    sql = "SELECT id_no, name, cgpa FROM student_records"
+    params = []
+    if after_id is not None:
+        sql += " WHERE id_no > %s"
+        params.append(after_id)
+    sql += " ORDER BY id_no"
+    if limit is not None or offset:
+        # MySQL only accepts OFFSET together with LIMIT; the largest signed
+        # 64-bit value stands for "no limit" on every backend
+        sql += " LIMIT %s OFFSET %s"
+        params.extend([limit if limit is not None else 9223372036854775807, offset])
+    return sql, params
+
+def records_table(title):
+    """
+    Create an empty Rich table for student records.
+    """
+    table = Table(title=title, border_style="cyan")
+    table.add_column("ID NO", style="magenta")
+    table.add_column("NAME", style="green")
+    table.add_column("CGPA", justify="right", style="cyan")
+    return table
+
+def display_all_records(stream=False, page_size=DEFAULT_PAGE_SIZE, limit=None, offset=0, after_id=None):
     """
     Display all records from the student_records table.
+
+    With ``stream=True`` rows are read through an unbuffered server-side
+    cursor and rendered ``page_size`` rows at a time, so memory use stays
+    bounded however large the table is. ``limit``, ``offset`` and ``after_id``
+    restrict the rows shown (see ``build_records_query``).
     """
     console.print("\n[bold cyan]Fetching all student records from database...[/bold cyan]")
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            # Select all records
-            sql = "SELECT * FROM student_records ORDER BY id_no"
-            console.print(f"Executing SQL query: [dim]{sql}[/dim]")
-            cursor.execute(sql)
-            results = cursor.fetchall()
-            console.print(f"Query completed. Retrieved [green]{len(results)}[/green] records")
+    sql, params = build_records_query(limit=limit, offset=offset, after_id=after_id)
+    
+    if stream:
+        display_records_streaming(sql, params, page_size)
+        return
+    
+    # Select all records
+    console.print(f"Executing SQL query: [dim]{sql}[/dim]")
+    results = fetch_all_records(limit=limit, offset=offset, after_id=after_id)
+    console.print(f"Query completed. Retrieved [green]{len(results)}[/green] records")
+    render_all_records(results)
+
+def fetch_all_records(limit=None, offset=0, after_id=None):
+    """
+    Return the records selected by ``build_records_query`` as a list of dicts.
+    """
+    sql, params = build_records_query(limit=limit, offset=offset, after_id=after_id)
+    with db_connection() as connection:
+        return cached_query(connection, sql, params, name="all_records")
+
+@timed_function("render")
+def render_all_records(results):
+    """
+    Print the records table.
+    """
+    if not results:
+        console.print("[yellow]No records found in the database.[/yellow]")
+        return
+    
+    # Create and populate a Rich table
+    table = records_table("ALL STUDENT RECORDS")
+    
+    # Add rows to the table
+    for row in results:
+        table.add_row(
+            row['id_no'],
+            row['name'],
+            f"{row['cgpa']:.2f}"
+        )
+    
+    # Display the table
+    console.print(table)
+    console.print(f"Total Records: [bold green]{len(results)}[/bold green]")
+
+def display_records_streaming(sql, params, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Stream query results through an SSDictCursor and render them page by page.
+    """
+    if page_size < 1:
+        console.print(f"[bold red]Error:[/bold red] page size must be at least 1, got {page_size}")
+        return
+    
+    from pymysql.cursors import SSDictCursor
+    with db_connection() as connection:
+        # SSDictCursor leaves the result set on the server and reads it on demand
+        with connection.cursor(SSDictCursor) as cursor:
+            console.print(f"Streaming SQL query: [dim]{sql}[/dim]")
+            cursor.execute(sql, params)
+            
+            total = 0
+            last_id = None
+            while True:
+                with timed("query"):
+                    rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                
+                with timed("render", rows=len(rows)):
+                    table = records_table(f"STUDENT RECORDS {total + 1}-{total + len(rows)}")
+                    for row in rows:
+                        table.add_row(
+                            row['id_no'],
+                            row['name'],
+                            f"{row['cgpa']:.2f}"
+                        )
+                    console.print(table)
+                
+                total += len(rows)
+                last_id = rows[-1]['id_no']
             
-            if not results:
+            if total == 0:
                 console.print("[yellow]No records found in the database.[/yellow]")
                 return
             
-            # Create and populate a Rich table
-            table = Table(title="ALL STUDENT RECORDS", border_style="cyan")
-            table.add_column("ID NO", style="magenta")
-            table.add_column("NAME", style="green")
-            table.add_column("CGPA", justify="right", style="cyan")
-            
-            # Add rows to the table
-            for row in results:
-                table.add_row(
-                    row['id_no'],
-                    row['name'],
-                    f"{row['cgpa']:.2f}"
-                )
-            
-            # Display the table
-            console.print(table)
-            console.print(f"Total Records: [bold green]{len(results)}[/bold green]")
+            console.print(f"Total Records: [bold green]{total}[/bold green]")
+            console.print(f"[dim]Continue after this page with --after-id {last_id}[/dim]")
+
+def export_records(output, output_format, limit=None, offset=0, after_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Write the selected records to ``output`` (a path, or ``"-"`` for stdout)
+    as CSV, JSON Lines or Parquet instead of rendering them.
+    
+    Rows are read through a server-side cursor and written in batches, so
+    memory use stays bounded. Returns the number of records written.
+    """
+    from pymysql.cursors import SSDictCursor
+    sql, params = build_records_query(limit=limit, offset=offset, after_id=after_id)
+    with db_connection() as connection, RowWriter(output, output_format, RECORD_COLUMNS, RECORD_TYPES) as writer:
+        with connection.cursor(SSDictCursor) as cursor:
+            cursor.execute(sql, params)
+            while True:
+                with timed("query"):
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                with timed("render", rows=len(rows)):
+                    writer.write_rows(rows)
     
-    finally:
-        console.print("[dim]Closing database connection[/dim]")
-        connection.close()
+    console.print(f"[green]✓[/green] Wrote {writer.row_count:,} records as {output_format} to "
+                  f"[cyan]{'stdout' if output == '-' else output}[/cyan]")
+    return writer.row_count
+
+def load_combined_report(engine="sql", top_n=3):
+    """
+    Compute the summary, category, grade distribution and top-N reports at once.
+
+    With the ``sql`` engine this is a single query and round trip (see
+    report_queries.fetch_combined_report); the ``stats`` engine reads the
+    pre-aggregated student_stats row instead (see student_stats.py). Pass the
+    result as ``report`` to the display functions to render it without
+    further queries.
+    """
+    console.print("\n[bold cyan]Computing combined report...[/bold cyan]")
+    with db_connection() as connection:
+        if engine == "memory":
+            from analytics_engine import load_analytics
+            return load_analytics(connection).combined_report(top_n)
+        if engine == "stats":
+            from student_stats import get_student_stats
+            return get_student_stats(connection).report(top_n)
+        return fetch_combined_report(connection, top_n)
 
-def display_summary_statistics():
+def display_summary_statistics(engine="sql", report=None):
     """
-    Display summary statistics (count, min, max, avg) for the student_records table.
+    Display summary statistics (count, min, max, avg, standard deviation and
+    percentiles) for the student_records table.
+
+    ``engine`` selects where the statistics are computed: ``"sql"`` runs the
+    aggregate queries on the server, ``"memory"`` computes them from the
+    in-memory analytics snapshot (see analytics_engine.py) and ``"stats"``
+    reads the pre-aggregated student_stats summary. When a combined ``report``
+    from load_combined_report is given, it is rendered directly.
     """
     console.print("\n[bold cyan]Calculating summary statistics...[/bold cyan]")
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cursor:
-            # Get statistics
-            sql = """
-            SELECT 
-                COUNT(*) as count,
-                MIN(cgpa) as min_cgpa,
-                MAX(cgpa) as max_cgpa,
-                AVG(cgpa) as avg_cgpa
-            FROM student_records
-            """
-            console.print("Executing statistics query...")
-            cursor.execute(sql)
-            stats = cursor.fetchone()
-            console.print("Statistics calculation completed")
-            
-            if not stats or stats['count'] == 0:
-                console.print("[yellow]No records available for statistics.[/yellow]")
-                return
-            
-            # Create panel for statistics
-            stats_panel = Panel(
-                f"""[bold]Total Students:[/bold] {stats['count']}
+    stats, top_students = fetch_summary_statistics(engine=engine, report=report)
+    console.print("Statistics calculation completed")
+    render_summary_statistics(stats, top_students)
+
+def fetch_summary_statistics(engine="sql", report=None):
+    """
+    Return the ``(stats, top_students)`` pair rendered by render_summary_statistics.
+    
+    ``top_students`` is only fetched when the table has records.
+    """
+    if report is None and engine == "stats":
+        report = load_combined_report(engine="stats")
+    if report is not None:
+        return report['summary'], report['top_students']
+    
+    with db_connection() as connection:
+        if engine == "memory":
+            from analytics_engine import load_analytics
+            analytics = load_analytics(connection)
+            return analytics.summary(), analytics.top_students(3)
+        
+        stats = fetch_summary(connection)
+        if not stats or stats['count'] == 0:
+            return stats, []
+        stats = {**stats, **fetch_cgpa_distribution(connection)}
+        # Find top 3 students
+        return stats, fetch_top_students(connection, 3)
+
+def format_distribution(stats):
+    """
+    Return the standard deviation and percentile lines of the summary panel, if the stats have them.
+    """
+    percentiles = stats.get('percentiles')
+    if not percentiles:
+        return ""
+    lines = [f"\n[bold]Std. Deviation:[/bold] {stats['stddev_cgpa']:.2f}"]
+    if 50 in percentiles:
+        lines.append(f"[bold]Median CGPA:[/bold] {percentiles[50]:.2f}")
+    lines.append("[bold]Percentiles:[/bold] " + ", ".join(f"P{percent} {value:.2f}"
+                                                          for percent, value in sorted(percentiles.items())))
+    return "\n".join(lines)
+
+@timed_function("render")
+def render_summary_statistics(stats, top_students):
+    """
+    Print the summary statistics panel and the top students table.
+    """
+    if not stats or stats['count'] == 0:
+        console.print("[yellow]No records available for statistics.[/yellow]")
+        return
+
+    # Create panel for statistics
+    stats_panel = Panel(
+        f"""[bold]Total Students:[/bold] {stats['count']}
 [bold]Minimum CGPA:[/bold] {stats['min_cgpa']:.2f}
 [bold]Maximum CGPA:[/bold] {stats['max_cgpa']:.2f}
-[bold]Average CGPA:[/bold] {stats['avg_cgpa']:.2f}""",
-                title="SUMMARY STATISTICS",
-                border_style="green"
-            )
-            console.print(stats_panel)
-            
-            # Find top 3 students
-            console.print("Finding top performing students...")
-            sql = "SELECT * FROM student_records ORDER BY cgpa DESC LIMIT 3"
-            cursor.execute(sql)
-            top_students = cursor.fetchall()
-            
-            if top_students:
-                # Create table for top students
-                top_table = Table(title="TOP 3 STUDENTS", border_style="magenta")
-                top_table.add_column("ID", style="dim")
-                top_table.add_column("NAME", style="cyan")
-                top_table.add_column("CGPA", justify="right", style="magenta bold")
-                
-                for student in top_students:
-                    top_table.add_row(
-                        student['id_no'],
-                        student['name'],
-                        f"{student['cgpa']:.2f}"
-                    )
-                
-                console.print(top_table)
+[bold]Average CGPA:[/bold] {stats['avg_cgpa']:.2f}{format_distribution(stats)}""",
+        title="SUMMARY STATISTICS",
+        border_style="green"
+    )
+    console.print(stats_panel)
     
-    finally:
-        console.print("[dim]Closing database connection[/dim]")
-        connection.close()
\ No newline at end of file
+    if top_students:
+        # Create table for top students
+        top_table = Table(title=f"TOP {len(top_students)} STUDENTS", border_style="magenta")
+        top_table.add_column("ID", style="dim")
+        top_table.add_column("NAME", style="cyan")
+        top_table.add_column("CGPA", justify="right", style="magenta bold")
+        
+        for student in top_students:
+            top_table.add_row(
+                student['id_no'],
+                student['name'],
+                f"{student['cgpa']:.2f}"
+            )
+        
+        console.print(top_table)
\ No newline at end of file
@@ -0,0 +1,620 @@
+"""
+Storage backends for the student database.
+
+DB_BACKEND in .env selects the engine: ``mysql`` (the default) connects to
+the server configured by DB_HOST, DB_PORT, DB_NAME, DB_USER and
+DB_PASSWORD; ``sqlite`` and ``duckdb`` open the embedded database file
+named by DB_PATH, so the import and analysis pipeline runs on a laptop or
+in CI without a server.
+
+A backend opens connections and supplies the statements whose syntax
+differs between engines: clearing a table, upserts, index management,
+bulk loading a staged CSV file, and recognising missing-table and
+transient errors. Everything else is plain SQL shared by all three.
+
+Embedded connections are wrapped in EmbeddedConnection, which gives them
+the PyMySQL interface the rest of the code is written against: ``%s``
+placeholders, dict rows unless a tuple cursor class (SSCursor) is asked
+for, explicit commit and rollback, ``ping`` and ``open``.
+"""
+
+import os
+import re
+import csv
+import sqlite3
+from itertools import islice
+from config import getenv
+
+# Available storage backends
+BACKENDS = ("mysql", "sqlite", "duckdb")
+
+# Embedded database files used when DB_PATH is not set
+DEFAULT_DB_PATHS = {"sqlite": "students.db", "duckdb": "students.duckdb"}
+
+# Seconds a SQLite connection waits for another writer's lock
+SQLITE_BUSY_TIMEOUT = 30
+
+# Rows per executemany() when the SQLite backend loads a staging file
+SQLITE_LOAD_BATCH_ROWS = 10000
+
+# MySQL errors worth retrying: lock wait timeout, deadlock, can't connect,
+# server has gone away and lost connection
+TRANSIENT_ERROR_CODES = {1205, 1213, 2003, 2006, 2013}
+
+# Column types of a staged CSV file, in file order
+STAGED_COLUMNS = ("id_no", "name", "cgpa")
+
+class MySQLBackend:
+    """
+    A MySQL server reached through PyMySQL.
+    """
+    
+    name = "mysql"
+    label = "MySQL server"
+    # Type of student_records.cgpa, and whether it holds single-precision values
+    cgpa_type = "FLOAT"
+    single_precision_float = True
+    # Several processes can write to the same database at once
+    concurrent_writers = True
+    # read_csv() can load a CSV file without Python parsing it
+    native_csv = False
+    # clear_table() runs inside the caller's transaction (TRUNCATE commits implicitly)
+    transactional_clear = False
+    # Column definition of the updated_at columns
+    timestamp_column = "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+    
+    # The staging file is written by csv.writer, so quotes are doubled rather than
+    # backslash-escaped and fields may be enclosed in double quotes.
+    LOAD_DATA_SQL = """
+LOAD DATA LOCAL INFILE %s
+INTO TABLE {table}
+CHARACTER SET utf8mb4
+FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+LINES TERMINATED BY '\\n'
+(id_no, name, cgpa)
+"""
+
+    @property
+    def database(self):
+        return getenv("DB_NAME")
+    
+    def connection_details(self):
+        """
+        Return the (label, value) pairs shown when the first connection is opened.
+        """
+        return [
+            ("Host", getenv("DB_HOST")),
+            ("Port", int(getenv("DB_PORT", 3306))),
+            ("Database", self.database),
+            ("User", getenv("DB_USER")),
+            # Hide password in output for security
+            ("Password", "•" * len(getenv("DB_PASSWORD", ""))),
+        ]
+    
+    def database_identity(self):
+        """
+        Return a string that tells this database apart from others of the same backend.
+        """
+        return f"{getenv('DB_HOST')}:{int(getenv('DB_PORT', 3306))}/{self.database}"
+    
+    def connect(self, local_infile=False):
+        import pymysql
+        return pymysql.connect(
+            host=getenv("DB_HOST"),
+            port=int(getenv("DB_PORT", 3306)),
+            user=getenv("DB_USER"),
+            password=getenv("DB_PASSWORD"),
+            database=self.database,
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor,
+            local_infile=local_infile
+        )
+    
+    def clear_table(self, cursor, table):
+        """
+        Remove every row of a table.
+        """
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    
+    def upsert_sql(self, table, columns, keys, increment=None):
+        """
+        Return an INSERT of ``columns`` that updates the row when ``keys`` already exist.
+        
+        Non-key columns take the new values, except ``increment``, which is
+        increased by one instead.
+        """
+        assignments = [f"{column} = {column} + 1" if column == increment else f"{column} = VALUES({column})"
+                       for column in columns if column not in keys]
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}")
+    
+    def insert_ignore_sql(self, table, columns):
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    
+    def drop_temporary_table_sql(self, table):
+        return f"DROP TEMPORARY TABLE IF EXISTS {table}"
+    
+    def table_exists(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM information_schema.tables "
+                           "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+            return cursor.fetchone()['count'] > 0
+    
+    def describe_table(self, connection, table):
+        """
+        Return the columns of a table as dicts with Field, Type, Null and Key.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"DESCRIBE {table}")
+            return cursor.fetchall()
+    
+    def secondary_indexes(self, connection, table):
+        """
+        Return the secondary indexes of a table as {name: (unique, "(col, ...)")}.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+            SELECT index_name, non_unique, column_name, sub_part
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name <> 'PRIMARY'
+            ORDER BY index_name, seq_in_index
+            """, (table,))
+            rows = cursor.fetchall()
+        
+        columns = {}
+        unique = {}
+        for row in rows:
+            column = row['column_name'] if row['sub_part'] is None else f"{row['column_name']}({row['sub_part']})"
+            columns.setdefault(row['index_name'], []).append(column)
+            unique[row['index_name']] = not row['non_unique']
+        return {name: (unique[name], f"({', '.join(cols)})") for name, cols in columns.items()}
+    
+    def alter_indexes(self, connection, table, add=None, drop=()):
+        """
+        Create the indexes in ``add`` ({name: (unique, columns)}) and drop those named in ``drop``.
+        
+        MySQL applies every change in a single ALTER TABLE.
+        """
+        clauses = [f"ADD {'UNIQUE ' if unique else ''}INDEX {name} {columns}"
+                   for name, (unique, columns) in (add or {}).items()]
+        clauses += [f"DROP INDEX {name}" for name in drop]
+        if clauses:
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {table} {', '.join(clauses)}")
+    
+    def load_staged_file(self, cursor, staging_path, table="student_records"):
+        """
+        Load a headerless id_no,name,cgpa CSV file with LOAD DATA LOCAL INFILE.
+        
+        Returns the number of rows MySQL reports as loaded.
+        """
+        cursor.execute(self.LOAD_DATA_SQL.format(table=table), (staging_path,))
+        return cursor.rowcount
+    
+    def is_missing_table_error(self, error):
+        import pymysql
+        return isinstance(error, pymysql.err.ProgrammingError) and bool(error.args) and error.args[0] == 1146
+    
+    def is_transient_error(self, error):
+        import pymysql
+        if isinstance(error, pymysql.err.InterfaceError):
+            # Raised when the connection was already closed underneath us
+            return True
+        return (isinstance(error, (pymysql.err.OperationalError, pymysql.err.InternalError))
+                and bool(error.args) and error.args[0] in TRANSIENT_ERROR_CODES)
+
+# %s placeholders, and %% escapes, as PyMySQL formats them
+_PYFORMAT = re.compile(r"%([s%])")
+
+def to_qmark(sql):
+    """
+    Rewrite a PyMySQL-style statement for the ``?`` placeholders of the embedded engines.
+    """
+    return _PYFORMAT.sub(lambda match: "?" if match.group(1) == "s" else "%", sql)
+
+# Statements that only read, and so never open a transaction
+_READ_STATEMENT = re.compile(r"\s*(SELECT|WITH|DESCRIBE|PRAGMA|EXPLAIN|SHOW)\b", re.IGNORECASE)
+
+class EmbeddedCursor:
+    """
+    A PyMySQL-style cursor over a SQLite or DuckDB connection.
+    """
+    
+    def __init__(self, connection, dict_rows=True):
+        self.connection = connection
+        self.dict_rows = dict_rows
+        self._cursor = connection.backend.raw_cursor(connection.raw)
+        self.rowcount = -1
+        self._columns = None
+    
+    def execute(self, sql, params=None):
+        self.connection.begin_for(sql)
+        if params is None:
+            self._cursor.execute(sql)
+        else:
+            self._cursor.execute(to_qmark(sql), tuple(params))
+        self._columns = [column[0] for column in self._cursor.description] if self._cursor.description else None
+        self.rowcount = self.connection.backend.rowcount(self._cursor, sql)
+        return self.rowcount
+    
+    def executemany(self, sql, seq_of_params):
+        self.connection.begin_for(sql)
+        self.connection.backend.executemany(self.connection.raw, self._cursor, to_qmark(sql), seq_of_params)
+        self._columns = None
+        self.rowcount = -1
+    
+    def _convert(self, rows):
+        if not self.dict_rows or self._columns is None:
+            return [tuple(row) for row in rows]
+        columns = self._columns
+        return [dict(zip(columns, row)) for row in rows]
+    
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._convert([row])[0]
+    
+    def fetchmany(self, size=None):
+        return self._convert(self._cursor.fetchmany(size or 1))
+    
+    def fetchall(self):
+        return self._convert(self._cursor.fetchall())
+    
+    def close(self):
+        self.connection.backend.close_cursor(self._cursor)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class EmbeddedConnection:
+    """
+    A SQLite or DuckDB connection with the PyMySQL methods the application uses.
+    
+    Like a PyMySQL connection with autocommit off, the first statement that
+    writes opens a transaction, which lasts until commit() or rollback().
+    Reads outside a transaction see the latest committed data.
+    """
+    
+    def __init__(self, backend, raw):
+        self.backend = backend
+        self.raw = raw
+        self.open = True
+        self.in_transaction = False
+    
+    def cursor(self, cursor_class=None):
+        # PyMySQL's dict cursors (DictCursor, SSDictCursor) define dict_type
+        return EmbeddedCursor(self, dict_rows=cursor_class is None or hasattr(cursor_class, "dict_type"))
+    
+    def begin_for(self, sql):
+        """
+        Open a transaction before ``sql`` if it writes and none is open.
+        """
+        if not self.in_transaction and not _READ_STATEMENT.match(sql):
+            self.backend.begin(self.raw)
+            self.in_transaction = True
+    
+    def commit(self):
+        if self.in_transaction:
+            self.in_transaction = False
+            self.raw.commit()
+    
+    def rollback(self):
+        if self.in_transaction:
+            self.in_transaction = False
+            self.raw.rollback()
+    
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise self.backend.closed_error()
+    
+    def close(self):
+        if self.open:
+            self.open = False
+            self.raw.close()
+
+class EmbeddedBackend:
+    """
+    Shared dialect of the embedded SQLite and DuckDB backends.
+    """
+    
+    concurrent_writers = False
+    native_csv = False
+    transactional_clear = True
+    # Neither engine has ON UPDATE; updated_at keeps the time the row was created
+    timestamp_column = "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP"
+    
+    @property
+    def database(self):
+        return getenv("DB_PATH", DEFAULT_DB_PATHS[self.name])
+    
+    def connection_details(self):
+        return [("File", os.path.abspath(self.database))]
+    
+    def database_identity(self):
+        return os.path.abspath(self.database)
+    
+    def raw_cursor(self, raw):
+        return raw.cursor()
+    
+    def close_cursor(self, raw_cursor):
+        raw_cursor.close()
+    
+    def rowcount(self, raw_cursor, sql):
+        return raw_cursor.rowcount
+    
+    def executemany(self, raw, raw_cursor, sql, seq_of_params):
+        raw_cursor.executemany(sql, seq_of_params)
+    
+    def clear_table(self, cursor, table):
+        cursor.execute(f"DELETE FROM {table}")
+    
+    def upsert_sql(self, table, columns, keys, increment=None):
+        assignments = [f"{column} = {column} + 1" if column == increment else f"{column} = excluded.{column}"
+                       for column in columns if column not in keys]
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {', '.join(assignments)}")
+    
+    def insert_ignore_sql(self, table, columns):
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    
+    def drop_temporary_table_sql(self, table):
+        return f"DROP TABLE IF EXISTS {table}"
+    
+    def alter_indexes(self, connection, table, add=None, drop=()):
+        # Index names are per schema, not per table, in both engines
+        with connection.cursor() as cursor:
+            for name in drop:
+                cursor.execute(f"DROP INDEX {name}")
+            for name, (unique, columns) in (add or {}).items():
+                cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} {columns}")
+
+class SQLiteBackend(EmbeddedBackend):
+    """
+    An SQLite database file, through the standard library's sqlite3 module.
+    """
+    
+    name = "sqlite"
+    label = "SQLite database"
+    # FLOAT columns have REAL affinity: values stay double precision
+    cgpa_type = "FLOAT"
+    single_precision_float = False
+    
+    def connect(self, local_infile=False):
+        # Transactions are opened by EmbeddedConnection, not by sqlite3
+        raw = sqlite3.connect(self.database, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None,
+                              check_same_thread=False)
+        # Readers do not block the writer, or each other, in WAL mode
+        raw.execute("PRAGMA journal_mode=WAL")
+        return EmbeddedConnection(self, raw)
+    
+    def begin(self, raw):
+        raw.execute("BEGIN")
+    
+    def closed_error(self):
+        return sqlite3.ProgrammingError("Cannot operate on a closed database.")
+    
+    def table_exists(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+            return cursor.fetchone()['count'] > 0
+    
+    def describe_table(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA table_info({table})")
+            return [{'Field': row['name'], 'Type': row['type'], 'Null': "NO" if row['notnull'] else "YES",
+                     'Key': "PRI" if row['pk'] else ""} for row in cursor.fetchall()]
+    
+    def secondary_indexes(self, connection, table):
+        indexes = {}
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA index_list({table})")
+            # Indexes SQLite creates for PRIMARY KEY and UNIQUE constraints have another origin
+            created = [(row['name'], bool(row['unique'])) for row in cursor.fetchall() if row['origin'] == 'c']
+            for name, unique in sorted(created):
+                cursor.execute(f"PRAGMA index_info({name})")
+                columns = [row['name'] for row in sorted(cursor.fetchall(), key=lambda row: row['seqno'])]
+                indexes[name] = (unique, f"({', '.join(columns)})")
+        return indexes
+    
+    def load_staged_file(self, cursor, staging_path, table="student_records"):
+        """
+        Load a headerless id_no,name,cgpa CSV file with batched executemany() calls.
+        """
+        sql = f"INSERT INTO {table} ({', '.join(STAGED_COLUMNS)}) VALUES (%s, %s, %s)"
+        loaded = 0
+        with open(staging_path, newline='', encoding='utf-8') as staging_file:
+            rows = csv.reader(staging_file)
+            while True:
+                batch = list(islice(rows, SQLITE_LOAD_BATCH_ROWS))
+                if not batch:
+                    return loaded
+                cursor.executemany(sql, batch)
+                loaded += len(batch)
+    
+    def is_missing_table_error(self, error):
+        return isinstance(error, sqlite3.OperationalError) and str(error).startswith("no such table")
+    
+    def is_transient_error(self, error):
+        # Another connection held the write lock for longer than the busy timeout
+        return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+# A multi-row INSERT ... VALUES without an ON CONFLICT clause
+_PLAIN_INSERT = re.compile(r"\s*(INSERT\s+INTO\s+\w+\s*\(([^)]*)\))\s*VALUES\s*\([?,\s]*\)\s*$", re.IGNORECASE)
+
+class DuckDBBackend(EmbeddedBackend):
+    """
+    A DuckDB database file; the duckdb package is imported on first use.
+    """
+    
+    name = "duckdb"
+    label = "DuckDB database"
+    # DuckDB's FLOAT is single precision, but unlike MySQL it compares a FLOAT
+    # column with a literal such as 3.8 in single precision too, which would
+    # move the grading thresholds; DOUBLE keeps them exact, as on SQLite
+    cgpa_type = "DOUBLE"
+    single_precision_float = False
+    native_csv = True
+    
+    def connect(self, local_infile=False):
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("DB_BACKEND=duckdb needs the duckdb package (pip install duckdb)") from None
+        # Connections to the same file in one process share a database instance
+        return EmbeddedConnection(self, duckdb.connect(self.database))
+    
+    def begin(self, raw):
+        raw.begin()
+    
+    def closed_error(self):
+        import duckdb
+        return duckdb.ConnectionException("Connection already closed!")
+    
+    def raw_cursor(self, raw):
+        # A DuckDB cursor is a separate connection with its own transaction,
+        # so statements run on the connection itself
+        return raw
+    
+    def close_cursor(self, raw_cursor):
+        pass
+    
+    def rowcount(self, raw_cursor, sql):
+        # DML returns the number of affected rows as its result
+        if re.match(r"\s*(INSERT|UPDATE|DELETE)\b", sql, re.IGNORECASE) and raw_cursor.description:
+            return raw_cursor.fetchone()[0]
+        return -1
+    
+    def executemany(self, raw, raw_cursor, sql, seq_of_params):
+        """
+        Run a plain multi-row INSERT as one INSERT ... SELECT over an Arrow table.
+        
+        DuckDB executes executemany() one row at a time, which is far slower
+        than a single set-based insert. Other statements, and inserts when
+        pyarrow is missing, fall back to executemany().
+        """
+        match = _PLAIN_INSERT.match(sql)
+        rows = list(seq_of_params)
+        if match is None or not rows:
+            raw.executemany(sql, rows)
+            return
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raw.executemany(sql, rows)
+            return
+        
+        columns = [column.strip() for column in match.group(2).split(",")]
+        batch = pa.Table.from_arrays([pa.array(values) for values in zip(*rows)], names=columns)
+        raw.register("executemany_rows", batch)
+        try:
+            raw.execute(f"{match.group(1)} SELECT * FROM executemany_rows")
+        finally:
+            raw.unregister("executemany_rows")
+    
+    def clear_table(self, cursor, table):
+        """
+        Empty a table by dropping and recreating it with its indexes.
+        
+        A DELETE of every row updates the primary key index row by row and
+        is slower than reloading the table several times over. The DDL runs
+        in the caller's transaction, so a rollback restores the old rows.
+        """
+        cursor.execute("SELECT sql FROM duckdb_tables() WHERE table_name = %s", (table,))
+        table_definition = cursor.fetchone()['sql']
+        cursor.execute("SELECT sql FROM duckdb_indexes() WHERE table_name = %s", (table,))
+        index_definitions = [row['sql'] for row in cursor.fetchall()]
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(table_definition)
+        for index_definition in index_definitions:
+            cursor.execute(index_definition)
+    
+    def table_exists(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM information_schema.tables "
+                           "WHERE table_schema = current_schema() AND table_name = %s", (table,))
+            return cursor.fetchone()['count'] > 0
+    
+    def describe_table(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DESCRIBE {table}")
+            return [{'Field': row['column_name'], 'Type': row['column_type'], 'Null': row['null'],
+                     'Key': row['key'] or ""} for row in cursor.fetchall()]
+    
+    def secondary_indexes(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT index_name, is_unique, expressions FROM duckdb_indexes() "
+                           "WHERE table_name = %s ORDER BY index_name", (table,))
+            # expressions reads like "[cgpa, id_no]"
+            return {row['index_name']: (row['is_unique'], f"({row['expressions'].strip('[]')})")
+                    for row in cursor.fetchall()}
+    
+    def read_csv_sql(self, header=True, rejects_table=None, compression=None):
+        """
+        Return a read_csv() call that reads a CSV file, given as the parameter, as VARCHAR id_no, name and cgpa.
+        
+        With ``rejects_table``, malformed lines are skipped and recorded in
+        that table (and its scans in ``<rejects_table>_scans``) instead of
+        failing the read. ``compression`` ("gzip" or "zstd") is passed on
+        rather than guessed from the file extension.
+        """
+        columns = ", ".join(f"'{column}': 'VARCHAR'" for column in STAGED_COLUMNS)
+        options = f"compression = '{compression}', " if compression else ""
+        if rejects_table:
+            options += f"store_rejects = true, rejects_table = '{rejects_table}', rejects_scan = '{rejects_table}_scans', "
+        return (f"read_csv(%s, header = {'true' if header else 'false'}, auto_detect = false, delim = ',', "
+                f"quote = '\"', escape = '\"', {options}columns = {{{columns}}})")
+    
+    def load_staged_file(self, cursor, staging_path, table="student_records"):
+        """
+        Load a headerless id_no,name,cgpa CSV file with DuckDB's CSV reader.
+        """
+        cursor.execute(f"INSERT INTO {table} ({', '.join(STAGED_COLUMNS)}) "
+                       f"SELECT * FROM {self.read_csv_sql(header=False)}", (staging_path,))
+        return cursor.rowcount
+    
+    def stage_csv(self, connection, path, table, compression=None):
+        """
+        Read a CSV file into a temporary table of VARCHAR columns with DuckDB's native reader.
+        
+        Lines that do not have exactly three fields are left out of the
+        table; their text is returned in file order.
+        """
+        errors = f"{table}_errors"
+        with connection.cursor() as cursor:
+            for name in (table, errors, f"{errors}_scans"):
+                cursor.execute(f"DROP TABLE IF EXISTS {name}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {table} AS SELECT * FROM {self.read_csv_sql(rejects_table=errors, compression=compression)}",
+                           (path,))
+            # A line can be reported once per error it contains
+            cursor.execute(f"SELECT csv_line FROM {errors} GROUP BY line, csv_line ORDER BY line")
+            malformed = [row['csv_line'] for row in cursor.fetchall()]
+            cursor.execute(f"DROP TABLE {errors}")
+            cursor.execute(f"DROP TABLE {errors}_scans")
+        return malformed
+    
+    def is_missing_table_error(self, error):
+        import duckdb
+        return isinstance(error, duckdb.CatalogException)
+    
+    def is_transient_error(self, error):
+        # Raised when a concurrent transaction wrote the same rows first
+        import duckdb
+        return isinstance(error, duckdb.TransactionException)
+
+_BACKEND_CLASSES = {"mysql": MySQLBackend, "sqlite": SQLiteBackend, "duckdb": DuckDBBackend}
+
+_backend = None
+
+def get_backend():
+    """
+    Return the storage backend selected by DB_BACKEND, creating it on first use.
+    """
+    global _backend
+    name = getenv("DB_BACKEND", "mysql").lower()
+    if _backend is None or _backend.name != name:
+        if name not in _BACKEND_CLASSES:
+            raise ValueError(f"Unknown DB_BACKEND '{name}' (expected one of: {', '.join(BACKENDS)})")
+        _backend = _BACKEND_CLASSES[name]()
+    return _backend
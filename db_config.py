@@ -1,45 +1,70 @@
-import os
-import pymysql
-from dotenv import load_dotenv
+import time
+import atexit
+import threading
+from collections import deque
+from contextlib import contextmanager
 from rich.console import Console
 from rich.panel import Panel
+from instrumentation import timed
+from db_backends import get_backend
+from config import getenv
 
 # Create a console instance for rich output
 console = Console()
 
-# Load environment variables from .env file
-load_dotenv()
+# Connection pool defaults, overridable through .env
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_MAX_IDLE = 300  # seconds a connection may sit idle before it is recycled
+DEFAULT_POOL_TIMEOUT = 30  # seconds to wait for a free connection
 
-def get_db_connection():
+# Retries of transient errors during imports, overridable through .env
+DEFAULT_RETRY_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 0.5  # seconds before the first retry, doubled after each
+
+# The connection banner is printed once per process
+_banner_lock = threading.Lock()
+_banner_logged = False
+
+def _log_connection_banner(backend):
     """
-    Create and return a database connection using credentials from .env file.
+    Print the connection details the first time a connection is opened.
     """
-    db_host = os.getenv("DB_HOST")
-    db_port = int(os.getenv("DB_PORT", 3306))
-    db_name = os.getenv("DB_NAME")
-    db_user = os.getenv("DB_USER")
+    global _banner_logged
+    with _banner_lock:
+        if _banner_logged:
+            return False
+        _banner_logged = True
     
-    # Hide password in output for security
-    masked_password = "•" * len(os.getenv("DB_PASSWORD", ""))
+    console.print(f"[bold cyan]Attempting to connect to {backend.label}...[/bold cyan]")
+    for label, value in backend.connection_details():
+        console.print(f"[cyan]{label}:[/cyan] {value}")
+    return True
+
+def suppress_connection_banner():
+    """
+    Never print the connection banner in this process, e.g. in import worker processes.
+    """
+    global _banner_logged
+    with _banner_lock:
+        _banner_logged = True
+
+def get_db_connection(local_infile=False):
+    """
+    Create and return a database connection using the settings in the .env file.
     
-    console.print(f"[bold cyan]Attempting to connect to MySQL server...[/bold cyan]")
-    console.print(f"[cyan]Host:[/cyan] {db_host}")
-    console.print(f"[cyan]Port:[/cyan] {db_port}")
-    console.print(f"[cyan]Database:[/cyan] {db_name}")
-    console.print(f"[cyan]User:[/cyan] {db_user}")
-    console.print(f"[cyan]Password:[/cyan] {masked_password}")
+    DB_BACKEND selects MySQL (the default), SQLite or DuckDB (see
+    db_backends.py). Pass ``local_infile=True`` to allow ``LOAD DATA LOCAL
+    INFILE`` on a MySQL connection; it is disabled by default. Most callers
+    should borrow a pooled connection through ``db_connection()`` instead.
+    """
+    backend = get_backend()
+    first_connection = _log_connection_banner(backend)
     
     try:
-        connection = pymysql.connect(
-            host=db_host,
-            port=db_port,
-            user=db_user,
-            password=os.getenv("DB_PASSWORD"),
-            database=db_name,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        console.print(f"[bold green]✓ Successfully connected to database '{db_name}'[/bold green]")
+        with timed("connect"):
+            connection = backend.connect(local_infile=local_infile)
+        if first_connection:
+            console.print(f"[bold green]✓ Successfully connected to database '{backend.database}'[/bold green]")
         return connection
     except Exception as e:
         console.print(Panel(
@@ -49,42 +74,482 @@ def get_db_connection():
         ))
         raise
 
-def create_students_table(connection):
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of database connections.
+    
+    Connections are validated with a ping when they are checked out and are
+    closed instead of reused once they have been idle for longer than
+    ``max_idle`` seconds. At most ``max_size`` connections are open at once;
+    a checkout waits up to ``timeout`` seconds for one to be returned.
+    """
+    
+    def __init__(self, max_size=DEFAULT_POOL_SIZE, max_idle=DEFAULT_POOL_MAX_IDLE,
+                 timeout=DEFAULT_POOL_TIMEOUT, local_infile=False):
+        if max_size < 1:
+            raise ValueError(f"Connection pool size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.local_infile = local_infile
+        self._idle = deque()  # (connection, returned_at) pairs, most recent last
+        self._size = 0  # open connections, idle or checked out
+        self._closed = False
+        self._condition = threading.Condition()
+    
+    def _discard(self, connection):
+        """
+        Close a connection and release its slot in the pool.
+        """
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+    
+    def _is_usable(self, connection, returned_at):
+        """
+        Check that an idle connection is fresh enough and still alive.
+        """
+        if time.monotonic() - returned_at > self.max_idle:
+            return False
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+    
+    def acquire(self):
+        """
+        Check out a validated connection, opening a new one if there is room.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    if self._idle:
+                        connection, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        connection = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No database connection became available within {self.timeout} seconds")
+                    self._condition.wait(remaining)
+            
+            if connection is None:
+                try:
+                    return get_db_connection(local_infile=self.local_infile)
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            
+            if self._is_usable(connection, returned_at):
+                return connection
+            
+            # Stale or broken: drop it and try again
+            self._discard(connection)
+    
+    def release(self, connection):
+        """
+        Return a connection to the pool.
+        
+        Whatever the borrower left uncommitted is rolled back first, so the
+        next borrower starts outside a transaction: no stale REPEATABLE READ
+        snapshot on MySQL, no write lock held on SQLite. A connection that
+        cannot roll back is closed instead of pooled.
+        """
+        try:
+            if connection.open:
+                connection.rollback()
+        except Exception:
+            self._discard(connection)
+            return
+        with self._condition:
+            if not self._closed and connection.open:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+                return
+        self._discard(connection)
+    
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a ``with`` block.
+        
+        Uncommitted work is rolled back when the connection is returned,
+        whether or not the block raised.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            # release() swallows a failed rollback, so the caller's exception propagates
+            self.release(connection)
+    
+    def close(self):
+        """
+        Close every idle connection and refuse further checkouts.
+        """
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._discard(connection)
+
+# One pool per local_infile setting, created on first use
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_connection_pool(local_infile=False):
+    """
+    Return the process-wide connection pool, creating it from .env settings.
+    """
+    with _pools_lock:
+        pool = _pools.get(local_infile)
+        if pool is None:
+            pool = ConnectionPool(
+                max_size=int(getenv("DB_POOL_SIZE", DEFAULT_POOL_SIZE)),
+                max_idle=float(getenv("DB_POOL_MAX_IDLE", DEFAULT_POOL_MAX_IDLE)),
+                timeout=float(getenv("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+                local_infile=local_infile
+            )
+            _pools[local_infile] = pool
+        return pool
+
+@contextmanager
+def db_connection(local_infile=False):
+    """
+    Borrow a pooled database connection.
+    
+    Usage:
+        with db_connection() as connection:
+            ...
+    """
+    with get_connection_pool(local_infile).connection() as connection:
+        yield connection
+
+@atexit.register
+def close_connection_pools():
+    """
+    Close all pooled connections.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+# Column lengths of student_records, checked by the importer before rows are sent
+ID_NO_MAX_LENGTH = 20
+NAME_MAX_LENGTH = 100
+
+# Secondary indexes on student_records. Ranking and range queries on cgpa use
+# idx_cgpa; the covering index additionally holds name, so those queries can
+# be answered from the index alone. InnoDB appends the primary key (id_no) to
+# every secondary index, so idx_cgpa already covers (cgpa, id_no).
+CGPA_INDEX = ("idx_cgpa", "(cgpa)")
+COVERING_CGPA_INDEX = ("idx_cgpa_covering", "(cgpa, id_no, name)")
+
+def create_students_table(connection, covering_index=False):
     """
     Create the student_records table if it doesn't exist.
+
+    The table is also given its secondary CGPA index (see ensure_indexes).
     """
     console.print("[bold cyan]Checking if table exists or needs to be created...[/bold cyan]")
     
-    table_definition = """
+    backend = get_backend()
+    table_definition = f"""
 CREATE TABLE IF NOT EXISTS student_records (
-    id_no VARCHAR(20) PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    cgpa FLOAT NOT NULL
+    id_no VARCHAR({ID_NO_MAX_LENGTH}) PRIMARY KEY,
+    name VARCHAR({NAME_MAX_LENGTH}) NOT NULL,
+    cgpa {backend.cgpa_type} NOT NULL
 )"""
     
     with connection.cursor() as cursor:
         # Create table
         cursor.execute(table_definition)
-        
-        # Check if table was just created or already existed
-        cursor.execute("SELECT COUNT(*) as count FROM information_schema.tables WHERE table_schema = %s AND table_name = %s", 
-                      (os.getenv("DB_NAME"), "student_records"))
-        result = cursor.fetchone()
-        
-        if result['count'] == 0:
-            console.print("[bold yellow]Table 'student_records' created[/bold yellow]")
-        else:
-            console.print("[green]Table 'student_records' already exists[/green]")
+    
+    # Check if table was just created or already existed
+    if not backend.table_exists(connection, "student_records"):
+        console.print("[bold yellow]Table 'student_records' created[/bold yellow]")
+    else:
+        console.print("[green]Table 'student_records' already exists[/green]")
     
     connection.commit()
     
+    ensure_indexes(connection, covering=covering_index)
+    create_student_stats_table(connection)
+    create_data_version_table(connection)
+    
     # Show table structure
+    console.print("[cyan]Table structure:[/cyan]")
+    for column in backend.describe_table(connection, "student_records"):
+        console.print(f"  [green]{column['Field']}[/green]: {column['Type']} {column['Null']} {column['Key']}")
+    
+    console.print("[bold green]✓ Table 'student_records' is ready for use[/bold green]")
+
+def get_secondary_indexes(connection, table="student_records"):
+    """
+    Return the secondary indexes of a table as {name: (unique, "(col, ...)")}.
+    """
+    return get_backend().secondary_indexes(connection, table)
+
+def ensure_indexes(connection, table="student_records", covering=False):
+    """
+    Make sure the CGPA index exists on a table.
+
+    With ``covering=True`` the covering (cgpa, id_no, name) index replaces the
+    plain cgpa index, otherwise the plain index replaces the covering one.
+    Returns the names of the indexes created.
+    """
+    wanted, unwanted = (COVERING_CGPA_INDEX, CGPA_INDEX) if covering else (CGPA_INDEX, COVERING_CGPA_INDEX)
+    existing = get_secondary_indexes(connection, table)
+    
+    add = {wanted[0]: (False, wanted[1])} if wanted[0] not in existing else {}
+    drop = [unwanted[0]] if unwanted[0] in existing else []
+    if add or drop:
+        get_backend().alter_indexes(connection, table, add=add, drop=drop)
+        changes = [f"ADD INDEX {name} {columns}" for name, (_, columns) in add.items()]
+        changes += [f"DROP INDEX {name}" for name in drop]
+        console.print(f"[cyan]Index changes on {table}:[/cyan] {', '.join(changes)}")
+    
+    return [wanted[0]] if wanted[0] not in existing else []
+
+def drop_secondary_indexes(connection, table="student_records"):
+    """
+    Drop every secondary index of a table ahead of a bulk load.
+
+    Loading into an unindexed table and building each index once afterwards
+    is much cheaper than maintaining the indexes row by row. Returns the
+    dropped definitions for restore_indexes.
+    """
+    indexes = get_secondary_indexes(connection, table)
+    if indexes:
+        get_backend().alter_indexes(connection, table, drop=list(indexes))
+    return indexes
+
+def restore_indexes(connection, indexes, table="student_records"):
+    """
+    Rebuild indexes returned by drop_secondary_indexes (on MySQL, in a single ALTER TABLE).
+    """
+    if indexes:
+        get_backend().alter_indexes(connection, table, add=indexes)
+
+# Table that parallel imports fill before it is swapped in for student_records
+STAGING_TABLE = "student_records_staging"
+
+def create_staging_table(connection, staging_table=STAGING_TABLE):
+    """
+    Create an empty copy of student_records to import into.
+    
+    Any staging table left behind by an earlier failed import is dropped first.
+    Returns the staging table name.
+    """
     with connection.cursor() as cursor:
-        cursor.execute("DESCRIBE student_records")
-        results = cursor.fetchall()
-        
-        console.print("[cyan]Table structure:[/cyan]")
-        for column in results:
-            console.print(f"  [green]{column['Field']}[/green]: {column['Type']} {column['Null']} {column['Key']}")
+        cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+        cursor.execute(f"CREATE TABLE {staging_table} LIKE student_records")
+    connection.commit()
+    return staging_table
+
+def drop_staging_table(connection, staging_table=STAGING_TABLE):
+    """
+    Drop the staging table if it exists.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+    connection.commit()
+
+def swap_staging_table(connection, staging_table=STAGING_TABLE):
+    """
+    Atomically replace student_records with the staging table.
+    
+    RENAME TABLE swaps both names in one atomic operation, so readers see
+    either the old or the new data and never an empty table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS student_records_old")
+        cursor.execute(f"RENAME TABLE student_records TO student_records_old, {staging_table} TO student_records")
+        cursor.execute("DROP TABLE student_records_old")
+    connection.commit()
+
+def create_import_state_table(connection):
+    """
+    Create the import_state table used to detect unchanged input files.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+CREATE TABLE IF NOT EXISTS import_state (
+    source_path VARCHAR(512) PRIMARY KEY,
+    file_size BIGINT NOT NULL,
+    file_mtime_ns BIGINT NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    imported_at {get_backend().timestamp_column}
+)""")
+    connection.commit()
+
+def create_student_stats_table(connection):
+    """
+    Create the single-row student_stats summary table (see student_stats.py).
+    
+    The summary can always be recomputed from student_records, so a table
+    left by a version without the distribution columns is dropped and
+    recreated.
+    """
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        if backend.table_exists(connection, "student_stats"):
+            columns = {column['Field'] for column in backend.describe_table(connection, "student_stats")}
+            if "histogram" not in columns:
+                cursor.execute("DROP TABLE student_stats")
+        cursor.execute(f"""
+CREATE TABLE IF NOT EXISTS student_stats (
+    id TINYINT PRIMARY KEY,
+    row_count BIGINT NOT NULL,
+    cgpa_sum DOUBLE NOT NULL,
+    cgpa_min FLOAT NULL,
+    cgpa_max FLOAT NULL,
+    grade_counts JSON NOT NULL,
+    category_counts JSON NOT NULL,
+    buckets JSON NOT NULL,
+    top_students JSON NOT NULL,
+    cgpa_mean DOUBLE NOT NULL,
+    cgpa_m2 DOUBLE NOT NULL,
+    histogram JSON NOT NULL,
+    is_stale BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at {backend.timestamp_column}
+)""")
+    connection.commit()
+
+def create_data_version_table(connection):
+    """
+    Create the single-row data_version table read by the query cache.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+CREATE TABLE IF NOT EXISTS data_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    updated_at {get_backend().timestamp_column}
+)""")
+    connection.commit()
+
+def bump_data_version(connection):
+    """
+    Advance the data version token, invalidating every cached query result.
+    
+    Call it in every transaction that changes student_records, just before
+    the commit, so the new token becomes visible together with the new data.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(get_backend().upsert_sql("data_version", ("id", "version"), ("id",), increment="version"),
+                       (1, 1))
+
+def get_data_version(connection):
+    """
+    Return the current data version token (0 before the first import).
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT version FROM data_version WHERE id = 1")
+            row = cursor.fetchone()
+    except Exception as e:
+        if get_backend().is_missing_table_error(e):
+            return 0
+        raise
+    return row['version'] if row else 0
+
+def is_transient_error(error):
+    """
+    Tell whether a database error is likely to succeed if the work is retried.
+    """
+    return get_backend().is_transient_error(error)
+
+def run_with_retries(connection, operation, on_retry=None):
+    """
+    Run ``operation()`` on ``connection``, retrying it after transient errors.
+    
+    Before each retry the transaction is rolled back, the call sleeps with
+    exponential backoff (DB_RETRY_DELAY seconds, doubling) and the connection
+    is reconnected if it was lost, so ``operation`` must redo all the work of
+    the current transaction. Gives up after DB_RETRY_ATTEMPTS attempts, or at
+    once on a non-transient error. ``on_retry(error, attempt, delay)`` is
+    called before each wait.
+    """
+    attempts = int(getenv("DB_RETRY_ATTEMPTS", DEFAULT_RETRY_ATTEMPTS))
+    delay = float(getenv("DB_RETRY_DELAY", DEFAULT_RETRY_DELAY))
+    for attempt in range(1, attempts + 1):
+        try:
+            if attempt > 1:
+                connection.ping(reconnect=True)
+            return operation()
+        except Exception as e:
+            if attempt == attempts or not is_transient_error(e):
+                raise
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            if on_retry is not None:
+                on_retry(e, attempt, delay)
+            time.sleep(delay)
+            delay *= 2
+
+def create_import_checkpoint_table(connection):
+    """
+    Create the import_checkpoint table that lets an interrupted import resume.
     
-    console.print("[bold green]✓ Table 'student_records' is ready for use[/bold green]")
\ No newline at end of file
+    Each row records how far the import of one file has committed: the byte
+    offset and number of CSV rows read, with the imported and rejected counts.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+CREATE TABLE IF NOT EXISTS import_checkpoint (
+    source_path VARCHAR(512) PRIMARY KEY,
+    file_size BIGINT NOT NULL,
+    file_mtime_ns BIGINT NOT NULL,
+    byte_offset BIGINT NOT NULL,
+    rows_read BIGINT NOT NULL,
+    record_count BIGINT NOT NULL,
+    rejected_count BIGINT NOT NULL,
+    updated_at {get_backend().timestamp_column}
+)""")
+    connection.commit()
+
+def save_import_checkpoint(connection, source_path, file_size, file_mtime_ns, byte_offset, rows_read,
+                           record_count, rejected_count):
+    """
+    Record an import's progress; call it inside the transaction it describes.
+    """
+    sql = get_backend().upsert_sql("import_checkpoint", ("source_path", "file_size", "file_mtime_ns", "byte_offset",
+                                                         "rows_read", "record_count", "rejected_count"),
+                                   ("source_path",))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (source_path, file_size, file_mtime_ns, byte_offset, rows_read, record_count,
+                             rejected_count))
+
+def load_import_checkpoint(connection, source_path):
+    """
+    Return the checkpoint row of ``source_path``, or None if there is none.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT * FROM import_checkpoint WHERE source_path = %s", (source_path,))
+        return cursor.fetchone()
+
+def clear_import_checkpoint(connection, source_path):
+    """
+    Delete the checkpoint of ``source_path``, without committing.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM import_checkpoint WHERE source_path = %s", (source_path,))
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+CGPA grading scales shared by the SQL queries and the in-memory analytics engine.
+
+Each scale is a list of (label, minimum CGPA) pairs ordered from the highest
+band to the lowest; the last band has no minimum and catches everything else.
+"""
+
+# Valid CGPA range; the importer rejects values outside it
+CGPA_MIN = 0.0
+CGPA_MAX = 4.0
+
+# Performance categories used by the category report
+PERFORMANCE_CATEGORIES = [
+    ("Excellent", 3.8),
+    ("Very Good", 3.5),
+    ("Good", 3.3),
+    ("Satisfactory", 3.0),
+    ("Needs Improvement", None),
+]
+
+# Letter grade scale used by the letter grade report
+LETTER_GRADES = [
+    ("A+", 3.9),
+    ("A", 3.7),
+    ("A-", 3.5),
+    ("B+", 3.3),
+    ("B", 3.0),
+    ("B-", 2.7),
+    ("C+", 2.3),
+    ("C", 2.0),
+    ("F", None),
+]
+
+def case_expression(scale, column="cgpa"):
+    """
+    Build a SQL CASE expression that maps ``column`` to the labels of ``scale``.
+    """
+    lines = ["CASE"]
+    for label, minimum in scale:
+        if minimum is None:
+            lines.append(f"    ELSE '{label}'")
+        else:
+            lines.append(f"    WHEN {column} >= {minimum} THEN '{label}'")
+    lines.append("END")
+    return "\n".join(lines)
+
+def classify(cgpa, scale):
+    """
+    Return the label of the band of ``scale`` that ``cgpa`` falls into.
+    """
+    for label, minimum in scale:
+        if minimum is None or cgpa >= minimum:
+            return label
+
+def thresholds(scale):
+    """
+    Return the minimum CGPA of each band except the catch-all, highest first.
+    """
+    return [minimum for _, minimum in scale if minimum is not None]
@@ -0,0 +1,417 @@
+"""
+Watch-Directory Ingestion Daemon
+
+Watches a directory for student CSV files and applies each new one to
+student_records with an incremental import (see
+csv_importer.import_csv_incremental), so drops are loaded as they land
+instead of by re-running main.py on a fixed file.
+
+- Debouncing: a file is picked up only after its size and modification time
+  have stayed the same for ``--debounce`` seconds, so a file that is still
+  being written or copied is never read half-way. Empty files and hidden
+  files (the usual write-then-rename temporaries) are left alone.
+- Deduplication: each file is fingerprinted with SHA-256 before it is
+  loaded. A fingerprint already recorded in import_state, under any file
+  name, is skipped, so a re-delivered file costs one read and no writes.
+- Backpressure: a scanner thread hands stable files to the loader thread
+  through a bounded queue. When the database falls behind and the queue
+  fills up, the scanner stops taking files in; they wait on disk.
+- One loader: files are applied one after another over the same pooled
+  connection, which also keeps the incremental student_stats updates
+  serial.
+- Live counters: files/sec and rows/sec over the last minute, the queue
+  depth and running totals are printed every ``--status-interval`` seconds
+  and, with ``--status-file``, written as JSON for monitoring.
+
+Rejected rows go to a ``rejects`` subdirectory, which is not watched.
+
+Usage:
+    python ingest_daemon.py incoming/
+    python ingest_daemon.py incoming/ --pattern "students_*.csv" --debounce 5 --queue-size 4
+    python ingest_daemon.py incoming/ --once
+    python cli.py watch incoming/ --status-file ingest_status.json
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import fnmatch
+import hashlib
+import argparse
+import threading
+from collections import deque
+from db_config import db_connection, create_students_table, create_import_state_table
+from csv_importer import (DEFAULT_BATCH_SIZE, DEFAULT_COMMIT_INTERVAL, REJECTS_SUFFIX, import_csv_to_db,
+                          default_rejects_path)
+from csv_readers import READERS
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_PATTERN = "*.csv"
+DEFAULT_POLL_INTERVAL = 1.0  # seconds between directory scans
+DEFAULT_DEBOUNCE = 2.0  # seconds a file must stay unchanged before it is loaded
+DEFAULT_QUEUE_SIZE = 8  # stable files waiting for the loader
+DEFAULT_STATUS_INTERVAL = 10.0  # seconds between counter lines
+
+# Seconds the files/sec and rows/sec rates are averaged over
+RATE_WINDOW = 60.0
+
+# Bytes read per step while fingerprinting a file
+FINGERPRINT_BLOCK_SIZE = 1 << 20
+
+# Subdirectory of the watched directory that receives the rejects files
+REJECTS_DIR_NAME = "rejects"
+
+def fingerprint_file(path):
+    """
+    Return the SHA-256 hex digest of a file.
+    
+    The digest covers every byte as stored, header included (for a
+    compressed file, the compressed bytes), like the checksum the importer
+    records in import_state.
+    """
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while True:
+            block = source.read(FINGERPRINT_BLOCK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class IngestCounters:
+    """
+    Running totals and recent rates, shared by the scanner and loader threads.
+    """
+    
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self.started = time.monotonic()
+        self.loaded = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.rows = 0
+        self.blocked_seconds = 0.0
+        self._recent = deque()  # (finish time, rows) of the files loaded within the window
+        self._lock = threading.Lock()
+    
+    def record_load(self, rows):
+        with self._lock:
+            self.loaded += 1
+            self.rows += rows
+            self._recent.append((time.monotonic(), rows))
+    
+    def record_duplicate(self):
+        with self._lock:
+            self.duplicates += 1
+    
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+    
+    def record_blocked(self, seconds):
+        with self._lock:
+            self.blocked_seconds += seconds
+    
+    def snapshot(self):
+        """
+        Return the totals and the files/sec and rows/sec rates over the last ``window`` seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and self._recent[0][0] < now - self.window:
+                self._recent.popleft()
+            # Until the daemon has run for a whole window, average over its uptime
+            span = max(min(self.window, now - self.started), 1e-3)
+            return {
+                'files_per_second': len(self._recent) / span,
+                'rows_per_second': sum(rows for _, rows in self._recent) / span,
+                'loaded': self.loaded,
+                'duplicates': self.duplicates,
+                'failed': self.failed,
+                'rows': self.rows,
+                'backpressure_seconds': self.blocked_seconds,
+                'uptime_seconds': now - self.started,
+            }
+
+class DirectoryWatcher:
+    """
+    Find the files of a directory that have stopped changing.
+    
+    Each file is remembered with its (size, mtime) signature and the time
+    that signature was first seen; poll() hands a file out once the
+    signature is ``debounce`` seconds old, and again whenever it changes
+    and settles anew.
+    """
+    
+    def __init__(self, directory, pattern=DEFAULT_PATTERN, debounce=DEFAULT_DEBOUNCE):
+        self.directory = directory
+        self.pattern = pattern
+        self.debounce = debounce
+        self._observed = {}  # path -> (signature, monotonic time it was first seen)
+        self._handed_out = {}  # path -> signature last returned by poll()
+    
+    def _candidates(self):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if (entry.name.startswith(".") or entry.name.endswith(REJECTS_SUFFIX)
+                        or not fnmatch.fnmatch(entry.name, self.pattern)):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Renamed or removed while the directory was being read
+                    continue
+                yield entry.path, (stat.st_size, stat.st_mtime_ns)
+    
+    def poll(self):
+        """
+        Scan the directory once and return ``(path, signature)`` for every file that became stable.
+        """
+        now = time.monotonic()
+        present = set()
+        stable = []
+        for path, signature in self._candidates():
+            present.add(path)
+            observed = self._observed.get(path)
+            if observed is None or observed[0] != signature:
+                self._observed[path] = (signature, now)
+            elif signature[0] > 0 and now - observed[1] >= self.debounce and self._handed_out.get(path) != signature:
+                self._handed_out[path] = signature
+                stable.append((path, signature))
+        
+        for path in list(self._observed):
+            if path not in present:
+                del self._observed[path]
+                self._handed_out.pop(path, None)
+        return stable
+    
+    def settled(self):
+        """
+        Return True when every file seen by the last poll has been handed out.
+        """
+        return all(self._handed_out.get(path) == signature for path, (signature, _) in self._observed.items()
+                   if signature[0] > 0)
+
+class IngestDaemon:
+    """
+    Scanner and loader threads joined by a bounded queue (see the module docstring).
+    """
+    
+    def __init__(self, directory, pattern=DEFAULT_PATTERN, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, queue_size=DEFAULT_QUEUE_SIZE,
+                 status_interval=DEFAULT_STATUS_INTERVAL, status_file=None, rejects_dir=None, import_options=None):
+        self.directory = directory
+        self.watcher = DirectoryWatcher(directory, pattern, debounce)
+        self.poll_interval = poll_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.status_interval = status_interval
+        self.status_file = status_file
+        self.rejects_dir = rejects_dir or os.path.join(directory, REJECTS_DIR_NAME)
+        self.import_options = import_options or {}
+        self.counters = IngestCounters()
+        self.fingerprints = set()
+        self.stop_event = threading.Event()
+        self._last_status = time.monotonic()
+    
+    def load_fingerprints(self):
+        """
+        Create the tables if needed and read the checksums of every file imported so far.
+        """
+        with db_connection() as connection:
+            create_students_table(connection)
+            create_import_state_table(connection)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT checksum FROM import_state")
+                self.fingerprints = {row['checksum'] for row in cursor.fetchall()}
+        console.print(f"[cyan]{len(self.fingerprints)} previously imported file fingerprints loaded[/cyan]")
+    
+    def enqueue(self, item):
+        """
+        Queue a stable file, waiting while the queue is full. Returns False if the daemon stopped first.
+        """
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        
+        console.print(f"[yellow]Loader queue full ({self.queue.maxsize} files); waiting for the database[/yellow]")
+        waiting_since = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.queue.put(item, timeout=self.poll_interval)
+                    return True
+                except queue.Full:
+                    self.print_status_if_due()
+            return False
+        finally:
+            self.counters.record_blocked(time.monotonic() - waiting_since)
+    
+    def load_file(self, path, signature):
+        """
+        Fingerprint one queued file and import it unless its contents were seen before.
+        """
+        name = os.path.basename(path)
+        try:
+            stat = os.stat(path)
+            if (stat.st_size, stat.st_mtime_ns) != signature:
+                # The watcher hands it out again once it settles
+                console.print(f"[dim]{name} changed while queued; waiting for it to settle again[/dim]")
+                return
+            checksum = fingerprint_file(path)
+        except FileNotFoundError:
+            console.print(f"[dim]{name} was removed before it could be loaded[/dim]")
+            return
+        
+        if checksum in self.fingerprints:
+            self.counters.record_duplicate()
+            console.print(f"[dim]Skipping {name}: same contents as an earlier file (checksum {checksum[:12]})[/dim]")
+            return
+        
+        rejects_path = default_rejects_path(os.path.join(self.rejects_dir, name))
+        summary = {}
+        try:
+            # The fingerprint already shows new contents, so skip the size/mtime shortcut
+            succeeded = import_csv_to_db(path, mode="incremental", force=True, rejects_path=rejects_path,
+                                         summary=summary, **self.import_options)
+        except Exception as e:
+            console.print(f"[bold red]Error:[/bold red] Failed to load {name}: {e}")
+            succeeded = False
+        
+        if succeeded:
+            self.fingerprints.add(checksum)
+            # Rows read from the file: applied (written or unchanged) and rejected
+            self.counters.record_load(sum(summary.get(count, 0)
+                                          for count in ("inserted", "updated", "unchanged", "rejected")))
+        else:
+            self.counters.record_failure()
+    
+    def load_files(self):
+        """
+        Loader thread: apply queued files until the daemon stops.
+        """
+        while not self.stop_event.is_set():
+            try:
+                path, signature = self.queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            try:
+                self.load_file(path, signature)
+            finally:
+                self.queue.task_done()
+    
+    def status(self):
+        return {**self.counters.snapshot(), 'queue_depth': self.queue.qsize(), 'queue_size': self.queue.maxsize}
+    
+    def print_status(self):
+        status = self.status()
+        console.print(
+            f"[bold cyan]Ingest:[/bold cyan] {status['files_per_second']:.2f} files/s, "
+            f"{status['rows_per_second']:,.0f} rows/s | queue {status['queue_depth']}/{status['queue_size']} | "
+            f"{status['loaded']} loaded ({status['rows']:,} rows), {status['duplicates']} duplicates, "
+            f"{status['failed']} failed | backpressure {status['backpressure_seconds']:.1f}s"
+        )
+        if self.status_file:
+            temp_path = f"{self.status_file}.tmp"
+            with open(temp_path, 'w') as status_output:
+                json.dump(status, status_output, indent=2)
+            # Readers never see a half-written file
+            os.replace(temp_path, self.status_file)
+        self._last_status = time.monotonic()
+    
+    def print_status_if_due(self):
+        if time.monotonic() - self._last_status >= self.status_interval:
+            self.print_status()
+    
+    def stop(self):
+        if not self.stop_event.is_set():
+            console.print("[yellow]Stopping after the file being loaded...[/yellow]")
+            self.stop_event.set()
+    
+    def run(self, once=False):
+        """
+        Watch the directory until interrupted, or with ``once`` until every file present has been handled.
+        """
+        os.makedirs(self.rejects_dir, exist_ok=True)
+        self.load_fingerprints()
+        if threading.current_thread() is threading.main_thread():
+            # Service managers stop daemons with SIGTERM; treat it like Ctrl+C
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        loader = threading.Thread(target=self.load_files, name="ingest-loader")
+        loader.start()
+        console.print(f"[bold cyan]Watching {self.directory} for {self.watcher.pattern} "
+                      f"(debounce {self.watcher.debounce:g}s, queue size {self.queue.maxsize})[/bold cyan]")
+        try:
+            while not self.stop_event.is_set():
+                stable = self.watcher.poll()
+                for item in stable:
+                    if not self.enqueue(item):
+                        break
+                if once and not stable and self.watcher.settled() and self.queue.unfinished_tasks == 0:
+                    break
+                self.print_status_if_due()
+                self.stop_event.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            self.stop()
+        finally:
+            self.stop_event.set()
+            loader.join()
+            self.print_status()
+        return self.counters.failed == 0
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Watch a directory and load new student CSV files as they arrive")
+    parser.add_argument("directory", help="Directory to watch (subdirectories are ignored)")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN,
+                        help=f"Shell pattern of the file names to load (default: {DEFAULT_PATTERN})")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help=f"Seconds a file must stay unchanged before it is loaded (default: {DEFAULT_DEBOUNCE:g})")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"Seconds between directory scans (default: {DEFAULT_POLL_INTERVAL:g})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Stable files held for the loader before scanning pauses (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--status-interval", type=float, default=DEFAULT_STATUS_INTERVAL,
+                        help=f"Seconds between counter lines (default: {DEFAULT_STATUS_INTERVAL:g})")
+    parser.add_argument("--status-file", default=None,
+                        help="JSON file rewritten with the counters at every status line")
+    parser.add_argument("--rejects-dir", default=None,
+                        help=f"Directory for rejects files (default: the '{REJECTS_DIR_NAME}' subdirectory)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows per multi-row upsert (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--commit-interval", type=int, default=DEFAULT_COMMIT_INTERVAL,
+                        help=f"Rows written between intermediate commits (default: {DEFAULT_COMMIT_INTERVAL})")
+    parser.add_argument("--reader", choices=READERS, default="mmap",
+                        help="Read files from a memory map or through the csv module (default: mmap)")
+    parser.add_argument("--once", action="store_true",
+                        help="Load the files already in the directory, then exit")
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.directory):
+        parser.error(f"{args.directory} is not a directory")
+    if args.queue_size < 1:
+        parser.error("--queue-size must be at least 1")
+    if args.poll_interval <= 0 or args.status_interval <= 0 or args.debounce < 0:
+        parser.error("--poll-interval and --status-interval must be positive and --debounce not negative")
+    
+    daemon = IngestDaemon(args.directory, pattern=args.pattern, debounce=args.debounce,
+                          poll_interval=args.poll_interval, queue_size=args.queue_size,
+                          status_interval=args.status_interval, status_file=args.status_file,
+                          rejects_dir=args.rejects_dir,
+                          import_options={'batch_size': args.batch_size, 'commit_interval': args.commit_interval,
+                                          'reader': args.reader})
+    try:
+        return 0 if daemon.run(once=args.once) else 1
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Ingestion stopped: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Run instrumentation: phase timers, query latency histograms and row counters.
+
+Instrumentation is off by default and every hook is then a cheap no-op, so
+the import and analysis code can call it unconditionally. ``--profile``
+turns it on; at the end of the run a summary table is printed and exported
+as JSON, showing whether the time went to MySQL (connect, truncate, insert,
+commit, query), to CSV handling (parse, validate) or to Rich (render).
+
+Profile modes:
+- ``timers``: phase timers, query latency histograms and rows/sec counters
+- ``cpu``: timers plus a cProfile capture of the main thread
+- ``memory``: timers plus tracemalloc allocation statistics
+- ``all``: everything
+
+Worker processes of the parallel import engine are not instrumented; their
+shards are counted as a single ``insert`` phase in the parent.
+"""
+
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from rich.console import Console
+from rich.table import Table
+from options import PROFILE_MODES
+
+console = Console()
+
+
+# Phases in the order they are reported
+PHASES = ("connect", "truncate", "decompress", "parse", "validate", "insert", "commit", "query", "render")
+
+# Upper bounds (ms) of the query latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Entries shown from cProfile and tracemalloc
+PROFILE_TOP = 15
+
+class Instrumentation:
+    """
+    Collects phase times, row counts and query latencies for one run.
+    
+    Recording is thread-safe, so reports fetched concurrently (see
+    report_runner.py) are all accounted for.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.mode = None
+        self._lock = threading.Lock()
+        self._profiler = None
+        self.profile_stats = None
+        self.reset()
+    
+    def reset(self):
+        self.phases = {}  # phase -> [seconds, calls, rows]
+        self.queries = {}  # query name -> latencies in ms
+        self.started = time.perf_counter()
+    
+    def add_time(self, phase, seconds, rows=0):
+        with self._lock:
+            totals = self.phases.setdefault(phase, [0.0, 0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+            totals[2] += rows
+    
+    def add_rows(self, phase, rows):
+        with self._lock:
+            self.phases.setdefault(phase, [0.0, 0, 0])[2] += rows
+    
+    def record_query(self, name, seconds):
+        with self._lock:
+            self.queries.setdefault(name, []).append(seconds * 1000)
+    
+    def start(self, mode="timers"):
+        """
+        Enable recording, and cProfile/tracemalloc as ``mode`` asks.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"unknown profile mode {mode!r} (expected one of {', '.join(PROFILE_MODES)})")
+        self.reset()
+        self.enabled = True
+        self.mode = mode
+        if mode in ("memory", "all"):
+            tracemalloc.start()
+        if mode in ("cpu", "all"):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+    
+    def stop(self):
+        """
+        Disable recording and return the collected report as a dict.
+        """
+        report = {
+            "mode": self.mode,
+            "wall_seconds": time.perf_counter() - self.started,
+            "phases": self.phase_rows(),
+            "queries": self.query_rows(),
+        }
+        
+        if self._profiler is not None:
+            self._profiler.disable()
+            stats = self.profile_stats = pstats.Stats(self._profiler)
+            report["cpu_profile"] = [
+                {
+                    "function": f"{os.path.basename(filename)}:{line}({function})",
+                    "calls": calls,
+                    "total_seconds": total_time,
+                    "cumulative_seconds": cumulative_time,
+                }
+                for (filename, line, function), (_, calls, total_time, cumulative_time, _)
+                in sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+            ]
+        
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report["memory"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top_allocations": [
+                    {"location": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                     "bytes": stat.size, "blocks": stat.count}
+                    for stat in snapshot.statistics("lineno")[:PROFILE_TOP]
+                ],
+            }
+        
+        self.enabled = False
+        self._profiler = None
+        return report
+    
+    def phase_rows(self):
+        """
+        Return one dict per recorded phase, in PHASES order.
+        """
+        with self._lock:
+            phases = {phase: list(totals) for phase, totals in self.phases.items()}
+        ordered = [phase for phase in PHASES if phase in phases] + sorted(set(phases) - set(PHASES))
+        rows = []
+        for phase in ordered:
+            seconds, calls, row_count = phases[phase]
+            rows.append({
+                "phase": phase,
+                "seconds": seconds,
+                "calls": calls,
+                "rows": row_count,
+                "rows_per_second": row_count / seconds if row_count and seconds else None,
+            })
+        return rows
+    
+    def query_rows(self):
+        """
+        Return latency statistics and a histogram for every recorded query.
+        """
+        with self._lock:
+            queries = {name: sorted(latencies) for name, latencies in self.queries.items()}
+        rows = []
+        for name, latencies in sorted(queries.items()):
+            histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            for latency in latencies:
+                histogram[next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency <= bound),
+                               len(LATENCY_BUCKETS_MS))] += 1
+            rows.append({
+                "query": name,
+                "count": len(latencies),
+                "total_ms": sum(latencies),
+                "p50_ms": latencies[(len(latencies) - 1) // 2],
+                "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "max_ms": latencies[-1],
+                "histogram": {
+                    (f"<={bound}ms" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]}ms"): count
+                    for i, (bound, count) in enumerate(zip(LATENCY_BUCKETS_MS + (None,), histogram))
+                    if count
+                },
+            })
+        return rows
+
+_instrumentation = Instrumentation()
+
+def start_instrumentation(mode="timers"):
+    _instrumentation.start(mode)
+
+@contextmanager
+def timed(phase, rows=0):
+    """
+    Time the enclosed block as ``phase``, counting ``rows`` processed.
+    """
+    if not _instrumentation.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _instrumentation.add_time(phase, time.perf_counter() - start, rows)
+
+def add_rows(phase, rows):
+    if _instrumentation.enabled:
+        _instrumentation.add_rows(phase, rows)
+
+def record_query(name, seconds):
+    if _instrumentation.enabled:
+        _instrumentation.record_query(name, seconds)
+
+def timed_function(phase):
+    """
+    Decorator timing every call of a function as ``phase``.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(phase):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def finish_instrumentation(output_path=None):
+    """
+    Stop instrumentation, print the summary and write it as JSON to ``output_path``.
+    """
+    if not _instrumentation.enabled:
+        return None
+    report = _instrumentation.stop()
+    print_instrumentation_report(report)
+    if output_path:
+        with open(output_path, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        console.print(f"[green]✓[/green] Timing report written to [cyan]{output_path}[/cyan]")
+        if _instrumentation.profile_stats is not None:
+            # Full profile for pstats, snakeviz and similar tools
+            stats_path = os.path.splitext(output_path)[0] + ".pstats"
+            _instrumentation.profile_stats.dump_stats(stats_path)
+            console.print(f"[green]✓[/green] CPU profile written to [cyan]{stats_path}[/cyan]")
+    return report
+
+def print_instrumentation_report(report):
+    """
+    Print the phase, query, CPU and memory tables of a report.
+    """
+    wall_seconds = report["wall_seconds"]
+    phase_table = Table(title=f"Run Timing ({wall_seconds:.2f}s wall-clock)", border_style="cyan")
+    phase_table.add_column("Phase", style="cyan")
+    phase_table.add_column("Seconds", justify="right")
+    phase_table.add_column("% of Run", justify="right")
+    phase_table.add_column("Calls", justify="right")
+    phase_table.add_column("Rows", justify="right")
+    phase_table.add_column("Rows/sec", justify="right", style="green")
+    for row in report["phases"]:
+        phase_table.add_row(
+            row["phase"],
+            f"{row['seconds']:.3f}",
+            f"{row['seconds'] / wall_seconds:.1%}" if wall_seconds else "-",
+            f"{row['calls']:,}",
+            f"{row['rows']:,}" if row["rows"] else "-",
+            f"{row['rows_per_second']:,.0f}" if row["rows_per_second"] else "-"
+        )
+    console.print(phase_table)
+    
+    if report["queries"]:
+        query_table = Table(title="Query Latency", border_style="cyan")
+        query_table.add_column("Query", style="cyan")
+        query_table.add_column("Count", justify="right")
+        query_table.add_column("p50 (ms)", justify="right", style="green")
+        query_table.add_column("p95 (ms)", justify="right")
+        query_table.add_column("Max (ms)", justify="right")
+        query_table.add_column("Histogram", style="dim")
+        for row in report["queries"]:
+            query_table.add_row(
+                row["query"],
+                str(row["count"]),
+                f"{row['p50_ms']:.2f}",
+                f"{row['p95_ms']:.2f}",
+                f"{row['max_ms']:.2f}",
+                ", ".join(f"{bucket}: {count}" for bucket, count in row["histogram"].items())
+            )
+        console.print(query_table)
+    
+    if "cpu_profile" in report:
+        cpu_table = Table(title="CPU Profile (by cumulative time)", border_style="cyan")
+        cpu_table.add_column("Function", style="cyan")
+        cpu_table.add_column("Calls", justify="right")
+        cpu_table.add_column("Own (s)", justify="right")
+        cpu_table.add_column("Cumulative (s)", justify="right", style="green")
+        for row in report["cpu_profile"]:
+            cpu_table.add_row(row["function"], f"{row['calls']:,}", f"{row['total_seconds']:.3f}",
+                              f"{row['cumulative_seconds']:.3f}")
+        console.print(cpu_table)
+    
+    if "memory" in report:
+        memory = report["memory"]
+        memory_table = Table(title=f"Memory (peak traced {memory['peak_bytes'] / 2 ** 20:,.1f} MiB)",
+                             border_style="cyan")
+        memory_table.add_column("Allocated At", style="cyan")
+        memory_table.add_column("Live KiB", justify="right", style="green")
+        memory_table.add_column("Blocks", justify="right")
+        for row in memory["top_allocations"]:
+            memory_table.add_row(row["location"], f"{row['bytes'] / 1024:,.1f}", f"{row['blocks']:,}")
+        console.print(memory_table)
@@ -1,8 +1,17 @@
 import os
 import sys
-from db_config import get_db_connection, create_students_table
-from csv_importer import import_csv_to_db
-from data_analyzer import display_all_records, display_summary_statistics
+import argparse
+from functools import partial
+from db_config import db_connection, create_students_table
+from csv_importer import import_csv_to_db, DEFAULT_BATCH_SIZE, DEFAULT_COMMIT_INTERVAL, ENGINES, MODES
+from csv_readers import READERS
+from data_analyzer import (display_all_records, display_summary_statistics, load_combined_report, DEFAULT_PAGE_SIZE,
+                           fetch_all_records, render_all_records, fetch_summary_statistics, render_summary_statistics,
+                           export_records)
+from report_queries import ANALYSIS_ENGINES
+from query_cache import CACHE_BACKENDS, configure_query_cache, print_cache_stats
+from instrumentation import PROFILE_MODES, start_instrumentation, finish_instrumentation
+from output_writers import OUTPUT_FORMATS, use_stderr_consoles
 from rich.console import Console
 from rich.panel import Panel
 from rich.rule import Rule
@@ -11,31 +20,128 @@ from rich.text import Text
 # Create a console instance for rich output
 console = Console()
 
-def main():
+def parse_args(argv=None):
+    """
+    Parse command-line options for the analysis workflow.
+    """
+    parser = argparse.ArgumentParser(description="Student Database Analysis System")
+    parser.add_argument("--csv", dest="csv_file_path", default=os.path.join("data", "students.csv"),
+                        help="Path to the student CSV (optionally gzip, bzip2 or zstd compressed), Parquet or Arrow file "
+                             "(default: data/students.csv)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows per multi-row INSERT (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--commit-interval", type=int, default=DEFAULT_COMMIT_INTERVAL,
+                        help=f"Rows written between intermediate commits (default: {DEFAULT_COMMIT_INTERVAL})")
+    parser.add_argument("--engine", choices=ENGINES, default="insert",
+                        help="Import engine: batched INSERTs, a bulk-loaded staging file, parallel worker processes "
+                             "or DuckDB's native CSV reader (default: insert)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for the parallel engine (default: CPU count)")
+    parser.add_argument("--mode", choices=MODES, default="replace",
+                        help="Reload the whole table or apply only new and changed rows (default: replace)")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="In incremental mode, delete rows whose ID is not in the CSV file")
+    parser.add_argument("--force", action="store_true",
+                        help="In incremental mode, import the file even if it is unchanged since the last import")
+    parser.add_argument("--reader", choices=READERS, default="mmap",
+                        help="Read the CSV file from a memory map or through the csv module (default: mmap)")
+    parser.add_argument("--rejects", dest="rejects_path", default=None,
+                        help="CSV file for rows that fail validation (default: the input path with a .rejects.csv suffix)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted insert-engine import from its last checkpoint instead of starting over")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream records through a server-side cursor and render them page by page")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Records per rendered page when streaming (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Maximum number of records to display")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="Number of records to skip before displaying")
+    parser.add_argument("--after-id", default=None,
+                        help="Display only records whose ID sorts after this one (keyset pagination)")
+    parser.add_argument("--analysis-engine", choices=ANALYSIS_ENGINES, default="sql",
+                        help="Compute statistics with SQL on the server, from an in-memory snapshot "
+                             "or from the student_stats summary table (default: sql)")
+    parser.add_argument("--combined", action="store_true",
+                        help="Compute summary statistics and top students in a single query")
+    parser.add_argument("--covering-index", action="store_true",
+                        help="Index student_records on (cgpa, id_no, name) instead of cgpa alone")
+    parser.add_argument("--query-cache", choices=CACHE_BACKENDS, default=None,
+                        help="Result cache backend for report queries (default: QUERY_CACHE from .env, or memory)")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="Seconds a cached query result stays valid (default: QUERY_CACHE_TTL from .env, or 300)")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Fetch the record listing and summary statistics concurrently and print per-report timings")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=None,
+                        help="Write the records as CSV, JSON Lines or Parquet instead of rendering a table; "
+                             "status messages go to stderr")
+    parser.add_argument("--output", default="-",
+                        help="File for --output-format (default: - for stdout)")
+    parser.add_argument("--profile", nargs="?", const="timers", choices=PROFILE_MODES, default=None,
+                        help="Time every phase and query and print a summary at the end; 'cpu' adds cProfile, "
+                             "'memory' adds tracemalloc, 'all' adds both (default when given: timers)")
+    parser.add_argument("--profile-output", default="profile_report.json",
+                        help="JSON file for the --profile summary (default: profile_report.json)")
+    return parser.parse_args(argv)
+
+def run_analysis_concurrently(args):
+    """
+    Fetch the record listing and summary statistics at the same time (see report_runner.py).
+    
+    Streamed listings render while they read, so with ``--stream`` the
+    records are shown first and only the statistics run through the runner.
+    """
+    from report_runner import run_reports
+    reports = []
+    if args.stream:
+        display_all_records(stream=True, page_size=args.page_size, limit=args.limit,
+                            offset=args.offset, after_id=args.after_id)
+    else:
+        reports.append(("All Student Records",
+                        partial(fetch_all_records, limit=args.limit, offset=args.offset, after_id=args.after_id),
+                        render_all_records))
+    report = load_combined_report(engine=args.analysis_engine) if args.combined else None
+    reports.append(("Summary Statistics",
+                    partial(fetch_summary_statistics, engine=args.analysis_engine, report=report),
+                    lambda results: render_summary_statistics(*results)))
+    return run_reports(reports)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.output_format:
+        # Keep stdout for the data alone
+        use_stderr_consoles()
+    if args.profile:
+        start_instrumentation(args.profile)
+    
     # Create a title with styling
     title = Text("Student Database Analysis System", style="bold magenta")
     
     console.print(Rule(title, style="cyan", align="center"))
     
-    # Define the path to the CSV file
-    csv_file_path = os.path.join("data", "students.csv")
+    # Path to the CSV file
+    csv_file_path = args.csv_file_path
     console.print(f"[cyan]Initializing application...[/cyan]")
     console.print(f"Working directory: [yellow]{os.getcwd()}[/yellow]")
     
     try:
+        configure_query_cache(backend=args.query_cache, ttl=args.cache_ttl)
+        
         # Get database connection and create table if needed
         console.print(Panel("[bold cyan]DATABASE SETUP[/bold cyan]", 
                            border_style="cyan"))
-        connection = get_db_connection()
-        create_students_table(connection)
-        console.print("[dim]Closing initial database connection[/dim]")
-        connection.close()
+        with db_connection() as connection:
+            create_students_table(connection, covering_index=args.covering_index)
         
         # Import data from CSV
         console.print(Panel("[bold cyan]DATA IMPORT PROCESS[/bold cyan]", 
                            border_style="cyan"))
         console.print(f"Starting import from CSV file: [yellow]{csv_file_path}[/yellow]")
-        if not import_csv_to_db(csv_file_path):
+        if not import_csv_to_db(csv_file_path, batch_size=args.batch_size,
+                                commit_interval=args.commit_interval, engine=args.engine,
+                                workers=args.workers, mode=args.mode,
+                                delete_missing=args.delete_missing, force=args.force,
+                                rejects_path=args.rejects_path, reader=args.reader, resume=args.resume):
             console.print("[bold red]Failed to import data. Exiting.[/bold red]")
             return
         
@@ -44,8 +150,19 @@ def main():
         # Display records and statistics
         console.print(Panel("[bold cyan]DATA ANALYSIS[/bold cyan]", 
                            border_style="cyan"))
-        display_all_records()
-        display_summary_statistics()
+        if args.output_format:
+            export_records(args.output, args.output_format, limit=args.limit, offset=args.offset,
+                           after_id=args.after_id)
+            report = load_combined_report(engine=args.analysis_engine) if args.combined else None
+            display_summary_statistics(engine=args.analysis_engine, report=report)
+        elif args.concurrent:
+            run_analysis_concurrently(args)
+        else:
+            display_all_records(stream=args.stream, page_size=args.page_size, limit=args.limit,
+                                offset=args.offset, after_id=args.after_id)
+            report = load_combined_report(engine=args.analysis_engine) if args.combined else None
+            display_summary_statistics(engine=args.analysis_engine, report=report)
+        print_cache_stats()
         
         console.print(Rule(style="cyan"))
         console.print("[bold green]Program completed successfully.[/bold green]")
@@ -55,6 +172,9 @@ def main():
         console.print(f"\n[bold red]ERROR: {e}[/bold red]")
         console.print("[red]Program execution failed[/red]")
         return
+    
+    finally:
+        finish_instrumentation(args.profile_output)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+Choices and defaults of the command-line options.
+
+Defined here, with no imports, so that cli.py can build a subcommand's
+parser (and answer --help) without loading rich or the database layer. The
+modules that implement each option import their constants from here.
+"""
+
+# Import engines (csv_importer.py)
+ENGINES = ("insert", "bulk", "parallel", "native")
+
+# Import modes: reload the whole table or apply only the differences
+MODES = ("replace", "incremental")
+
+# Number of rows sent to the database per multi-row INSERT
+DEFAULT_BATCH_SIZE = 1000
+
+# Number of rows written between intermediate commits
+DEFAULT_COMMIT_INTERVAL = 50000
+
+# CSV readers (csv_readers.py)
+READERS = ("mmap", "stream")
+
+# Analysis engines: push the work down to the database, or load the table once
+# and compute every report in memory (see analytics_engine.py)
+ANALYSIS_ENGINES = ("sql", "memory", "stats")
+
+# Query result cache backends (query_cache.py)
+CACHE_BACKENDS = ("memory", "disk", "off")
+
+# --profile modes (instrumentation.py)
+PROFILE_MODES = ("timers", "cpu", "memory", "all")
+
+# Headless output formats (output_writers.py)
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet")
+
+# Rows fetched and rendered per table when streaming records
+DEFAULT_PAGE_SIZE = 500
@@ -0,0 +1,163 @@
+"""
+Headless output: write report rows as CSV, JSON Lines or Parquet.
+
+Used instead of Rich tables when the output is meant for another program or
+is too large to render. Rows are written in batches through a large buffer,
+to a file or to stdout (``-``), with no per-row console work. While headless
+output goes to stdout, the Rich consoles of every module are moved to
+stderr (see use_stderr_consoles) so that status messages do not mix with
+the data.
+
+Parquet output needs the optional ``pyarrow`` package.
+"""
+
+import io
+import sys
+import csv
+import json
+from decimal import Decimal
+from rich.console import Console
+from options import OUTPUT_FORMATS
+
+# Bytes buffered before each write to the file or pipe
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Column order of student record output
+RECORD_COLUMNS = ("id_no", "name", "cgpa")
+
+# Arrow types of the student record columns in Parquet output
+RECORD_TYPES = {"id_no": "string", "name": "string", "cgpa": "float64"}
+
+def use_stderr_consoles():
+    """
+    Send the output of every module-level Rich console to stderr.
+    
+    Each module creates its own ``console``; the ones already imported are
+    redirected, so stdout only carries headless output.
+    """
+    for module in list(sys.modules.values()):
+        console = getattr(module, "console", None)
+        if isinstance(console, Console):
+            console.file = sys.stderr
+
+def _json_default(value):
+    # AVG() and similar aggregates come back from MySQL as Decimal
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class RowWriter:
+    """
+    Buffered writer for dict rows in one of OUTPUT_FORMATS.
+    
+    Use it as a context manager and call write_rows with batches of rows;
+    ``columns`` fixes the column order of CSV and Parquet output. ``path``
+    ``"-"`` writes to stdout, which is flushed but not closed.
+    
+    ``types`` maps columns to Arrow type names (such as ``"string"`` or
+    ``"float64"``) for the Parquet schema; the type of any other column is
+    inferred from the first batch, or null if no rows are written. Parquet
+    output without rows is still a valid file with that schema.
+    """
+    
+    def __init__(self, path, output_format, columns, types=None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"unknown output format {output_format!r} (expected one of {', '.join(OUTPUT_FORMATS)})")
+        self.path = path
+        self.output_format = output_format
+        self.columns = list(columns)
+        self.types = dict(types or {})
+        self.row_count = 0
+        self._to_stdout = path == "-"
+        self._binary = None
+        self._text = None
+        self._csv_writer = None
+        self._parquet_writer = None
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def open(self):
+        if self.output_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow") from None
+        
+        if self._to_stdout:
+            self._binary = io.BufferedWriter(sys.stdout.buffer, buffer_size=WRITE_BUFFER_SIZE)
+        else:
+            self._binary = open(self.path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        
+        if self.output_format != "parquet":
+            self._text = io.TextIOWrapper(self._binary, encoding='utf-8', newline='', write_through=False)
+        if self.output_format == "csv":
+            self._csv_writer = csv.writer(self._text, lineterminator='\n')
+            self._csv_writer.writerow(self.columns)
+    
+    def write_rows(self, rows):
+        """
+        Write a batch of dict rows.
+        """
+        if not rows:
+            return
+        if self.output_format == "csv":
+            columns = self.columns
+            self._csv_writer.writerows([row[column] for column in columns] for row in rows)
+        elif self.output_format == "jsonl":
+            self._text.write("".join(json.dumps(row, default=_json_default) + "\n" for row in rows))
+        else:
+            self._write_parquet(rows)
+        self.row_count += len(rows)
+    
+    def _parquet_schema(self, columns):
+        """
+        Build the Parquet schema from ``types``, inferring undeclared columns from ``columns`` (name -> values).
+        """
+        import pyarrow as pa
+        fields = []
+        for column in self.columns:
+            if column in self.types:
+                column_type = pa.type_for_alias(self.types[column])
+            elif columns:
+                column_type = pa.array(columns[column]).type
+            else:
+                column_type = pa.null()
+            fields.append(pa.field(column, column_type))
+        return pa.schema(fields)
+    
+    def _open_parquet_writer(self, columns=None):
+        import pyarrow.parquet as pq
+        self._parquet_writer = pq.ParquetWriter(self._binary, self._parquet_schema(columns))
+    
+    def _write_parquet(self, rows):
+        import pyarrow as pa
+        
+        columns = {column: [row[column] for row in rows] for column in self.columns}
+        if self._parquet_writer is None:
+            self._open_parquet_writer(columns)
+        # Each batch becomes one row group
+        self._parquet_writer.write_table(pa.table(columns, schema=self._parquet_writer.schema))
+    
+    def close(self):
+        if self._binary is None:
+            return
+        if self.output_format == "parquet" and self._parquet_writer is None:
+            # No rows: write the schema alone rather than leave an empty, unreadable file
+            self._open_parquet_writer()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._text is not None:
+            self._text.flush()
+            # Detach so closing the wrapper never closes stdout
+            self._text.detach()
+        self._binary.flush()
+        if self._to_stdout:
+            self._binary.detach()
+        else:
+            self._binary.close()
+        self._binary = None
@@ -0,0 +1,248 @@
+"""
+Result cache for the analysis report queries.
+
+The report queries only return different rows after import_csv_to_db has
+run, so their results are cached and reused. Entries are keyed on the
+database (backend and DB_NAME or DB_PATH), the normalized SQL text and its
+parameters, expire after a TTL, and are tagged with the data version token
+the importer bumps in every import transaction (see
+db_config.bump_data_version); an entry written under an older version is
+treated as a miss.
+
+Two backends are available: ``memory`` (a per-process LRU) and ``disk``
+(pickled entries in a directory, shared between runs and processes).
+Configure the cache in .env with QUERY_CACHE (memory, disk or off),
+QUERY_CACHE_TTL, QUERY_CACHE_SIZE, QUERY_CACHE_MAX_ROWS and QUERY_CACHE_DIR.
+"""
+
+import os
+import re
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from rich.console import Console
+from rich.table import Table
+from db_config import get_data_version
+from db_backends import get_backend
+from instrumentation import timed, record_query
+from config import getenv
+from options import CACHE_BACKENDS
+
+console = Console()
+
+
+# Cache defaults, overridable through .env
+DEFAULT_CACHE_BACKEND = "memory"
+DEFAULT_CACHE_TTL = 300  # seconds an entry stays valid
+DEFAULT_CACHE_SIZE = 128  # entries kept by the memory backend
+DEFAULT_CACHE_MAX_ROWS = 100000  # larger results are not cached
+DEFAULT_CACHE_DIR = ".query_cache"
+
+def normalize_sql(sql):
+    """
+    Collapse whitespace so that differently formatted copies of a query share a key.
+    """
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").rstrip()
+
+def cache_key(sql, params=None, database=None):
+    """
+    Return the cache key for a query and its parameters.
+    
+    ``database`` identifies the database the query runs against, so that
+    databases sharing a disk cache directory never see each other's rows.
+    """
+    payload = json.dumps([database, normalize_sql(sql), list(params or ())], default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class MemoryBackend:
+    """
+    In-process LRU store holding at most ``max_entries`` results.
+    """
+    
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class DiskBackend:
+    """
+    Directory of pickled entries, one file per key.
+    
+    Files are written to a temporary name and renamed into place, so a
+    concurrent reader never sees a partial entry. Unreadable files are
+    treated as misses.
+    """
+    
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+    
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+    
+    def set(self, key, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as cache_file:
+                pickle.dump(entry, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.directory, name))
+
+class QueryCache:
+    """
+    Caches query results by SQL and parameters, checked against the data version.
+    
+    Each entry is stored as ``(data_version, expires_at, rows)``. A lookup
+    costs one primary-key read of the data_version table, however expensive
+    the cached query is.
+    """
+    
+    def __init__(self, backend=DEFAULT_CACHE_BACKEND, ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_CACHE_SIZE,
+                 max_rows=DEFAULT_CACHE_MAX_ROWS, directory=DEFAULT_CACHE_DIR):
+        if backend not in CACHE_BACKENDS:
+            raise ValueError(f"unknown cache backend {backend!r} (expected one of {', '.join(CACHE_BACKENDS)})")
+        self.backend_name = backend
+        self.ttl = ttl
+        self.max_rows = max_rows
+        if backend == "memory":
+            self.backend = MemoryBackend(max_entries)
+        elif backend == "disk":
+            self.backend = DiskBackend(directory)
+        else:
+            self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+    
+    def fetch(self, connection, sql, params=None, name=None):
+        """
+        Return all rows of a query, from the cache when a current entry exists.
+        
+        ``name`` labels the query in the --profile latency report.
+        """
+        start = time.perf_counter()
+        with timed("query"):
+            rows = self._fetch(connection, sql, params)
+        record_query(name or normalize_sql(sql)[:60], time.perf_counter() - start)
+        return rows
+    
+    def _fetch(self, connection, sql, params):
+        if self.backend is None:
+            return self._execute(connection, sql, params)
+        
+        storage = get_backend()
+        key = cache_key(sql, params, (storage.name, storage.database_identity()))
+        version = get_data_version(connection)
+        entry = self.backend.get(key)
+        if entry is not None:
+            entry_version, expires_at, rows = entry
+            if entry_version == version and expires_at > time.time():
+                with self._stats_lock:
+                    self.hits += 1
+                # Hand out copies so callers cannot change the cached rows
+                return [dict(row) for row in rows]
+        
+        with self._stats_lock:
+            self.misses += 1
+        rows = self._execute(connection, sql, params)
+        if len(rows) <= self.max_rows:
+            self.backend.set(key, (version, time.time() + self.ttl, [dict(row) for row in rows]))
+        return rows
+    
+    def _execute(self, connection, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return list(cursor.fetchall())
+    
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+def configure_query_cache(backend=None, ttl=None):
+    """
+    Replace the process-wide cache; unset arguments fall back to .env and the defaults.
+    """
+    global _query_cache
+    cache = QueryCache(
+        backend=backend or getenv("QUERY_CACHE", DEFAULT_CACHE_BACKEND),
+        ttl=ttl if ttl is not None else float(getenv("QUERY_CACHE_TTL", DEFAULT_CACHE_TTL)),
+        max_entries=int(getenv("QUERY_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+        max_rows=int(getenv("QUERY_CACHE_MAX_ROWS", DEFAULT_CACHE_MAX_ROWS)),
+        directory=getenv("QUERY_CACHE_DIR", DEFAULT_CACHE_DIR),
+    )
+    with _query_cache_lock:
+        _query_cache = cache
+    return cache
+
+def get_query_cache():
+    """
+    Return the process-wide cache, configuring it from .env on first use.
+    """
+    with _query_cache_lock:
+        cache = _query_cache
+    return cache if cache is not None else configure_query_cache()
+
+def cached_query(connection, sql, params=None, name=None):
+    """
+    Run a read-only query through the process-wide cache and return all its rows.
+    """
+    return get_query_cache().fetch(connection, sql, params, name=name)
+
+def print_cache_stats():
+    """
+    Print the hit and miss counts of the process-wide cache.
+    """
+    cache = get_query_cache()
+    lookups = cache.hits + cache.misses
+    if cache.backend is None or lookups == 0:
+        return
+    
+    table = Table(title=f"Query Cache ({cache.backend_name}, TTL {cache.ttl:g}s)")
+    table.add_column("Hits", justify="right", style="green")
+    table.add_column("Misses", justify="right", style="yellow")
+    table.add_column("Hit Rate", justify="right", style="cyan")
+    table.add_row(str(cache.hits), str(cache.misses), f"{cache.hits / lookups:.0%}")
+    console.print(table)
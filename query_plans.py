@@ -0,0 +1,133 @@
+"""
+Query Plan Inspection
+
+Runs EXPLAIN on every report query and flags plans that scan the whole
+student_records table or sort it with a filesort, so missing or unused
+indexes are easy to spot.
+
+Usage:
+    python query_plans.py
+    python query_plans.py --create-indexes --covering
+"""
+
+import sys
+import argparse
+from db_config import db_connection, ensure_indexes, get_secondary_indexes
+from db_backends import get_backend
+from data_analyzer import build_records_query
+from report_queries import (SUMMARY_SQL, TOP_STUDENTS_SQL, PERFORMANCE_CATEGORY_SQL, STUDENT_GRADES_SQL,
+                            GRADE_DISTRIBUTION_SQL, GAP_ANALYSIS_SQL, COMBINED_REPORT_SQL)
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# (report name, SQL, parameters) for every query the reports run
+REPORT_QUERIES = [
+    ("all records", *build_records_query()),
+    ("all records (keyset page)", *build_records_query(limit=500, after_id="")),
+    ("summary statistics", SUMMARY_SQL, ()),
+    ("top students", TOP_STUDENTS_SQL, (3,)),
+    ("performance categories", PERFORMANCE_CATEGORY_SQL, ()),
+    ("student letter grades", STUDENT_GRADES_SQL, ()),
+    ("grade distribution", GRADE_DISTRIBUTION_SQL, ()),
+    ("gap analysis", GAP_ANALYSIS_SQL, ()),
+    ("combined report", COMBINED_REPORT_SQL, (3,)),
+]
+
+def explain_query(connection, sql, params=()):
+    """
+    Return the EXPLAIN rows for a query.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return cursor.fetchall()
+
+def plan_warnings(plan_row):
+    """
+    Return the problems worth flagging in one EXPLAIN row.
+    """
+    warnings = []
+    extra = plan_row.get('Extra') or ""
+    if plan_row.get('type') == "ALL":
+        warnings.append("full table scan")
+    elif plan_row.get('type') == "index":
+        warnings.append("full index scan")
+    if "Using filesort" in extra:
+        warnings.append("filesort")
+    if "Using temporary" in extra:
+        warnings.append("temporary table")
+    return warnings
+
+def explain_reports(connection):
+    """
+    EXPLAIN every report query and print the plans with flagged problems.
+
+    Returns the number of plan rows that were flagged.
+    """
+    table = Table(title="Report Query Plans", border_style="cyan")
+    table.add_column("Report", style="cyan")
+    table.add_column("Table")
+    table.add_column("Access", style="magenta")
+    table.add_column("Key")
+    table.add_column("Rows", justify="right")
+    table.add_column("Extra", style="dim")
+    table.add_column("Flags", style="bold red")
+    
+    flagged = 0
+    for name, sql, params in REPORT_QUERIES:
+        for i, plan_row in enumerate(explain_query(connection, sql, params)):
+            warnings = plan_warnings(plan_row)
+            if warnings:
+                flagged += 1
+            table.add_row(
+                name if i == 0 else "",
+                str(plan_row.get('table') or ""),
+                str(plan_row.get('type') or ""),
+                str(plan_row.get('key') or ""),
+                str(plan_row.get('rows') or ""),
+                plan_row.get('Extra') or "",
+                ", ".join(warnings)
+            )
+    
+    console.print(table)
+    return flagged
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN the report queries and flag full scans")
+    parser.add_argument("--create-indexes", action="store_true",
+                        help="Create the CGPA index on student_records before explaining")
+    parser.add_argument("--covering", action="store_true",
+                        help="With --create-indexes, use the covering (cgpa, id_no, name) index")
+    args = parser.parse_args(argv)
+    
+    # The plan columns checked by plan_warnings are MySQL's
+    backend = get_backend()
+    if backend.name != "mysql":
+        console.print(f"[bold red]Error:[/bold red] Query plans are only inspected on MySQL; DB_BACKEND is {backend.name}")
+        return 1
+    
+    try:
+        with db_connection() as connection:
+            if args.create_indexes:
+                ensure_indexes(connection, covering=args.covering)
+            
+            indexes = get_secondary_indexes(connection)
+            console.print("[cyan]Secondary indexes on student_records:[/cyan] "
+                          + (", ".join(f"{name} {columns}" for name, (_, columns) in indexes.items()) or "[yellow]none[/yellow]"))
+            
+            flagged = explain_reports(connection)
+    
+    except Exception as e:
+        console.print(f"\n[bold red]ERROR: {e}[/bold red]")
+        return 1
+    
+    if flagged:
+        console.print(f"[yellow]⚠ {flagged} plan steps scan or sort the whole table.[/yellow] "
+                      "Aggregates over every row always need a scan; ranking and range queries should use idx_cgpa.")
+    else:
+        console.print("[bold green]✓ No full scans or filesorts found[/bold green]")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
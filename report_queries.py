@@ -0,0 +1,261 @@
+"""
+SQL queries behind the analysis reports.
+
+Each fetch_* function runs its report as SQL on the server and returns rows
+as dicts, in the same shape the in-memory analytics engine produces, so the
+display code in data_analyzer and additional_queries_exercise can render
+either. Every query goes through the result cache (see query_cache.py), so
+repeated reports on unchanged data do not rescan the table.
+"""
+
+from query_cache import cached_query
+from grading import PERFORMANCE_CATEGORIES, LETTER_GRADES, case_expression
+from streaming_stats import bin_expression, distribution_from_bins, distribution_summary
+from options import ANALYSIS_ENGINES
+
+SUMMARY_SQL = """
+SELECT 
+    COUNT(*) as count,
+    MIN(cgpa) as min_cgpa,
+    MAX(cgpa) as max_cgpa,
+    AVG(cgpa) as avg_cgpa
+FROM student_records
+"""
+
+# Ties are broken by id_no, as in the memory engine and the combined report
+TOP_STUDENTS_SQL = "SELECT id_no, name, cgpa FROM student_records ORDER BY cgpa DESC, id_no LIMIT %s"
+
+PERFORMANCE_CATEGORY_SQL = f"""
+SELECT 
+    {case_expression(PERFORMANCE_CATEGORIES)} AS performance_category,
+    COUNT(*) AS student_count,
+    MIN(cgpa) AS min_cgpa,
+    MAX(cgpa) AS max_cgpa,
+    AVG(cgpa) AS avg_cgpa
+FROM student_records
+GROUP BY performance_category
+ORDER BY min_cgpa DESC
+"""
+
+STUDENT_GRADES_SQL = f"""
+SELECT 
+    id_no,
+    name,
+    cgpa,
+    {case_expression(LETTER_GRADES)} AS letter_grade
+FROM student_records
+ORDER BY cgpa DESC, id_no
+"""
+
+GRADE_DISTRIBUTION_SQL = f"""
+SELECT 
+    {case_expression(LETTER_GRADES)} AS letter_grade,
+    COUNT(*) AS count
+FROM student_records
+GROUP BY letter_grade
+ORDER BY MIN(cgpa) DESC
+"""
+
+# LEAD() pairs each student with the next one in the ranking, so the gaps are
+# computed by the server in the same pass that sorts the rows
+GAP_ANALYSIS_SQL = """
+SELECT 
+    id_no,
+    name,
+    cgpa,
+    cgpa - LEAD(cgpa) OVER (ORDER BY cgpa DESC, id_no) AS gap
+FROM student_records
+ORDER BY cgpa DESC, id_no
+"""
+
+# Per-bin aggregates for the CGPA histogram and running moments (see
+# streaming_stats.py): a few hundred rows whatever the table size
+CGPA_BINS_SQL = f"""
+SELECT 
+    {bin_expression()} AS cgpa_bin,
+    COUNT(*) AS student_count,
+    SUM(cgpa) AS sum_cgpa,
+    SUM(cgpa * cgpa) AS sum_squares
+FROM student_records
+GROUP BY cgpa_bin
+"""
+
+def fetch_summary(connection):
+    """
+    Return the count, minimum, maximum and average CGPA.
+    """
+    rows = cached_query(connection, SUMMARY_SQL, name="summary")
+    return rows[0] if rows else None
+
+def fetch_top_students(connection, limit=3):
+    """
+    Return the ``limit`` students with the highest CGPA.
+    """
+    return cached_query(connection, TOP_STUDENTS_SQL, (limit,), name="top_students")
+
+def fetch_cgpa_distribution(connection):
+    """
+    Return the standard deviation and percentiles of CGPA from a histogram query.
+    """
+    bins = cached_query(connection, CGPA_BINS_SQL, name="cgpa_bins")
+    return distribution_summary(*distribution_from_bins(bins))
+
+def fetch_performance_categories(connection):
+    """
+    Return the count and CGPA range of each performance category.
+    """
+    return cached_query(connection, PERFORMANCE_CATEGORY_SQL, name="performance_categories")
+
+def fetch_student_grades(connection):
+    """
+    Return every student with their letter grade, highest CGPA first.
+    """
+    return cached_query(connection, STUDENT_GRADES_SQL, name="student_grades")
+
+def fetch_grade_distribution(connection):
+    """
+    Return the number of students holding each letter grade.
+    """
+    return cached_query(connection, GRADE_DISTRIBUTION_SQL, name="grade_distribution")
+
+def fetch_gap_analysis(connection):
+    """
+    Return the students ranked by CGPA with the gap to the next student.
+
+    The last student's gap is None.
+    """
+    return cached_query(connection, GAP_ANALYSIS_SQL, name="gap_analysis")
+
+# One statement, one round trip: a single aggregate scan grouped by both
+# scales and the CGPA histogram bin (every category/grade pair is a disjoint
+# CGPA range, so both grade histograms, the overall statistics and the
+# percentiles can be rolled up from these groups) plus the top-N rows. The top-N query is a derived table rather than a
+# parenthesized UNION member, which SQLite does not accept
+COMBINED_REPORT_SQL = f"""
+SELECT 
+    'bucket' AS row_type,
+    {case_expression(PERFORMANCE_CATEGORIES)} AS performance_category,
+    {case_expression(LETTER_GRADES)} AS letter_grade,
+    {bin_expression()} AS cgpa_bin,
+    COUNT(*) AS student_count,
+    MIN(cgpa) AS min_cgpa,
+    MAX(cgpa) AS max_cgpa,
+    SUM(cgpa) AS sum_cgpa,
+    SUM(cgpa * cgpa) AS sum_squares,
+    NULL AS id_no,
+    NULL AS name
+FROM student_records
+GROUP BY performance_category, letter_grade, cgpa_bin
+UNION ALL
+SELECT 'top', NULL, NULL, NULL, 1, cgpa, cgpa, cgpa, NULL, id_no, name
+FROM (SELECT id_no, name, cgpa
+      FROM student_records
+      ORDER BY cgpa DESC, id_no
+      LIMIT %s) AS top_students
+"""
+
+def _roll_up(buckets, key, label_column, count_column):
+    """
+    Merge bucket rows that share ``key`` into one row per label.
+
+    Returns rows with the count, minimum, maximum and average CGPA, ordered
+    by minimum CGPA descending like the standalone queries.
+    """
+    merged = {}
+    for bucket in buckets:
+        label = bucket[key]
+        row = merged.get(label)
+        if row is None:
+            merged[label] = {
+                label_column: label,
+                count_column: bucket['student_count'],
+                'min_cgpa': bucket['min_cgpa'],
+                'max_cgpa': bucket['max_cgpa'],
+                'sum_cgpa': bucket['sum_cgpa'],
+            }
+        else:
+            row[count_column] += bucket['student_count']
+            row['min_cgpa'] = min(row['min_cgpa'], bucket['min_cgpa'])
+            row['max_cgpa'] = max(row['max_cgpa'], bucket['max_cgpa'])
+            row['sum_cgpa'] += bucket['sum_cgpa']
+    
+    rows = sorted(merged.values(), key=lambda row: row['min_cgpa'], reverse=True)
+    for row in rows:
+        row['avg_cgpa'] = row.pop('sum_cgpa') / row[count_column]
+    return rows
+
+def build_combined_report(buckets, top_students, distribution=None):
+    """
+    Assemble the combined report from category/grade buckets and top rows.
+    
+    ``buckets`` are dicts with performance_category, letter_grade,
+    student_count, min_cgpa, max_cgpa and sum_cgpa. Returns a dict with the
+    ``summary``, ``performance_categories``, ``grade_distribution`` and
+    ``top_students`` results, each shaped like the matching fetch_* function.
+    A ``distribution`` from streaming_stats.distribution_summary adds the
+    standard deviation and percentiles to the summary.
+    """
+    count = sum(bucket['student_count'] for bucket in buckets)
+    if count:
+        summary = {
+            'count': count,
+            'min_cgpa': min(bucket['min_cgpa'] for bucket in buckets),
+            'max_cgpa': max(bucket['max_cgpa'] for bucket in buckets),
+            'avg_cgpa': sum(bucket['sum_cgpa'] for bucket in buckets) / count,
+        }
+    else:
+        summary = {'count': 0, 'min_cgpa': None, 'max_cgpa': None, 'avg_cgpa': None}
+    if count and distribution:
+        summary.update(distribution)
+    
+    grade_distribution = [
+        {'letter_grade': row['letter_grade'], 'count': row['count']}
+        for row in _roll_up(buckets, 'letter_grade', 'letter_grade', 'count')
+    ]
+    
+    return {
+        'summary': summary,
+        'performance_categories': _roll_up(buckets, 'performance_category', 'performance_category', 'student_count'),
+        'grade_distribution': grade_distribution,
+        'top_students': top_students,
+    }
+
+def fetch_report_buckets(connection, top_n=3):
+    """
+    Run the combined report query and return its (buckets, top_students, bins) rows.
+    
+    ``bins`` are the per-group rows for streaming_stats.distribution_from_bins.
+    """
+    rows = cached_query(connection, COMBINED_REPORT_SQL, (top_n,), name="combined_report")
+    
+    bins = [row for row in rows if row['row_type'] == 'bucket']
+    buckets = {}
+    for row in bins:
+        key = (row['performance_category'], row['letter_grade'])
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = {
+                'performance_category': row['performance_category'],
+                'letter_grade': row['letter_grade'],
+                'student_count': row['student_count'],
+                'min_cgpa': row['min_cgpa'],
+                'max_cgpa': row['max_cgpa'],
+                'sum_cgpa': row['sum_cgpa'],
+            }
+        else:
+            bucket['student_count'] += row['student_count']
+            bucket['min_cgpa'] = min(bucket['min_cgpa'], row['min_cgpa'])
+            bucket['max_cgpa'] = max(bucket['max_cgpa'], row['max_cgpa'])
+            bucket['sum_cgpa'] += row['sum_cgpa']
+    top_students = sorted(
+        ({'id_no': row['id_no'], 'name': row['name'], 'cgpa': row['min_cgpa']} for row in rows if row['row_type'] == 'top'),
+        key=lambda student: (-student['cgpa'], student['id_no'])
+    )
+    return list(buckets.values()), top_students, bins
+
+def fetch_combined_report(connection, top_n=3):
+    """
+    Compute the summary, category, grade distribution and top-N reports in one query.
+    """
+    buckets, top_students, bins = fetch_report_buckets(connection, top_n)
+    return build_combined_report(buckets, top_students, distribution_summary(*distribution_from_bins(bins)))
@@ -0,0 +1,78 @@
+"""
+Concurrent report runner.
+
+Reports are independent read-only queries, so their latencies need not add
+up. run_reports fetches every report at the same time on a thread pool
+driven by asyncio (each fetch borrows its own connection from the pool in
+db_config, which is thread-safe), then renders the results strictly in the
+order the reports were given, as soon as each one and all before it are
+ready. Per-report and total wall-clock times are printed at the end.
+
+A report is a ``(name, fetch, render)`` tuple: ``fetch()`` runs in a worker
+thread and must not print; ``render(result)`` runs on the main thread.
+"""
+
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+async def run_reports_async(reports, workers=None):
+    """
+    Fetch ``reports`` concurrently and render them in order.
+
+    Returns True if every report succeeded; a failing report is reported
+    and skipped without stopping the others.
+    """
+    loop = asyncio.get_running_loop()
+    timings = []
+    failed = False
+    started = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=workers or len(reports) or 1, thread_name_prefix="report") as executor:
+        async def timed_fetch(fetch):
+            fetch_started = time.perf_counter()
+            result = await loop.run_in_executor(executor, fetch)
+            return result, time.perf_counter() - fetch_started
+        
+        tasks = [asyncio.ensure_future(timed_fetch(fetch)) for _, fetch, _ in reports]
+        for (name, _, render), task in zip(reports, tasks):
+            try:
+                result, elapsed = await task
+            except Exception as e:
+                console.print(f"\n[bold red]Error:[/bold red] {name} failed: {e}")
+                timings.append((name, None))
+                failed = True
+                continue
+            
+            console.print(f"\n[bold cyan]{name}[/bold cyan]")
+            render(result)
+            timings.append((name, elapsed))
+    
+    print_report_timings(timings, time.perf_counter() - started)
+    return not failed
+
+def run_reports(reports, workers=None):
+    """
+    Run ``reports`` concurrently from synchronous code (see run_reports_async).
+    """
+    return asyncio.run(run_reports_async(reports, workers=workers))
+
+def print_report_timings(timings, total):
+    """
+    Print each report's fetch time and the total wall-clock time of the run.
+    """
+    table = Table(title="Report Timings")
+    table.add_column("Report", style="cyan")
+    table.add_column("Fetch Time", justify="right", style="magenta")
+    
+    for name, elapsed in timings:
+        table.add_row(name, f"{elapsed * 1000:.1f} ms" if elapsed is not None else "[red]failed[/red]")
+    
+    fetched = [elapsed for _, elapsed in timings if elapsed is not None]
+    table.add_row("[bold]Sum of reports[/bold]", f"{sum(fetched) * 1000:.1f} ms")
+    table.add_row("[bold]Total wall-clock[/bold]", f"[bold]{total * 1000:.1f} ms[/bold]")
+    console.print(table)
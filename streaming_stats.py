@@ -0,0 +1,174 @@
+"""
+Streaming CGPA statistics: running moments and a fixed-bin histogram.
+
+Both take one value at a time in constant memory, can take a value back out
+and can be merged, so the importer keeps them up to date while rows stream
+past (see student_stats.StatsAccumulator) and parallel shards combine theirs.
+Saved with the student_stats summary, they answer the standard deviation,
+median and other percentiles without rescanning student_records.
+
+RunningMoments uses Welford's update (and Chan's formula to merge), which
+avoids the cancellation of the textbook sum-of-squares variance. The
+histogram has one bin per hundredth of a grade point, centred on the
+hundredths, between CGPA_MIN and CGPA_MAX: a few hundred counters however
+many rows there are, and exact percentiles for CGPAs recorded to two
+decimals, as they are in the CSV files.
+"""
+
+import math
+from grading import CGPA_MIN, CGPA_MAX
+
+# Histogram bins per grade point
+HISTOGRAM_BINS_PER_POINT = 100
+
+# Number of histogram bins, both ends of the CGPA range included
+HISTOGRAM_BINS = round((CGPA_MAX - CGPA_MIN) * HISTOGRAM_BINS_PER_POINT) + 1
+
+# Percentiles shown with the summary statistics
+PERCENTILES = (25, 50, 75, 90)
+
+def bin_expression(column="cgpa"):
+    """
+    Build a SQL expression for the histogram bin of ``column``, matching CGPAHistogram.bin_for.
+    """
+    return f"ROUND(({column} - {CGPA_MIN}) * {HISTOGRAM_BINS_PER_POINT})"
+
+class RunningMoments:
+    """
+    Count, mean and sum of squared deviations (M2) of a stream of values.
+    """
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        # Rounding can leave a tiny negative remainder once the values are all equal
+        self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+
+    @classmethod
+    def from_sums(cls, count, total, squares):
+        """
+        Build moments from a count, a sum and a sum of squares.
+
+        Only cancellation-safe for values close together, such as the
+        contents of one histogram bin.
+        """
+        if not count:
+            return cls()
+        mean = total / count
+        return cls(count, mean, max(squares - total * mean, 0.0))
+
+    @property
+    def variance(self):
+        """
+        Population variance, or None without values.
+        """
+        return self.m2 / self.count if self.count else None
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance) if self.count else None
+
+class CGPAHistogram:
+    """
+    Counts of CGPAs per hundredth of a grade point.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts=None):
+        self.counts = list(counts) if counts is not None else [0] * HISTOGRAM_BINS
+
+    @staticmethod
+    def bin_for(cgpa):
+        index = round((cgpa - CGPA_MIN) * HISTOGRAM_BINS_PER_POINT)
+        return min(max(index, 0), HISTOGRAM_BINS - 1)
+
+    @staticmethod
+    def bin_value(index):
+        return CGPA_MIN + index / HISTOGRAM_BINS_PER_POINT
+
+    def add(self, cgpa):
+        self.counts[self.bin_for(cgpa)] += 1
+
+    def remove(self, cgpa):
+        self.counts[self.bin_for(cgpa)] -= 1
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentiles(self, percents=PERCENTILES):
+        """
+        Return {percent: CGPA} by the nearest-rank method, or None for an empty histogram.
+
+        The p-th percentile is the smallest CGPA with at least p% of the
+        students at or below it.
+        """
+        total = self.count
+        if total == 0:
+            return None
+        ranks = sorted((max(1, math.ceil(percent * total / 100)), percent) for percent in percents)
+        results = {}
+        seen = 0
+        pending = iter(ranks)
+        rank, percent = next(pending)
+        for index, count in enumerate(self.counts):
+            seen += count
+            while seen >= rank:
+                results[percent] = self.bin_value(index)
+                try:
+                    rank, percent = next(pending)
+                except StopIteration:
+                    return results
+        return results
+
+def distribution_summary(moments, histogram, percents=PERCENTILES):
+    """
+    Return the standard deviation and percentiles in the shape the summary reports use.
+    """
+    return {'stddev_cgpa': moments.stddev, 'percentiles': histogram.percentiles(percents)}
+
+def distribution_from_bins(bins):
+    """
+    Rebuild (RunningMoments, CGPAHistogram) from per-bin aggregate rows.
+
+    ``bins`` are dicts with cgpa_bin, student_count, sum_cgpa and
+    sum_squares, like the rows of report_queries.CGPA_BINS_SQL. A bin may
+    appear more than once; its rows are added together.
+    """
+    moments = RunningMoments()
+    histogram = CGPAHistogram()
+    for row in bins:
+        histogram.counts[min(max(int(row['cgpa_bin']), 0), HISTOGRAM_BINS - 1)] += row['student_count']
+        moments.merge(RunningMoments.from_sums(row['student_count'], float(row['sum_cgpa']),
+                                               float(row['sum_squares'])))
+    return moments, histogram
@@ -0,0 +1,246 @@
+"""
+Pre-aggregated summary of student_records, maintained by the importer.
+
+The student_stats table holds a single row with the count, sum, minimum and
+maximum CGPA, the per-grade and per-category counts, a bucket for every
+(performance category, letter grade) pair, the top-K students, and the
+running moments and histogram behind the standard deviation and percentiles
+(see streaming_stats.py). Reading it
+is one primary-key lookup, however large student_records is. The importer
+builds the summary while rows stream past (see StatsAccumulator) and saves
+it in the same transaction as the data; when it cannot keep the summary
+exact, it marks the row stale and the next reader recomputes it from
+student_records.
+"""
+
+import json
+import struct
+from bisect import insort
+from db_config import create_student_stats_table
+from db_backends import get_backend
+from grading import PERFORMANCE_CATEGORIES, LETTER_GRADES, classify
+from report_queries import build_combined_report, fetch_report_buckets
+from streaming_stats import RunningMoments, CGPAHistogram, distribution_summary, distribution_from_bins
+
+# Number of top students kept in the summary
+TOP_K = 10
+
+# Columns written by save_student_stats
+STATS_COLUMNS = ("id", "row_count", "cgpa_sum", "cgpa_min", "cgpa_max", "grade_counts", "category_counts", "buckets",
+                 "top_students", "cgpa_mean", "cgpa_m2", "histogram", "is_stale")
+
+def stored_cgpa(cgpa):
+    """
+    Round a CGPA to the single-precision value a FLOAT column stores.
+    
+    Grading thresholds are applied to the stored value, exactly as the SQL
+    CASE expressions see it. Only MySQL's column is single precision (see
+    StatsAccumulator); SQLite and DuckDB store the double unchanged.
+    """
+    return struct.unpack('f', struct.pack('f', cgpa))[0]
+
+class StatsAccumulator:
+    """
+    Running summary of a set of student rows.
+    
+    Rows can be added and removed. Counts and sums stay exact either way,
+    but removing a row that holds a bucket minimum or maximum, or that sits
+    in the top-K list, cannot be undone without rescanning, so ``exact`` is
+    cleared and the saved summary is marked stale. The running moments and
+    histogram are exact in both directions.
+    """
+    
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.buckets = {}  # (category, grade) -> [count, sum, min, max]
+        self.top_students = []  # sorted by (-cgpa, id_no), at most top_k entries
+        self.moments = RunningMoments()
+        self.histogram = CGPAHistogram()
+        self.exact = True
+        self.single_precision = get_backend().single_precision_float
+    
+    def add(self, id_no, name, cgpa):
+        if self.single_precision:
+            cgpa = stored_cgpa(cgpa)
+        key = (classify(cgpa, PERFORMANCE_CATEGORIES), classify(cgpa, LETTER_GRADES))
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = [1, cgpa, cgpa, cgpa]
+        else:
+            bucket[0] += 1
+            bucket[1] += cgpa
+            if cgpa < bucket[2]:
+                bucket[2] = cgpa
+            if cgpa > bucket[3]:
+                bucket[3] = cgpa
+        self.moments.add(cgpa)
+        self.histogram.add(cgpa)
+        
+        entry = (-cgpa, id_no, name)
+        if len(self.top_students) < self.top_k or entry < self.top_students[-1]:
+            insort(self.top_students, entry)
+            del self.top_students[self.top_k:]
+    
+    def remove(self, id_no, name, cgpa):
+        if self.single_precision:
+            cgpa = stored_cgpa(cgpa)
+        key = (classify(cgpa, PERFORMANCE_CATEGORIES), classify(cgpa, LETTER_GRADES))
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.exact = False
+            return
+        self.moments.remove(cgpa)
+        self.histogram.remove(cgpa)
+        bucket[0] -= 1
+        bucket[1] -= cgpa
+        if bucket[0] <= 0:
+            del self.buckets[key]
+        elif cgpa <= bucket[2] or cgpa >= bucket[3]:
+            self.exact = False
+        
+        entry = (-cgpa, id_no, name)
+        if self.top_students and entry <= self.top_students[-1]:
+            self.exact = False
+    
+    def merge(self, other):
+        """
+        Fold another accumulator (for example a parallel shard's) into this one.
+        """
+        for key, (count, total, minimum, maximum) in other.buckets.items():
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = [count, total, minimum, maximum]
+            else:
+                bucket[0] += count
+                bucket[1] += total
+                bucket[2] = min(bucket[2], minimum)
+                bucket[3] = max(bucket[3], maximum)
+        self.top_students = sorted(self.top_students + other.top_students)[:self.top_k]
+        self.moments.merge(other.moments)
+        self.histogram.merge(other.histogram)
+        self.exact = self.exact and other.exact
+    
+    @property
+    def count(self):
+        return sum(bucket[0] for bucket in self.buckets.values())
+    
+    def bucket_rows(self):
+        """
+        Return the buckets in the row shape report_queries.build_combined_report expects.
+        """
+        return [
+            {
+                'performance_category': category,
+                'letter_grade': grade,
+                'student_count': count,
+                'min_cgpa': minimum,
+                'max_cgpa': maximum,
+                'sum_cgpa': total,
+            }
+            for (category, grade), (count, total, minimum, maximum) in self.buckets.items()
+        ]
+    
+    def top_rows(self, limit=None):
+        return [
+            {'id_no': id_no, 'name': name, 'cgpa': -negated_cgpa}
+            for negated_cgpa, id_no, name in self.top_students[:limit]
+        ]
+    
+    def distribution(self):
+        """
+        Return the standard deviation and percentiles (see streaming_stats.distribution_summary).
+        """
+        return distribution_summary(self.moments, self.histogram)
+    
+    def report(self, top_n=3):
+        """
+        Return the combined report (see report_queries.build_combined_report).
+        """
+        return build_combined_report(self.bucket_rows(), self.top_rows(top_n), self.distribution())
+    
+    @classmethod
+    def from_report_rows(cls, buckets, top_students, bins, top_k=TOP_K):
+        accumulator = cls(top_k)
+        for bucket in buckets:
+            accumulator.buckets[(bucket['performance_category'], bucket['letter_grade'])] = [
+                bucket['student_count'], bucket['sum_cgpa'], bucket['min_cgpa'], bucket['max_cgpa']
+            ]
+        accumulator.top_students = sorted((-student['cgpa'], student['id_no'], student['name'])
+                                          for student in top_students)[:top_k]
+        accumulator.moments, accumulator.histogram = distribution_from_bins(bins)
+        return accumulator
+
+def save_student_stats(connection, stats):
+    """
+    Write the summary row. The caller commits, normally together with the data.
+    """
+    buckets = stats.bucket_rows()
+    report = build_combined_report(buckets, [])
+    summary = report['summary']
+    grade_counts = {row['letter_grade']: row['count'] for row in report['grade_distribution']}
+    category_counts = {row['performance_category']: row['student_count'] for row in report['performance_categories']}
+    
+    sql = get_backend().upsert_sql("student_stats", STATS_COLUMNS, ("id",))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (
+            1,
+            summary['count'],
+            sum(bucket['sum_cgpa'] for bucket in buckets),
+            summary['min_cgpa'],
+            summary['max_cgpa'],
+            json.dumps(grade_counts),
+            json.dumps(category_counts),
+            json.dumps(buckets),
+            json.dumps(stats.top_rows()),
+            stats.moments.mean,
+            stats.moments.m2,
+            json.dumps(stats.histogram.counts),
+            not stats.exact,
+        ))
+
+def mark_student_stats_stale(connection):
+    """
+    Flag the summary as out of date, for example while a table is being reloaded.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("UPDATE student_stats SET is_stale = TRUE WHERE id = 1")
+
+def load_student_stats(connection):
+    """
+    Return the saved summary as a StatsAccumulator, or None if it is missing or stale.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT row_count, buckets, top_students, cgpa_mean, cgpa_m2, histogram, is_stale "
+                           "FROM student_stats WHERE id = 1")
+            row = cursor.fetchone()
+    except Exception as e:
+        if get_backend().is_missing_table_error(e):
+            return None
+        raise
+    
+    if row is None or row['is_stale']:
+        return None
+    stats = StatsAccumulator.from_report_rows(json.loads(row['buckets']), json.loads(row['top_students']), [])
+    stats.moments = RunningMoments(row['row_count'], row['cgpa_mean'], row['cgpa_m2'])
+    stats.histogram = CGPAHistogram(json.loads(row['histogram']))
+    return stats
+
+def refresh_student_stats(connection):
+    """
+    Recompute the summary from student_records with one combined query and save it.
+    """
+    create_student_stats_table(connection)
+    stats = StatsAccumulator.from_report_rows(*fetch_report_buckets(connection, TOP_K))
+    save_student_stats(connection, stats)
+    connection.commit()
+    return stats
+
+def get_student_stats(connection):
+    """
+    Return the current summary, recomputing it first if it is missing or stale.
+    """
+    stats = load_student_stats(connection)
+    if stats is None:
+        stats = refresh_student_stats(connection)
+    return stats
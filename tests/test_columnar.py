@@ -0,0 +1,65 @@
+"""
+Round trip of a columnar snapshot through an embedded backend.
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("pyarrow")
+
+# CGPAs on the performance category boundaries, and just below them
+BOUNDARY_ROWS = [
+    ("S001", "Ada", 3.9),
+    ("S002", "Ben", 3.8),
+    ("S003", "Cy", 3.79),
+    ("S004", "Dee", 3.5),
+    ("S005", "Eve", 3.49),
+    ("S006", "Fay", 3.3),
+    ("S007", "Gus", 3.0),
+    ("S008", "Hal", 2.99),
+]
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "students.db"))
+    from db_config import close_connection_pools
+    close_connection_pools()
+    yield tmp_path
+    close_connection_pools()
+
+def stored_rows():
+    from db_config import db_connection
+    with db_connection() as connection, connection.cursor() as cursor:
+        cursor.execute("SELECT id_no, name, cgpa FROM student_records ORDER BY id_no")
+        return [(row['id_no'], row['name'], row['cgpa']) for row in cursor.fetchall()]
+
+def test_parquet_round_trip_keeps_cgpa_and_bands(sqlite_database):
+    import numpy as np
+    from db_config import db_connection, create_students_table
+    from csv_importer import import_csv_to_db
+    from columnar import export_student_records, read_student_batches, band_indices, SHARD_SCALES
+    
+    csv_path = sqlite_database / "students.csv"
+    csv_path.write_text("id_no,name,cgpa\n" + "".join(f"{i},{n},{c}\n" for i, n, c in BOUNDARY_ROWS))
+    with db_connection() as connection:
+        create_students_table(connection)
+    assert import_csv_to_db(str(csv_path))
+    assert stored_rows() == BOUNDARY_ROWS
+    
+    snapshot = str(sqlite_database / "students.parquet")
+    assert export_student_records(snapshot) == {snapshot: len(BOUNDARY_ROWS)}
+    _, batches = read_student_batches(snapshot)
+    exported = [value for batch in batches for value in batch.column("cgpa").to_pylist()]
+    assert exported == [cgpa for _, _, cgpa in BOUNDARY_ROWS]
+    
+    assert import_csv_to_db(snapshot)
+    assert stored_rows() == BOUNDARY_ROWS
+    
+    scale = SHARD_SCALES["category"]
+    labels = [scale[index][0] for index in band_indices(np.asarray(exported), scale)]
+    assert labels == ["Excellent", "Excellent", "Very Good", "Very Good", "Good", "Good", "Satisfactory",
+                      "Needs Improvement"]